@@ -1,3 +1,32 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import Artifact, ConversionResult, SourceInput
+
+
+class ArtifactInline(admin.TabularInline):
+    model = Artifact
+    extra = 0
+    readonly_fields = ("kind", "media_format", "url", "created_at")
+
+
+@admin.register(SourceInput)
+class SourceInputAdmin(admin.ModelAdmin):
+    list_display = ("content_hash", "kind", "size", "created_at")
+    list_filter = ("kind",)
+    search_fields = ("content_hash",)
+
+
+@admin.register(ConversionResult)
+class ConversionResultAdmin(admin.ModelAdmin):
+    list_display = ("pipeline", "source", "prompt_version", "hit_count", "created_at", "last_accessed_at")
+    list_filter = ("pipeline", "prompt_version")
+    search_fields = ("source__content_hash", "params_hash")
+    list_select_related = ("source",)
+    readonly_fields = ("created_at",)
+    inlines = [ArtifactInline]
+
+
+@admin.register(Artifact)
+class ArtifactAdmin(admin.ModelAdmin):
+    list_display = ("kind", "media_format", "url", "result", "created_at")
+    list_filter = ("kind", "media_format")
@@ -0,0 +1,121 @@
+import math
+import threading
+import time
+
+from django.conf import settings
+
+
+class AdmissionGate:
+    """
+    Bounds how many requests to one endpoint run at once. Up to `limit`
+    run; up to `queue_size` more wait for a slot, each for at most
+    `max_wait` seconds; anything beyond that is shed immediately, so a
+    traffic spike cannot pile up behind blocked workers. A `limit` of 0
+    admits everything.
+
+    Keeps an exponentially weighted moving average of how long admitted
+    requests hold their slot, to suggest when shed clients should retry.
+    """
+
+    def __init__(self, name: str, limit: int, queue_size: int, max_wait: float, alpha: float = 0.2):
+        self.name = name
+        self.limit = limit
+        self.queue_size = queue_size
+        self.max_wait = max_wait
+        self.alpha = alpha
+        self.active = 0
+        self.waiting = 0
+        self._hold_seconds = None
+        self._counts = {"admitted": 0, "queued": 0, "shed_queue_full": 0, "shed_timeout": 0}
+        self._max_waiting = 0
+        self._cond = threading.Condition()
+
+    def acquire(self) -> bool:
+        """
+        Takes a slot, waiting in the queue if needed. Returns False if the
+        request is shed.
+        """
+        if not self.limit:
+            return True
+        with self._cond:
+            if self.active < self.limit:
+                self.active += 1
+                self._counts["admitted"] += 1
+                return True
+            if self.waiting >= self.queue_size:
+                self._counts["shed_queue_full"] += 1
+                return False
+
+            self.waiting += 1
+            self._counts["queued"] += 1
+            self._max_waiting = max(self._max_waiting, self.waiting)
+            give_up_at = time.monotonic() + self.max_wait
+            try:
+                while self.active >= self.limit:
+                    left = give_up_at - time.monotonic()
+                    if left <= 0:
+                        self._counts["shed_timeout"] += 1
+                        return False
+                    self._cond.wait(left)
+                self.active += 1
+                self._counts["admitted"] += 1
+                return True
+            finally:
+                self.waiting -= 1
+
+    def release(self, held_seconds: float):
+        if not self.limit:
+            return
+        with self._cond:
+            self.active -= 1
+            if self._hold_seconds is None:
+                self._hold_seconds = held_seconds
+            else:
+                self._hold_seconds += self.alpha * (held_seconds - self._hold_seconds)
+            self._cond.notify()
+
+    def retry_after(self) -> int:
+        """
+        Seconds until the queue has likely drained: the current backlog
+        times the average slot hold time, spread over the slots.
+        """
+        with self._cond:
+            if self._hold_seconds is None:
+                return settings.ADMISSION_RETRY_AFTER
+            backlog = self.waiting + 1
+            return max(1, math.ceil(self._hold_seconds * backlog / self.limit))
+
+    def stats(self):
+        with self._cond:
+            return {
+                **self._counts,
+                "active": self.active,
+                "queue_depth": self.waiting,
+                "max_queue_depth": self._max_waiting,
+                "limit": self.limit,
+                "queue_size": self.queue_size,
+                "max_wait": self.max_wait,
+                "avg_hold_seconds": round(self._hold_seconds, 3) if self._hold_seconds is not None else None,
+            }
+
+
+gates = {
+    endpoint: AdmissionGate(endpoint, limit, settings.ADMISSION_QUEUE_SIZE, settings.ADMISSION_MAX_WAIT)
+    for endpoint, limit in settings.ADMISSION_LIMITS.items()
+}
+
+
+def gate_for(url_name: str):
+    """
+    Returns the gate of the conversion endpoint a URL name belongs to (its
+    page, stream and API routes share one), or None for other routes.
+    """
+    if not url_name:
+        return None
+    for prefix in ("api_batch_", "api_"):
+        if url_name.startswith(prefix):
+            url_name = url_name[len(prefix):]
+            break
+    if url_name.endswith("_stream"):
+        url_name = url_name[:-len("_stream")]
+    return gates.get(url_name)
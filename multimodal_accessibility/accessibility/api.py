@@ -0,0 +1,217 @@
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connection
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST, require_safe
+
+from . import pipelines
+from .forms import (
+    ImageToAudioForm,
+    ComplexTextForm,
+    SignLanguageForm,
+    DocumentUploadForm,
+)
+from .admission import gates
+from .breaker import breakers
+from .hedging import hedger
+from .image_index import image_index
+from .routing import router
+from .text_index import text_indexes
+from .storage import media_store
+
+logger = logging.getLogger(__name__)
+
+
+def _absolute(request, url):
+    return request.build_absolute_uri(url) if url else None
+
+
+def _image_to_audio(request, data):
+    img_path = media_store.save_upload(data["image"])
+    audio_format = data["audio_format"] or settings.TTS_AUDIO_FORMAT
+    out = pipelines.describe_image(img_path, data["detail_level"], audio_format, size=data["image"].size)
+    return {
+        "description": out["description"],
+        "audio_url": _absolute(request, out["audio_url"]),
+        "audio_type": out["audio_type"],
+        "degraded": out["degraded"],
+    }
+
+
+def _text_to_visual(request, data):
+    out = pipelines.visual_explanation(data["text"], data["generate_diagram"])
+    return {
+        "visual_plan": out["plan"],
+        "diagram_url": _absolute(request, out["diagram_url"]),
+        "degraded": out["degraded"],
+    }
+
+
+def _text_to_sign(request, data):
+    return pipelines.sign_language(data["text"])
+
+
+def _document_accessible(request, data):
+    audio_format = data["audio_format"] or settings.TTS_AUDIO_FORMAT
+    out = pipelines.accessible_document(data["document"], data["generate_audio"], audio_format)
+    return {
+        **out["accessible"],
+        "audio_url": _absolute(request, out["audio_url"]),
+        "audio_type": out["audio_type"] if out["audio_url"] else None,
+        "degraded": out["degraded"],
+    }
+
+
+# pipeline name -> (form used for validation, file field or None, handler)
+PIPELINES = {
+    "image-to-audio": (ImageToAudioForm, "image", _image_to_audio),
+    "text-to-visual": (ComplexTextForm, None, _text_to_visual),
+    "text-to-sign": (SignLanguageForm, None, _text_to_sign),
+    "document-accessible": (DocumentUploadForm, "document", _document_accessible),
+}
+
+
+def _request_data(request):
+    if request.content_type == "application/json":
+        try:
+            return json.loads(request.body or b"{}")
+        except json.JSONDecodeError:
+            return None
+    return request.POST.dict()
+
+
+@csrf_exempt
+@require_POST
+def convert(request, pipeline):
+    """
+    Runs one conversion and returns its result as JSON. Accepts a JSON body
+    or a (multipart) form post with the same fields as the HTML forms.
+    """
+    form_class, _, handler = PIPELINES[pipeline]
+    data = _request_data(request)
+    if data is None:
+        return JsonResponse({"error": "Invalid JSON body."}, status=400)
+
+    form = form_class(data, request.FILES)
+    if not form.is_valid():
+        return JsonResponse({"errors": form.errors}, status=400)
+    return JsonResponse({"pipeline": pipeline, "result": handler(request, form.cleaned_data)})
+
+
+def _batch_items(request, file_field):
+    """
+    Returns (shared_fields, items). Items are dicts of fields, plus files:
+    - multipart: one item per uploaded `file_field` file, or per `text` value
+    - JSON: {"items": [...], "defaults": {...}}, items being dicts or strings
+    """
+    if request.content_type == "application/json":
+        body = _request_data(request)
+        if not isinstance(body, dict) or not isinstance(body.get("items"), list):
+            return None, None
+        defaults = body.get("defaults") or {}
+        items = [({"text": item} if isinstance(item, str) else item, {}) for item in body["items"]]
+        return defaults, items
+
+    defaults = {k: v for k, v in request.POST.items() if k != "text"}
+    if file_field:
+        items = [({}, {file_field: f}) for f in request.FILES.getlist(file_field)]
+    else:
+        items = [({"text": text}, {}) for text in request.POST.getlist("text")]
+    return defaults, items
+
+
+def _run_item(request, form_class, handler, defaults, fields, files):
+    try:
+        form = form_class({**defaults, **fields}, files)
+        if not form.is_valid():
+            return {"ok": False, "errors": form.errors}
+        return {"ok": True, "result": handler(request, form.cleaned_data)}
+    except Exception as exc:
+        logger.exception("Batch item failed")
+        return {"ok": False, "error": str(exc)}
+    finally:
+        connection.close()
+
+
+@csrf_exempt
+@require_POST
+def batch(request, pipeline):
+    """
+    Runs many conversions of one pipeline in a single request, concurrently,
+    and returns a result (or error) per item, in submission order.
+    """
+    form_class, file_field, handler = PIPELINES[pipeline]
+    defaults, items = _batch_items(request, file_field)
+    if items is None:
+        return JsonResponse({"error": 'Expected a JSON object with an "items" list.'}, status=400)
+    if not items:
+        return JsonResponse({"error": "No items submitted."}, status=400)
+    if len(items) > settings.API_BATCH_MAX_ITEMS:
+        return JsonResponse(
+            {"error": f"At most {settings.API_BATCH_MAX_ITEMS} items per batch."}, status=400
+        )
+
+    with ThreadPoolExecutor(max_workers=min(settings.API_BATCH_CONCURRENCY, len(items))) as pool:
+        futures = [
+            pool.submit(_run_item, request, form_class, handler, defaults, fields, files)
+            for fields, files in items
+        ]
+        item_results = [{"index": i, **f.result()} for i, f in enumerate(futures)]
+
+    return JsonResponse({"pipeline": pipeline, "results": item_results})
+
+
+@require_safe
+def routing(request):
+    """
+    Returns the observed model latencies and the recent routing decisions.
+    """
+    return JsonResponse(router.snapshot())
+
+
+@require_safe
+def hedging(request):
+    """
+    Returns per-endpoint call, hedge and hedge win counts and the current
+    hedge delay.
+    """
+    return JsonResponse(hedger.stats())
+
+
+@require_safe
+def image_index_status(request):
+    """
+    Returns how often images missing from the cache matched a visually
+    identical, already described image.
+    """
+    return JsonResponse(image_index.stats())
+
+
+@require_safe
+def text_index_status(request):
+    """
+    Returns per pipeline how often texts missing from the cache matched a
+    similar stored input.
+    """
+    return JsonResponse({pipeline: index.stats() for pipeline, index in text_indexes.items()})
+
+
+@require_safe
+def breakers_status(request):
+    """
+    Returns the circuit breaker state of each upstream capability.
+    """
+    return JsonResponse({capability: b.snapshot() for capability, b in breakers.items()})
+
+
+@require_safe
+def admission_status(request):
+    """
+    Returns per conversion endpoint the running requests, queue depth and
+    admitted, queued and shed counts.
+    """
+    return JsonResponse({endpoint: gate.stats() for endpoint, gate in gates.items()})
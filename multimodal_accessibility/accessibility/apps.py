@@ -1,6 +1,30 @@
+import threading
+
 from django.apps import AppConfig
+from django.conf import settings
+from django.core.signals import request_started
+
+_gc_lock = threading.Lock()
+
+
+def _start_media_gc(**kwargs):
+    """
+    Starts the media GC thread with the first request, so only processes
+    that serve requests run it: not migrate, test or other management
+    commands, nor the runserver autoreloader's parent.
+    """
+    with _gc_lock:
+        if not request_started.disconnect(dispatch_uid="accessibility.media_gc"):
+            return
+    from .storage import media_store
+
+    media_store.start_gc_thread(settings.MEDIA_GC_INTERVAL)
 
 
 class AccessibilityConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'accessibility'
+
+    def ready(self):
+        if settings.MEDIA_GC_INTERVAL > 0:
+            request_started.connect(_start_media_gc, dispatch_uid="accessibility.media_gc")
@@ -0,0 +1,124 @@
+import logging
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+from openai import APIError
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpen(Exception):
+    """Raised instead of calling upstream while a capability's breaker is open."""
+
+    def __init__(self, capability: str):
+        super().__init__(f"{capability} is temporarily unavailable")
+        self.capability = capability
+
+
+class CircuitBreaker:
+    """
+    Tracks the outcome of the last `window` calls to one upstream capability.
+    A call that fails upstream (an openai APIError, which includes timeouts
+    and connection errors) or takes longer than `slow_seconds` counts as bad;
+    other exceptions, such as DeadlineExceeded raised before anything is
+    sent, are not counted. Once at least `min_calls` were made and the bad
+    share reaches `failure_rate` the breaker opens and calls fail fast with
+    CircuitOpen. After `cooldown` seconds one probe call is let through:
+    success closes the breaker, failure keeps it open for another cooldown.
+    """
+
+    def __init__(self, capability: str, slow_seconds: float, window: int = 20, min_calls: int = 5,
+                 failure_rate: float = 0.5, cooldown: float = 30):
+        self.capability = capability
+        self.slow_seconds = slow_seconds
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.cooldown = cooldown
+        self._outcomes = deque(maxlen=window)
+        self._opened_at = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if self._probing or time.monotonic() - self._opened_at >= self.cooldown:
+            return "half-open"
+        return "open"
+
+    def _allow(self):
+        """
+        Returns None if the call must fail fast, else whether it is the probe.
+        """
+        with self._lock:
+            if self._opened_at is None:
+                return False
+            if self._probing or time.monotonic() - self._opened_at < self.cooldown:
+                return None
+            self._probing = True
+            return True
+
+    def _record(self, ok: bool):
+        with self._lock:
+            if self._probing:
+                self._probing = False
+                if ok:
+                    logger.info("Circuit for %s closed", self.capability)
+                    self._opened_at = None
+                    self._outcomes.clear()
+                else:
+                    self._opened_at = time.monotonic()
+                return
+
+            self._outcomes.append(ok)
+            bad = self._outcomes.count(False)
+            if len(self._outcomes) >= self.min_calls and bad / len(self._outcomes) >= self.failure_rate:
+                if self._opened_at is None:
+                    logger.warning("Circuit for %s opened (%d of %d calls bad)",
+                                   self.capability, bad, len(self._outcomes))
+                self._opened_at = time.monotonic()
+
+    def _release_probe(self):
+        # The probe ended without an upstream outcome; let the next call probe.
+        with self._lock:
+            self._probing = False
+
+    def call(self, fn, *args, **kwargs):
+        probe = self._allow()
+        if probe is None:
+            raise CircuitOpen(self.capability)
+        started = time.monotonic()
+        try:
+            result = fn(*args, **kwargs)
+        except APIError:
+            self._record(False)
+            raise
+        except Exception:
+            if probe:
+                self._release_probe()
+            raise
+        self._record(time.monotonic() - started <= self.slow_seconds)
+        return result
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "state": self.state,
+                "recent_calls": len(self._outcomes),
+                "recent_bad": self._outcomes.count(False),
+            }
+
+
+breakers = {
+    capability: CircuitBreaker(
+        capability,
+        slow_seconds,
+        min_calls=settings.BREAKER_MIN_CALLS,
+        failure_rate=settings.BREAKER_FAILURE_RATE,
+        cooldown=settings.BREAKER_COOLDOWN,
+    )
+    for capability, slow_seconds in settings.BREAKER_SLOW_SECONDS.items()
+}
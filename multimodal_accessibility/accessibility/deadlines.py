@@ -0,0 +1,49 @@
+import contextvars
+import time
+from contextlib import contextmanager
+
+_deadline = contextvars.ContextVar("deadline", default=None)
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a pipeline runs past its deadline."""
+
+
+@contextmanager
+def deadline(seconds: float):
+    """
+    Bounds the upstream calls made inside the block, including work handed
+    to thread pools with `submit`, to `seconds` from now. A nested deadline
+    can only shorten the enclosing one; 0 or None leaves it unchanged.
+    """
+    if not seconds:
+        yield
+        return
+    at = time.monotonic() + seconds
+    current = _deadline.get()
+    token = _deadline.set(at if current is None else min(at, current))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining():
+    """
+    Seconds left before the current deadline, or None without one.
+    Raises DeadlineExceeded once it has passed.
+    """
+    at = _deadline.get()
+    if at is None:
+        return None
+    left = at - time.monotonic()
+    if left <= 0:
+        raise DeadlineExceeded()
+    return left
+
+
+def submit(pool, fn, *args, **kwargs):
+    """
+    pool.submit() that runs `fn` under the caller's deadline.
+    """
+    return pool.submit(contextvars.copy_context().run, fn, *args, **kwargs)
@@ -0,0 +1,114 @@
+import io
+import re
+import textwrap
+
+from PIL import Image, ImageDraw
+
+from .storage import media_store
+from .text_segments import split_sentences
+
+# Local stand-ins for upstream results, served while a capability's circuit
+# breaker is open. They are never stored as conversion results.
+
+_VOWEL_GROUPS = re.compile(r"[aeiouy]+")
+_WORD = re.compile(r"[A-Za-z']+")
+_GLOSS_DROP = {"a", "an", "the", "is", "are", "am", "was", "were", "be", "to", "of"}
+
+
+def _syllables(word: str) -> int:
+    word = word.lower()
+    count = len(_VOWEL_GROUPS.findall(word))
+    if word.endswith("e") and count > 1:
+        count -= 1
+    return max(count, 1)
+
+
+def readability_grade(text: str) -> float:
+    """
+    Flesch-Kincaid grade level of `text`.
+    """
+    words = _WORD.findall(text)
+    sentences = split_sentences(text)
+    if not words or not sentences:
+        return 0.0
+    syllables = sum(_syllables(w) for w in words)
+    return round(0.39 * len(words) / len(sentences) + 11.8 * syllables / len(words) - 15.59, 1)
+
+
+def readability_review(text: str) -> dict:
+    """
+    Document result without the model: the text itself, each paragraph's
+    first sentence as bullet points and a reading-level summary.
+    """
+    paragraphs = [p for p in re.split(r"\n\s*\n", text) if p.strip()]
+    bullets = []
+    for paragraph in paragraphs:
+        sentences = split_sentences(paragraph)
+        if sentences:
+            bullets.append(sentences[0])
+    grade = readability_grade(text)
+    return {
+        "simplified_text": text,
+        "bullet_points": "\n".join(f"- {b}" for b in bullets[:8]),
+        "alt_summary": (
+            f"Document of {len(_WORD.findall(text))} words in {len(paragraphs)} paragraphs, "
+            f"reading level about grade {max(grade, 1):.0f}."
+        ),
+    }
+
+
+def sign_gloss(sentence: str) -> dict:
+    """
+    Rough word-by-word ASL gloss: capitalized content words, without
+    articles and forms of "to be".
+    """
+    words = [w for w in _WORD.findall(sentence) if w.lower() not in _GLOSS_DROP]
+    notes = "Raise eyebrows for the question." if sentence.rstrip().endswith("?") else ""
+    return {
+        "simplified_english": sentence,
+        "asl_gloss": " ".join(w.upper() for w in words),
+        "body_and_face_notes": notes,
+    }
+
+
+def visual_plan(text: str) -> dict:
+    """
+    A flowchart plan with the text's first sentences as nodes.
+    """
+    sentences = split_sentences(text)
+    nodes = [textwrap.shorten(s, 60, placeholder="...") for s in sentences[:5]]
+    title = " ".join(sentences[0].split()[:6]) if sentences else "Visual Explanation"
+    return {
+        "short_title": title,
+        "diagram_description": "Flowchart: " + " -> ".join(nodes),
+        "labels_and_nodes": "\n".join(f"- {n}" for n in nodes),
+        "simple_explanation": " ".join(sentences[:2]),
+    }
+
+
+def render_diagram(plan: dict) -> str:
+    """
+    Draws the plan's nodes as a top-to-bottom flowchart of boxes and
+    returns the PNG's media URL.
+    """
+    labels = plan.get("labels_and_nodes") or ""
+    if isinstance(labels, str):
+        labels = labels.splitlines()
+    nodes = [str(label).strip().lstrip("-* ").strip() for label in labels]
+    nodes = [n for n in nodes if n][:8] or [plan.get("short_title", "")]
+
+    width, box_height, gap = 800, 70, 40
+    image = Image.new("RGB", (width, 60 + len(nodes) * (box_height + gap)), "white")
+    draw = ImageDraw.Draw(image)
+    draw.text((40, 20), plan.get("short_title", ""), fill="black")
+    y = 60
+    for index, node in enumerate(nodes):
+        draw.rectangle((100, y, width - 100, y + box_height), outline="black", width=2)
+        draw.multiline_text((115, y + 10), textwrap.fill(node, 80), fill="black")
+        if index < len(nodes) - 1:
+            draw.line((width // 2, y + box_height, width // 2, y + box_height + gap), fill="black", width=2)
+        y += box_height + gap
+
+    buffer = io.BytesIO()
+    image.save(buffer, "PNG")
+    return media_store.url(media_store.save_bytes(buffer.getvalue(), "diagrams", ".png"))
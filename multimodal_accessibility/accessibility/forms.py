@@ -1,4 +1,11 @@
 from django import forms
+from django.conf import settings
+
+AUDIO_FORMAT_CHOICES = [
+    ("mp3", "MP3"),
+    ("opus", "Opus (smallest)"),
+    ("aac", "AAC"),
+]
 
 
 class ImageToAudioForm(forms.Form):
@@ -7,6 +14,11 @@ class ImageToAudioForm(forms.Form):
         choices=[("brief", "Brief"), ("standard", "Standard"), ("detailed", "Detailed")],
         initial="standard",
     )
+    audio_format = forms.ChoiceField(
+        choices=AUDIO_FORMAT_CHOICES,
+        initial=settings.TTS_AUDIO_FORMAT,
+        required=False,
+    )
 
 
 class ComplexTextForm(forms.Form):
@@ -33,3 +45,8 @@ class DocumentUploadForm(forms.Form):
     generate_audio = forms.BooleanField(
         label="Also generate audio summary", required=False
     )
+    audio_format = forms.ChoiceField(
+        choices=AUDIO_FORMAT_CHOICES,
+        initial=settings.TTS_AUDIO_FORMAT,
+        required=False,
+    )
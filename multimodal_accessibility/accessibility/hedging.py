@@ -0,0 +1,93 @@
+import logging
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from django.conf import settings
+
+from . import deadlines
+
+logger = logging.getLogger(__name__)
+
+
+class Hedger:
+    """
+    Hedged requests for idempotent upstream calls: when the first attempt
+    has not answered within the `percentile` latency of recent attempts to
+    the same endpoint, a second one is sent and whichever succeeds first
+    wins. Endpoints with fewer than `min_samples` observed attempts are
+    not hedged.
+    """
+
+    def __init__(self, percentile: float, min_samples: int, max_workers: int, window: int = 200):
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.window = window
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="hedge")
+        self._samples = defaultdict(lambda: deque(maxlen=self.window))
+        self._counts = defaultdict(lambda: {"calls": 0, "hedged": 0, "hedge_wins": 0})
+        self._lock = threading.Lock()
+
+    def delay(self, endpoint: str):
+        with self._lock:
+            samples = sorted(self._samples[endpoint])
+        if len(samples) < self.min_samples:
+            return None
+        return samples[min(len(samples) - 1, int(len(samples) * self.percentile / 100))]
+
+    def _attempt(self, endpoint: str, call):
+        started = time.monotonic()
+        result = call()
+        with self._lock:
+            self._samples[endpoint].append(time.monotonic() - started)
+        return result
+
+    def _count(self, endpoint: str, key: str):
+        with self._lock:
+            self._counts[endpoint][key] += 1
+
+    def run(self, endpoint: str, call):
+        """
+        Returns call()'s result, hedging it once if it is slow.
+        """
+        self._count(endpoint, "calls")
+        delay = self.delay(endpoint)
+        if delay is None:
+            return self._attempt(endpoint, call)
+
+        first = deadlines.submit(self._pool, self._attempt, endpoint, call)
+        done, _ = wait([first], timeout=delay)
+        if done:
+            return first.result()
+
+        self._count(endpoint, "hedged")
+        logger.info("Hedging %s after %.2fs", endpoint, delay)
+        second = deadlines.submit(self._pool, self._attempt, endpoint, call)
+        pending, error = {first, second}, None
+        while pending:
+            done, pending = wait(pending, timeout=deadlines.remaining(), return_when=FIRST_COMPLETED)
+            if not done:
+                raise deadlines.DeadlineExceeded()
+            for future in done:
+                if future.exception() is None:
+                    if future is second:
+                        self._count(endpoint, "hedge_wins")
+                    return future.result()
+                error = future.exception()
+        raise error
+
+    def stats(self):
+        with self._lock:
+            endpoints = set(self._counts) | set(self._samples)
+        return {
+            endpoint: {**self._counts[endpoint], "hedge_delay": self.delay(endpoint)}
+            for endpoint in sorted(endpoints)
+        }
+
+
+hedger = Hedger(
+    settings.HEDGE_PERCENTILE,
+    settings.HEDGE_MIN_SAMPLES,
+    settings.HEDGE_MAX_WORKERS,
+)
@@ -0,0 +1,130 @@
+import threading
+from collections import OrderedDict
+from typing import NamedTuple
+
+from django.conf import settings
+from PIL import Image
+
+from .models import SourceInput
+from .perceptual_hash import bit_balance, contrast, dhash, hamming
+
+
+class Fingerprint(NamedTuple):
+    value: int
+    width: int
+    height: int
+
+
+def fingerprint(image_path):
+    """
+    Returns the image's Fingerprint, or None if it has too little detail to
+    be told apart from other images by its hash (flat or smooth images,
+    large plain areas): see PHASH_MIN_CONTRAST and PHASH_MIN_BITS.
+    """
+    with Image.open(image_path) as image:
+        value = dhash(image)
+        if contrast(image) < settings.PHASH_MIN_CONTRAST or bit_balance(value) < settings.PHASH_MIN_BITS:
+            return None
+        return Fingerprint(value, *image.size)
+
+
+def _same_shape(a: Fingerprint, b: Fingerprint, tolerance: float) -> bool:
+    return abs(a.width * b.height - b.width * a.height) <= tolerance * a.width * b.height
+
+
+class PerceptualIndex:
+    """
+    Maps perceptual hashes of described images to their content hash, so a
+    resized, recompressed or re-tagged copy of an image finds the stored
+    results of the original. A lookup matches the closest known hash within
+    `max_distance` bits among images of the same aspect ratio (within
+    `aspect_tolerance`).
+
+    The hashes are persisted on SourceInput and the `max_entries` most
+    recently used are held in memory, loaded on first use.
+    """
+
+    def __init__(self, max_distance: int, max_entries: int, aspect_tolerance: float):
+        self.max_distance = max_distance
+        self.max_entries = max_entries
+        self.aspect_tolerance = aspect_tolerance
+        self._entries = None   # content hash -> Fingerprint, least recently used first
+        self._counts = {"lookups": 0, "near_hits": 0, "misses": 0}
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._entries is None:
+            rows = (
+                SourceInput.objects
+                .filter(kind="image")
+                .exclude(perceptual_hash="")
+                .exclude(image_width=0)
+                .order_by("-created_at")
+                .values_list("content_hash", "perceptual_hash", "image_width", "image_height")[:self.max_entries]
+            )
+            self._entries = OrderedDict(
+                (h, Fingerprint(int(p, 16), w, hh)) for h, p, w, hh in reversed(rows)
+            )
+        return self._entries
+
+    def find(self, value: Fingerprint):
+        """
+        Returns (content hash, distance) of the closest indexed image within
+        `max_distance`, or None.
+        """
+        if self.max_distance < 0:
+            return None
+        with self._lock:
+            entries = self._load()
+            best = min(
+                (
+                    (hamming(value.value, known.value), content_hash)
+                    for content_hash, known in entries.items()
+                    if _same_shape(value, known, self.aspect_tolerance)
+                ),
+                default=None,
+            )
+            if best is None or best[0] > self.max_distance:
+                return None
+            entries.move_to_end(best[1])
+            return best[1], best[0]
+
+    def record(self, hit: bool):
+        """
+        Counts a lookup made after an exact-hash miss, and whether a near
+        duplicate's result was served.
+        """
+        with self._lock:
+            self._counts["lookups"] += 1
+            self._counts["near_hits" if hit else "misses"] += 1
+
+    def forget(self, content_hash: str):
+        with self._lock:
+            self._load().pop(content_hash, None)
+
+    def add(self, value: Fingerprint, content_hash: str):
+        SourceInput.objects.filter(content_hash=content_hash).update(
+            perceptual_hash=f"{value.value:016x}", image_width=value.width, image_height=value.height,
+        )
+        with self._lock:
+            entries = self._load()
+            entries[content_hash] = value
+            entries.move_to_end(content_hash)
+            while len(entries) > self.max_entries:
+                entries.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            lookups = self._counts["lookups"]
+            return {
+                **self._counts,
+                "match_rate": round(self._counts["near_hits"] / lookups, 4) if lookups else None,
+                "indexed": len(self._entries) if self._entries is not None else None,
+                "max_entries": self.max_entries,
+                "max_distance": self.max_distance,
+            }
+
+
+image_index = PerceptualIndex(
+    settings.PHASH_MAX_DISTANCE, settings.PHASH_INDEX_SIZE, settings.PHASH_ASPECT_TOLERANCE
+)
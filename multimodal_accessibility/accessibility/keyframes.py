@@ -0,0 +1,50 @@
+import base64
+import io
+
+from PIL import Image, ImageSequence
+
+from .perceptual_hash import dhash, hamming
+
+
+def frame_count(image_path) -> int:
+    with Image.open(image_path) as image:
+        return getattr(image, "n_frames", 1)
+
+
+def key_frame_indices(image_path, threshold: int, max_frames: int):
+    """
+    Returns (indices of key frames, total frame count). A frame is a key
+    frame when its dHash differs from the last key frame's by more than
+    `threshold` bits, so near-identical frames are dropped. Beyond
+    `max_frames` key frames, an evenly spaced subset is kept.
+    """
+    indices, last = [], None
+    with Image.open(image_path) as image:
+        for index, frame in enumerate(ImageSequence.Iterator(image)):
+            fingerprint = dhash(frame.convert("RGB"))
+            if last is None or hamming(fingerprint, last) > threshold:
+                indices.append(index)
+                last = fingerprint
+        total = index + 1
+
+    if len(indices) > max_frames:
+        step = (len(indices) - 1) / (max_frames - 1) if max_frames > 1 else 0
+        indices = [indices[round(i * step)] for i in range(max_frames)]
+    return indices, total
+
+
+def frame_data_urls(image_path, indices, max_side: int = 1024):
+    """
+    Returns each selected frame as a PNG data URL, downscaled to at most
+    `max_side` pixels.
+    """
+    urls = []
+    with Image.open(image_path) as image:
+        for index in indices:
+            image.seek(index)
+            frame = image.convert("RGB")
+            frame.thumbnail((max_side, max_side))
+            buffer = io.BytesIO()
+            frame.save(buffer, "PNG")
+            urls.append("data:image/png;base64," + base64.b64encode(buffer.getvalue()).decode("utf-8"))
+    return urls
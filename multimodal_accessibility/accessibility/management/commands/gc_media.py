@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from accessibility.storage import media_store
+
+
+class Command(BaseCommand):
+    help = "Evict least recently used media files until usage fits in MEDIA_QUOTA_BYTES."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--quota",
+            type=int,
+            default=None,
+            help="Override the quota in bytes for this run.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report current usage.",
+        )
+
+    def handle(self, *args, **options):
+        if options["dry_run"]:
+            usage = media_store.usage()
+            self.stdout.write(f"Media usage: {usage} bytes (quota {media_store.quota_bytes})")
+            return
+
+        evicted, usage = media_store.collect_garbage(quota_bytes=options["quota"])
+        for path in evicted:
+            self.stdout.write(f"evicted {path}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Evicted {len(evicted)} files, {usage} bytes in use"
+        ))
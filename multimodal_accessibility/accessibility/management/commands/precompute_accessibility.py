@@ -0,0 +1,252 @@
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+from django.conf import settings
+from django.core.files import File
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from accessibility import pipelines, results
+from accessibility.api import PIPELINES
+from accessibility.storage import media_store
+
+IMAGE_EXTS = {".png", ".jpg", ".jpeg", ".gif", ".webp", ".tif", ".tiff"}
+DOCUMENT_EXTS = {".pdf", ".txt"}
+TEXT_PIPELINES = ("text-to-sign", "text-to-visual")
+
+
+class _RateLimiter:
+    """
+    Spaces item starts at least 1/rate seconds apart across all workers.
+    """
+
+    def __init__(self, rate: float):
+        self.interval = 1 / rate if rate > 0 else 0
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        time.sleep(start - now)
+
+
+def _is_cached(result, artifact=None, media_format=""):
+    """
+    Whether `result` exists with its `artifact`. Callers look results up
+    with touch=False, so a check counts neither as a hit nor as a use.
+    """
+    if result is None:
+        return False
+    return artifact is None or results.artifact_url(result, artifact, media_format, touch=False) is not None
+
+
+def _image_to_audio(data, cached_only):
+    audio_format = data["audio_format"] or settings.TTS_AUDIO_FORMAT
+    params = {"detail_level": data["detail_level"]}
+    result = results.lookup("image_description", results.upload_hash(data["image"]), params, touch=False)
+    if _is_cached(result, "audio", audio_format):
+        return None
+    if cached_only:
+        return False
+    img_path = media_store.save_upload(data["image"])
+    return pipelines.describe_image(img_path, data["detail_level"], audio_format, size=data["image"].size)
+
+
+def _document_accessible(data, cached_only):
+    audio_format = data["audio_format"] or settings.TTS_AUDIO_FORMAT
+    result = results.lookup("document_accessible", results.upload_hash(data["document"]), touch=False)
+    # A document without an alt summary gets no audio.
+    needs_audio = data["generate_audio"] and result is not None and result.data.get("alt_summary")
+    if _is_cached(result, "audio" if needs_audio else None, audio_format):
+        return None
+    if cached_only:
+        return False
+    return pipelines.accessible_document(data["document"], data["generate_audio"], audio_format)
+
+
+def _text_to_sign(data, cached_only):
+    if _is_cached(results.lookup("sign_language", results.content_hash(data["text"]), touch=False)):
+        return None
+    if cached_only:
+        return False
+    return pipelines.sign_language(data["text"])
+
+
+def _text_to_visual(data, cached_only):
+    artifact = "diagram" if data["generate_diagram"] else None
+    if _is_cached(results.lookup("visual_plan", results.content_hash(data["text"]), touch=False), artifact):
+        return None
+    if cached_only:
+        return False
+    return pipelines.visual_explanation(data["text"], data["generate_diagram"])
+
+
+RUNNERS = {
+    "image-to-audio": _image_to_audio,
+    "document-accessible": _document_accessible,
+    "text-to-sign": _text_to_sign,
+    "text-to-visual": _text_to_visual,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Run the conversion pipelines for every file in a directory or JSON "
+        "manifest, so later requests for them are served from the cache."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "source",
+            help=(
+                "Directory to walk, or a JSON manifest: a list of paths or of "
+                'objects like {"path": "a.png", "detail_level": "brief"} or '
+                '{"pipeline": "text-to-sign", "text": "..."}.'
+            ),
+        )
+        parser.add_argument("--workers", type=int, default=4, help="Items processed concurrently.")
+        parser.add_argument(
+            "--rate", type=float, default=0,
+            help="Maximum items started per second (0 means no limit).",
+        )
+        parser.add_argument(
+            "--detail-level", choices=["brief", "standard", "detailed"], default="standard",
+            help="Detail level for images.",
+        )
+        parser.add_argument("--audio-format", choices=["mp3", "opus", "aac"], default=settings.TTS_AUDIO_FORMAT)
+        parser.add_argument("--no-audio", action="store_true", help="Skip document audio summaries.")
+        parser.add_argument("--diagram", action="store_true", help="Also generate diagrams for text-to-visual.")
+        parser.add_argument(
+            "--text-as", choices=["document-accessible", *TEXT_PIPELINES], default="document-accessible",
+            help="Pipeline for .txt files found in a directory.",
+        )
+        parser.add_argument(
+            "--dry-run", action="store_true",
+            help="Only report which items are already cached.",
+        )
+
+    def _defaults(self, options):
+        defaults = {
+            "detail_level": options["detail_level"],
+            "audio_format": options["audio_format"],
+        }
+        if not options["no_audio"]:
+            defaults["generate_audio"] = "on"
+        if options["diagram"]:
+            defaults["generate_diagram"] = "on"
+        return defaults
+
+    def _pipeline_for(self, path: Path, text_as: str):
+        ext = path.suffix.lower()
+        if ext in IMAGE_EXTS:
+            return "image-to-audio"
+        if ext == ".txt":
+            return text_as
+        if ext in DOCUMENT_EXTS:
+            return "document-accessible"
+        return None
+
+    def _items(self, options):
+        """
+        Returns a list of (label, pipeline or None, fields, path or None).
+        """
+        source = Path(options["source"])
+        if source.is_dir():
+            return [
+                (str(path), self._pipeline_for(path, options["text_as"]), {}, path)
+                for path in sorted(source.rglob("*")) if path.is_file()
+            ]
+
+        try:
+            entries = json.loads(source.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError) as exc:
+            raise CommandError(f"Cannot read manifest {source}: {exc}")
+        if not isinstance(entries, list):
+            raise CommandError("The manifest must be a JSON list.")
+
+        items = []
+        for index, entry in enumerate(entries):
+            fields = {"path": entry} if isinstance(entry, str) else dict(entry)
+            path = fields.pop("path", None)
+            path = source.parent / path if path else None
+            pipeline = fields.pop("pipeline", None)
+            if pipeline is None and path is not None:
+                pipeline = self._pipeline_for(path, options["text_as"])
+            items.append((str(path) if path else f"item {index}", pipeline, fields, path))
+        return items
+
+    def _run(self, pipeline, defaults, fields, path, limiter, cached_only):
+        form_class, file_field, _ = PIPELINES[pipeline]
+        try:
+            data, files, handle = {**defaults, **fields}, {}, None
+            if path is not None:
+                if file_field:
+                    handle = open(path, "rb")
+                    files[file_field] = File(handle, name=path.name)
+                elif "text" not in data:
+                    data["text"] = path.read_text(encoding="utf-8")
+            form = form_class(data, files)
+            if not form.is_valid():
+                return "failed", form.errors.as_text().replace("\n", " ")
+
+            if not cached_only:
+                limiter.wait()
+            out = RUNNERS[pipeline](form.cleaned_data, cached_only)
+            if out is None:
+                return "skipped", "cached"
+            if out is False:
+                return "pending", ""
+            if out.get("degraded"):
+                return "failed", "upstream unavailable, served a degraded result"
+            return "done", ""
+        except Exception as exc:
+            return "failed", str(exc)
+        finally:
+            if handle is not None:
+                handle.close()
+            connection.close()
+
+    def handle(self, *args, **options):
+        items = self._items(options)
+        defaults = self._defaults(options)
+        limiter = _RateLimiter(options["rate"])
+        counts = {"done": 0, "skipped": 0, "failed": 0, "pending": 0}
+        failures = []
+
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=max(options["workers"], 1)) as pool:
+            futures = {}
+            for label, pipeline, fields, path in items:
+                if pipeline not in RUNNERS:
+                    counts["skipped"] += 1
+                    self.stdout.write(f"skipped  {label} (unsupported)")
+                    continue
+                future = pool.submit(self._run, pipeline, defaults, fields, path, limiter, options["dry_run"])
+                futures[future] = label
+
+            for future in as_completed(futures):
+                label = futures[future]
+                status, detail = future.result()
+                counts[status] += 1
+                if status == "failed":
+                    failures.append((label, detail))
+                self.stdout.write(f"{status:<8} {label}" + (f" ({detail})" if detail else ""))
+
+        elapsed = time.monotonic() - started
+        summary = (
+            f"{counts['done']} computed, {counts['skipped']} skipped, {counts['failed']} failed "
+            f"in {elapsed:.1f}s ({counts['done'] / elapsed if elapsed else 0:.2f} items/s)"
+        )
+        if options["dry_run"]:
+            summary = f"{counts['pending']} to compute, {counts['skipped']} skipped, {counts['failed']} failed"
+        for label, detail in failures:
+            self.stderr.write(f"FAILED {label}: {detail}")
+        self.stdout.write(self.style.SUCCESS(summary) if not failures else self.style.WARNING(summary))
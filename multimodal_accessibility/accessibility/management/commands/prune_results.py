@@ -0,0 +1,26 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from accessibility import results
+
+
+class Command(BaseCommand):
+    help = "Delete stored conversion results past the retention window or row cap."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=settings.RESULT_RETENTION_DAYS,
+            help="Delete results not accessed within this many days.",
+        )
+        parser.add_argument(
+            "--max-rows",
+            type=int,
+            default=settings.RESULT_MAX_ROWS,
+            help="Keep at most this many results.",
+        )
+
+    def handle(self, *args, **options):
+        deleted = results.prune(options["days"], options["max_rows"])
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} results"))
@@ -0,0 +1,81 @@
+import time
+
+from django.http import HttpResponse, JsonResponse
+
+from .admission import gate_for
+from .deadlines import DeadlineExceeded
+
+
+class DeadlineMiddleware:
+    """
+    Answers 504 Gateway Timeout when a pipeline runs past its deadline,
+    instead of a 500 error page.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_exception(self, request, exception):
+        if not isinstance(exception, DeadlineExceeded):
+            return None
+        message = "The conversion took too long. Please try again."
+        if request.path.startswith("/api/"):
+            return JsonResponse({"error": message}, status=504)
+        return HttpResponse(message, status=504, content_type="text/plain")
+
+
+class AdmissionMiddleware:
+    """
+    Admission control for the conversion endpoints (see admission.py).
+    Form submissions and API calls to a gated endpoint take a slot before
+    the view runs; shed requests get 503 Service Unavailable with a
+    Retry-After header. Pages, the index and status endpoints are not gated.
+    A streamed response keeps its slot until the stream is finished.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        gate = getattr(request, "admission_gate", None)
+        if gate is None:
+            return response
+        started = request.admission_started
+        if response.streaming:
+            response.streaming_content = self._release_after(response.streaming_content, gate, started)
+        else:
+            gate.release(time.monotonic() - started)
+        return response
+
+    @staticmethod
+    def _release_after(content, gate, started):
+        try:
+            yield from content
+        finally:
+            gate.release(time.monotonic() - started)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if request.method in ("GET", "HEAD", "OPTIONS"):
+            return None
+        gate = gate_for(request.resolver_match.url_name)
+        if gate is None:
+            return None
+        if not gate.acquire():
+            return self._shed(request, gate)
+        request.admission_gate = gate
+        request.admission_started = time.monotonic()
+        return None
+
+    @staticmethod
+    def _shed(request, gate):
+        message = "The service is busy. Please try again shortly."
+        if request.path.startswith("/api/"):
+            response = JsonResponse({"error": message}, status=503)
+        else:
+            response = HttpResponse(message, status=503, content_type="text/plain")
+        response["Retry-After"] = str(gate.retry_after())
+        return response
@@ -0,0 +1,66 @@
+# Generated by Django 4.2.26 on 2026-10-19 01:15
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SourceInput',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content_hash', models.CharField(max_length=64, unique=True)),
+                ('kind', models.CharField(choices=[('image', 'Image'), ('text', 'Text'), ('document', 'Document')], max_length=16)),
+                ('size', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ConversionResult',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('pipeline', models.CharField(choices=[('image_description', 'Image -> Description'), ('visual_plan', 'Text -> Visual Plan'), ('sign_language', 'Text -> Sign Language'), ('document_accessible', 'Document -> Accessible')], max_length=32)),
+                ('params_hash', models.CharField(max_length=64)),
+                ('params', models.JSONField(default=dict)),
+                ('prompt_version', models.CharField(max_length=16)),
+                ('data', models.JSONField(default=dict)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('last_accessed_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+                ('hit_count', models.PositiveIntegerField(default=0)),
+                ('source', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='results', to='accessibility.sourceinput')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Artifact',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('audio', 'Audio'), ('diagram', 'Diagram')], max_length=16)),
+                ('url', models.CharField(max_length=255)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('result', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='artifacts', to='accessibility.conversionresult')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='conversionresult',
+            index=models.Index(fields=['pipeline', '-created_at'], name='result_pipeline_recent_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='conversionresult',
+            constraint=models.UniqueConstraint(fields=('source', 'pipeline', 'params_hash', 'prompt_version'), name='unique_conversion_result'),
+        ),
+        migrations.AddConstraint(
+            model_name='artifact',
+            constraint=models.UniqueConstraint(fields=('result', 'kind'), name='unique_result_artifact'),
+        ),
+    ]
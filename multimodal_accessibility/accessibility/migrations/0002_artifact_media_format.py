@@ -0,0 +1,26 @@
+# Generated by Django 4.2.26 on 2026-10-19 01:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accessibility', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='artifact',
+            name='unique_result_artifact',
+        ),
+        migrations.AddField(
+            model_name='artifact',
+            name='media_format',
+            field=models.CharField(blank=True, max_length=8),
+        ),
+        migrations.AddConstraint(
+            model_name='artifact',
+            constraint=models.UniqueConstraint(fields=('result', 'kind', 'media_format'), name='unique_result_artifact_format'),
+        ),
+    ]
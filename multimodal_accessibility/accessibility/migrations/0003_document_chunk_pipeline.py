@@ -0,0 +1,18 @@
+# Generated by Django 4.2.26 on 2026-10-19 01:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accessibility', '0002_artifact_media_format'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='conversionresult',
+            name='pipeline',
+            field=models.CharField(choices=[('image_description', 'Image -> Description'), ('visual_plan', 'Text -> Visual Plan'), ('sign_language', 'Text -> Sign Language'), ('document_accessible', 'Document -> Accessible'), ('document_chunk', 'Document chunk -> Accessible')], max_length=32),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.26 on 2026-10-19 01:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accessibility', '0003_document_chunk_pipeline'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='conversionresult',
+            name='pipeline',
+            field=models.CharField(choices=[('image_description', 'Image -> Description'), ('visual_plan', 'Text -> Visual Plan'), ('sign_language', 'Text -> Sign Language'), ('document_accessible', 'Document -> Accessible'), ('document_chunk', 'Document chunk -> Accessible'), ('sign_phrase', 'Phrase -> Sign Language')], max_length=32),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.26 on 2026-10-19 01:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accessibility', '0004_sign_phrase_pipeline'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sourceinput',
+            name='perceptual_hash',
+            field=models.CharField(blank=True, db_index=True, max_length=16),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.26 on 2026-10-19 01:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accessibility', '0005_source_perceptual_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sourceinput',
+            name='normalized_hash',
+            field=models.CharField(blank=True, db_index=True, max_length=64),
+        ),
+    ]
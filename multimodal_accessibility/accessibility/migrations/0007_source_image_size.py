@@ -0,0 +1,23 @@
+# Generated by Django 4.2.26 on 2026-10-19 01:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accessibility', '0006_source_normalized_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sourceinput',
+            name='image_height',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='sourceinput',
+            name='image_width',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
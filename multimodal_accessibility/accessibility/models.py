@@ -1,3 +1,98 @@
 from django.db import models
+from django.utils import timezone
 
-# Create your models here.
+
+class SourceInput(models.Model):
+    """
+    An input submitted to one of the pipelines, identified by the SHA-256
+    of its content (image bytes, raw document bytes or UTF-8 text).
+    """
+
+    KIND_CHOICES = [
+        ("image", "Image"),
+        ("text", "Text"),
+        ("document", "Document"),
+    ]
+
+    content_hash = models.CharField(max_length=64, unique=True)
+    kind = models.CharField(max_length=16, choices=KIND_CHOICES)
+    size = models.PositiveIntegerField(default=0)
+    # 64-bit difference hash (hex) of images, used to find near duplicates.
+    perceptual_hash = models.CharField(max_length=16, blank=True, db_index=True)
+    # Pixel size of images with a perceptual hash; near duplicates must match in shape.
+    image_width = models.PositiveIntegerField(default=0)
+    image_height = models.PositiveIntegerField(default=0)
+    # SHA-256 of texts after text_index.normalize_text, used to find near duplicates.
+    normalized_hash = models.CharField(max_length=64, blank=True, db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.kind}:{self.content_hash[:12]}"
+
+
+class ConversionResult(models.Model):
+    """
+    The output of one pipeline for one input, parameter set and prompt version.
+    """
+
+    PIPELINE_CHOICES = [
+        ("image_description", "Image -> Description"),
+        ("visual_plan", "Text -> Visual Plan"),
+        ("sign_language", "Text -> Sign Language"),
+        ("document_accessible", "Document -> Accessible"),
+        ("document_chunk", "Document chunk -> Accessible"),
+        ("sign_phrase", "Phrase -> Sign Language"),
+    ]
+
+    source = models.ForeignKey(SourceInput, on_delete=models.CASCADE, related_name="results")
+    pipeline = models.CharField(max_length=32, choices=PIPELINE_CHOICES)
+    params_hash = models.CharField(max_length=64)
+    params = models.JSONField(default=dict)
+    prompt_version = models.CharField(max_length=16)
+    data = models.JSONField(default=dict)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_accessed_at = models.DateTimeField(default=timezone.now, db_index=True)
+    hit_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ["-created_at"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["source", "pipeline", "params_hash", "prompt_version"],
+                name="unique_conversion_result",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["pipeline", "-created_at"], name="result_pipeline_recent_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.pipeline} for {self.source}"
+
+
+class Artifact(models.Model):
+    """
+    A media file produced for a result (audio or diagram), stored in MEDIA_ROOT.
+    """
+
+    KIND_CHOICES = [
+        ("audio", "Audio"),
+        ("diagram", "Diagram"),
+    ]
+
+    result = models.ForeignKey(ConversionResult, on_delete=models.CASCADE, related_name="artifacts")
+    kind = models.CharField(max_length=16, choices=KIND_CHOICES)
+    media_format = models.CharField(max_length=8, blank=True)
+    url = models.CharField(max_length=255)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["result", "kind", "media_format"],
+                name="unique_result_artifact_format",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.kind}: {self.url}"
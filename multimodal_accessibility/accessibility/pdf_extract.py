@@ -0,0 +1,137 @@
+import hashlib
+import io
+import multiprocessing
+import signal
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from PIL import Image
+from PyPDF2 import PdfReader
+
+# Image formats the vision model accepts as is; others are sent as PNG.
+_VISION_FORMATS = {"PNG", "JPEG", "GIF", "WEBP"}
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+class _PageTimeout(Exception):
+    pass
+
+
+def _on_alarm(signum, frame):
+    raise _PageTimeout()
+
+
+def _page_figures(page, index: int, min_side: int):
+    """
+    Returns (page index, SHA-256, image bytes, mime type) for the page's
+    embedded images at least `min_side` pixels on each side; smaller ones
+    are taken to be decorative (bullets, rules, icons).
+    """
+    figures = []
+    for embedded in page.images:
+        try:
+            image = Image.open(io.BytesIO(embedded.data))
+            if min(image.size) < min_side:
+                continue
+            data, fmt = embedded.data, image.format
+            if fmt not in _VISION_FORMATS:
+                buffer = io.BytesIO()
+                image.convert("RGB").save(buffer, "PNG")
+                data, fmt = buffer.getvalue(), "PNG"
+        except Exception:
+            continue
+        figures.append((index, hashlib.sha256(embedded.data).hexdigest(), data, f"image/{fmt.lower()}"))
+    return figures
+
+
+def _extract_range(
+    pdf_path: str, start: int, stop: int, page_timeout: float, figure_min_side: int = 0, text_stop: int = None,
+):
+    """
+    Runs in a worker process: extracts pages [start, stop) of the PDF.
+    A page taking longer than `page_timeout` seconds is returned empty.
+    With `figure_min_side`, also returns the pages' embedded images (see
+    _page_figures) as (texts, figures); pages from `text_stop` on only have
+    their images extracted.
+    """
+    reader = PdfReader(pdf_path)
+    previous = signal.signal(signal.SIGALRM, _on_alarm)
+    texts, figures = [], []
+    try:
+        for index in range(start, stop):
+            wants_text = text_stop is None or index < text_stop
+            text = ""
+            try:
+                signal.setitimer(signal.ITIMER_REAL, page_timeout)
+                if wants_text:
+                    text = reader.pages[index].extract_text() or ""
+                if figure_min_side:
+                    figures.extend(_page_figures(reader.pages[index], index, figure_min_side))
+            except _PageTimeout:
+                pass
+            finally:
+                signal.setitimer(signal.ITIMER_REAL, 0)
+            if wants_text:
+                texts.append(text)
+    finally:
+        signal.signal(signal.SIGALRM, previous)
+    if figure_min_side:
+        return texts, figures
+    return texts
+
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn, not fork: the web worker is multi-threaded.
+            _pool = ProcessPoolExecutor(
+                max_workers=settings.PDF_EXTRACT_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def iter_pdf_pages(pdf_path, max_pages: int = None, on_figures=None):
+    """
+    Yields the text of each page in order. Page ranges are extracted in
+    parallel in a process pool; each page is yielded as soon as it and all
+    earlier pages are done, so callers can start on the first pages while
+    later ones are still being extracted.
+
+    With `on_figures`, the workers also extract embedded images, and the
+    callback gets each range's list of figures (see _page_figures) before
+    its pages are yielded. `max_pages` only limits the text: images are
+    extracted from every page.
+    """
+    if max_pages is None:
+        max_pages = settings.DOCUMENT_MAX_PAGES
+    total_pages = len(PdfReader(str(pdf_path)).pages)
+    text_pages = min(total_pages, max_pages) if max_pages else total_pages
+    page_count = total_pages if on_figures is not None else text_pages
+
+    per_task = settings.PDF_PAGES_PER_TASK
+    page_timeout = settings.PDF_PAGE_TIMEOUT
+    pool = _get_pool()
+    figure_min_side = settings.PDF_FIGURE_MIN_SIDE if on_figures is not None else 0
+    futures = [
+        pool.submit(
+            _extract_range, str(pdf_path), start, min(start + per_task, page_count), page_timeout,
+            figure_min_side, text_pages,
+        )
+        for start in range(0, page_count, per_task)
+    ]
+    try:
+        for future in futures:
+            if on_figures is None:
+                yield from future.result()
+                continue
+            texts, figures = future.result()
+            on_figures(figures)
+            yield from texts
+    finally:
+        for future in futures:
+            future.cancel()
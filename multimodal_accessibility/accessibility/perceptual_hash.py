@@ -0,0 +1,39 @@
+from PIL import Image, ImageStat
+
+
+def dhash(image: Image.Image, hash_size: int = 8) -> int:
+    """
+    Difference hash: a `hash_size`² bit fingerprint recording whether each
+    pixel of a small grayscale thumbnail is brighter than its right-hand
+    neighbour. Resizing, recompression and metadata barely change it.
+    """
+    gray = image.convert("L").resize((hash_size + 1, hash_size), Image.LANCZOS)
+    pixels = list(gray.getdata())
+    bits = 0
+    for row in range(hash_size):
+        for col in range(hash_size):
+            left = pixels[row * (hash_size + 1) + col]
+            bits = (bits << 1) | (left > pixels[row * (hash_size + 1) + col + 1])
+    return bits
+
+
+def contrast(image: Image.Image, hash_size: int = 8) -> float:
+    """
+    Standard deviation of the grey levels of the thumbnail dhash looks at.
+    Flat images (solid colours, blank slides) score near 0.
+    """
+    gray = image.convert("L").resize((hash_size + 1, hash_size), Image.LANCZOS)
+    return ImageStat.Stat(gray).stddev[0]
+
+
+def bit_balance(bits: int, hash_size: int = 8) -> int:
+    """
+    The smaller of the number of set and unset bits. Hashes of flat or
+    smooth images are (nearly) all zeros or all ones and score near 0.
+    """
+    ones = bin(bits).count("1")
+    return min(ones, hash_size * hash_size - ones)
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
@@ -0,0 +1,541 @@
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+
+from django.conf import settings
+from django.db import connection
+
+from . import deadlines, fallbacks, results
+from . import utils_openai as uai
+from .breaker import CircuitOpen
+from .image_index import fingerprint, image_index
+from .keyframes import frame_count
+from .storage import media_store
+from .text_index import normalized_hash, text_indexes
+from .text_segments import iter_chunks, normalize_phrase, split_sentences
+
+DETAIL_LEVELS = ("brief", "standard", "detailed")
+
+_background = ThreadPoolExecutor(max_workers=2, thread_name_prefix="prefetch")
+
+
+def _ensure_audio(result, text: str, audio_format: str):
+    """
+    Returns the result's audio URL, synthesizing it if needed, or None
+    while speech is unavailable.
+    """
+    audio_url = results.artifact_url(result, "audio", audio_format)
+    if audio_url is None:
+        try:
+            audio_url = uai.text_to_speech(text, audio_format)
+        except CircuitOpen:
+            return None
+        results.add_artifact(result, "audio", audio_url, audio_format)
+    return audio_url
+
+
+def _prefetch_audio(level_results, audio_format: str):
+    try:
+        for result in level_results:
+            _ensure_audio(result, result.data["description"], audio_format)
+    finally:
+        connection.close()
+
+
+def _near_duplicate(value, detail_level: str):
+    """
+    Returns the stored description of a visually identical image (see
+    image_index), or None.
+    """
+    match = image_index.find(value)
+    result = None
+    if match is not None:
+        result = results.lookup("image_description", match[0], {"detail_level": detail_level})
+        if result is None and _any_level(match[0]) is None:
+            # The matched image's results were pruned.
+            image_index.forget(match[0])
+    image_index.record(result is not None)
+    return result
+
+
+def _stored_description(img_path, source_hash: str, detail_level: str):
+    """
+    Returns (stored description result or None, fingerprint to index a new
+    result under). A still image not seen before byte for byte is looked up
+    by perceptual hash, so a resized or recompressed copy reuses the
+    original's result (and its audio). Multi-frame images and images with
+    too little detail to fingerprint reliably are not indexed and get no
+    fingerprint.
+    """
+    result = results.lookup("image_description", source_hash, {"detail_level": detail_level})
+    if result is not None or frame_count(img_path) > 1:
+        return result, None
+    value = fingerprint(img_path)
+    if value is None:
+        return None, None
+    return _near_duplicate(value, detail_level), value
+
+
+def _save_description(source_hash: str, description: str, detail_level: str, size: int, value):
+    result = results.save(
+        "image_description", source_hash, "image",
+        {"description": description}, {"detail_level": detail_level}, size=size,
+    )
+    if value is not None:
+        image_index.add(value, source_hash)
+    return result
+
+
+def _describe(img_path, source_hash: str, detail_level: str, size: int):
+    """
+    Returns the stored description result for one detail level (see
+    _stored_description). In all-levels mode a miss fetches every level in
+    one vision call and stores each, so switching level later is served
+    from the database. Multi-frame images are narrated at the requested
+    level only.
+    """
+    result, value = _stored_description(img_path, source_hash, detail_level)
+    if result is not None:
+        return result, []
+
+    if not settings.IMAGE_DESCRIPTION_ALL_LEVELS or frame_count(img_path) > 1:
+        description = uai.generate_image_description(img_path, detail_level)
+        return _save_description(source_hash, description, detail_level, size, value), []
+
+    levels = uai.generate_image_descriptions(img_path)
+    level_results = {
+        level: results.save(
+            "image_description", source_hash, "image",
+            {"description": levels[level]}, {"detail_level": level}, size=size,
+        )
+        for level in DETAIL_LEVELS
+    }
+    if value is not None:
+        image_index.add(value, source_hash)
+    others = [r for level, r in level_results.items() if level != detail_level]
+    return level_results[detail_level], others
+
+
+def _any_level(source_hash: str):
+    for level in DETAIL_LEVELS:
+        result = results.lookup("image_description", source_hash, {"detail_level": level})
+        if result is not None:
+            return result
+    return None
+
+
+def describe_image(img_path, detail_level: str, audio_format: str, size: int = 0):
+    """
+    While vision is unavailable, a stored description of the same image at
+    another detail level is served instead (or none); while speech is
+    unavailable, the description comes without audio. Both set `degraded`.
+    """
+    source_hash = results.file_hash(img_path)
+    degraded = False
+    with deadlines.deadline(settings.PIPELINE_DEADLINES["image_description"]):
+        try:
+            result, other_levels = _describe(img_path, source_hash, detail_level, size)
+        except CircuitOpen:
+            result, other_levels, degraded = _any_level(source_hash), [], True
+        description = result.data["description"] if result is not None else ""
+        audio_url = _ensure_audio(result, description, audio_format) if result is not None else None
+
+    if other_levels and settings.IMAGE_PREFETCH_LEVEL_AUDIO:
+        _background.submit(_prefetch_audio, other_levels, audio_format)
+
+    return {
+        "description": description,
+        "audio_url": audio_url,
+        "audio_type": uai.audio_mime_type(audio_format),
+        "degraded": degraded or audio_url is None,
+    }
+
+
+def _near_text(pipeline: str, text: str):
+    """
+    Returns (stored result of an earlier input equal to `text` once
+    normalized, or None; the text's normalized hash, to index once its own
+    result is stored, or None if the pipeline is not in
+    TEXT_NORMALIZED_PIPELINES).
+    """
+    index = text_indexes.get(pipeline)
+    if index is None:
+        return None, None
+    key = normalized_hash(text)
+    match = index.find(key)
+    result = results.lookup(pipeline, match) if match is not None else None
+    index.record(result is not None)
+    return result, key
+
+
+def _save_text(pipeline: str, source_hash: str, text: str, data: dict, key):
+    result = results.save(pipeline, source_hash, "text", data, size=len(text))
+    if key is not None:
+        text_indexes[pipeline].add(source_hash, key)
+    return result
+
+
+def iter_describe_image(img_path, detail_level: str, audio_format: str, size: int = 0, segment_urls: bool = False):
+    """
+    Pipelined describe_image: on a miss the description is streamed and
+    each sentence is synthesized as soon as it is complete, while the rest
+    is still being generated; the segments are joined in order into the
+    stored audio. Only the requested detail level is generated.
+
+    With `segment_urls`, yields {"index", "sentence", "audio_url"} for each
+    segment as it becomes playable. Finally yields describe_image's result
+    with "done": True.
+    """
+    source_hash = results.file_hash(img_path)
+    audio_type = uai.audio_mime_type(audio_format)
+    with deadlines.deadline(settings.PIPELINE_DEADLINES["image_description"]):
+        result, value = _stored_description(img_path, source_hash, detail_level)
+        if result is None:
+            ext = uai.AUDIO_FORMATS[audio_format][0]
+            received, parts = [], []
+
+            def pieces():
+                # The raw deltas, stored as-is so the cached description
+                # keeps the model's line and paragraph breaks.
+                for piece in uai.stream_image_description(img_path, detail_level):
+                    received.append(piece)
+                    yield piece
+
+            try:
+                for index, (sentence, audio) in enumerate(uai.iter_speech_as_generated(pieces(), audio_format)):
+                    parts.append(audio)
+                    if segment_urls:
+                        url = media_store.url(media_store.save_bytes(audio, "audio", ext)) if audio else None
+                        yield {"index": index, "sentence": sentence, "audio_url": url}
+            except CircuitOpen:
+                # Vision is unavailable; fall back like describe_image.
+                yield {"done": True, **describe_image(img_path, detail_level, audio_format, size)}
+                return
+
+            result = _save_description(source_hash, "".join(received), detail_level, size, value)
+            if parts and None not in parts:
+                url = media_store.url(media_store.save_bytes(b"".join(parts), "audio", ext))
+                results.add_artifact(result, "audio", url, audio_format)
+
+        description = result.data["description"]
+        audio_url = _ensure_audio(result, description, audio_format)
+
+    yield {
+        "done": True,
+        "description": description,
+        "audio_url": audio_url,
+        "audio_type": audio_type,
+        "degraded": audio_url is None,
+    }
+
+
+def describe_image_pipelined(img_path, detail_level: str, audio_format: str, size: int = 0):
+    for out in iter_describe_image(img_path, detail_level, audio_format, size):
+        pass
+    return out
+
+
+def visual_explanation(text: str, generate_diagram: bool):
+    """
+    While text or image generation is unavailable, the plan is built from
+    the text's sentences and the diagram drawn locally; neither is stored.
+    """
+    source_hash = results.content_hash(text)
+    degraded = False
+    with deadlines.deadline(settings.PIPELINE_DEADLINES["visual_plan"]):
+        result = results.lookup("visual_plan", source_hash)
+        if result is None:
+            result, text_key = _near_text("visual_plan", text)
+        if result is None:
+            try:
+                result = _save_text("visual_plan", source_hash, text, uai.generate_visual_plan(text), text_key)
+            except CircuitOpen:
+                degraded = True
+        plan = result.data if result is not None else fallbacks.visual_plan(text)
+
+        diagram_url = None
+        if generate_diagram:
+            if result is not None:
+                diagram_url = results.artifact_url(result, "diagram")
+            if diagram_url is None and not degraded:
+                try:
+                    diagram_url = uai.generate_diagram_image(plan["diagram_description"])
+                    results.add_artifact(result, "diagram", diagram_url)
+                except CircuitOpen:
+                    degraded = True
+            if diagram_url is None:
+                diagram_url = fallbacks.render_diagram(plan)
+
+    return {"plan": plan, "diagram_url": diagram_url, "degraded": degraded}
+
+
+def iter_sign_segments(text: str):
+    """
+    Translates text sentence by sentence. Each sentence is looked up in the
+    phrase memo by its normalized form; only misses are translated,
+    concurrently. Yields (index, total, result, cached) as each sentence's
+    result becomes available, which is not necessarily in order.
+    While text generation is unavailable, misses get a rough local gloss
+    marked `degraded`, which is not memoized.
+    """
+    sentences = split_sentences(text) or [text]
+    total = len(sentences)
+    futures = {}
+    with ThreadPoolExecutor(max_workers=settings.SIGN_MAX_CONCURRENCY) as pool:
+        submitted = {}
+        for index, sentence in enumerate(sentences):
+            key = results.content_hash(normalize_phrase(sentence))
+            if key in submitted:
+                futures[submitted[key]][1].append(index)
+                continue
+            cached = results.lookup("sign_phrase", key)
+            if cached is not None:
+                yield index, total, cached.data, True
+                continue
+            future = deadlines.submit(pool, uai.generate_sign_language_description, sentence)
+            submitted[key] = future
+            futures[future] = (key, [index], sentence)
+
+        for future in as_completed(futures):
+            key, indices, sentence = futures[future]
+            try:
+                data = future.result()
+                results.save("sign_phrase", key, "text", data, size=len(sentence))
+            except CircuitOpen:
+                data = {**fallbacks.sign_gloss(sentence), "degraded": True}
+            for index in indices:
+                yield index, total, data, False
+
+
+def _merge_sign(parts):
+    merged = {
+        key: " ".join(p.get(key, "") for p in parts if p.get(key))
+        for key in ("simplified_english", "asl_gloss", "body_and_face_notes")
+    }
+    if any(p.get("degraded") for p in parts):
+        merged["degraded"] = True
+    return merged
+
+
+def stream_sign_language(text: str):
+    """
+    Yields per-sentence results as they complete, then stores the
+    reassembled result for the whole text unless it is degraded.
+    """
+    source_hash = results.content_hash(text)
+    result = results.lookup("sign_language", source_hash)
+    if result is None:
+        result, text_key = _near_text("sign_language", text)
+    if result is not None:
+        yield {"index": 0, "total": 1, "cached": True, **result.data}
+        return
+
+    parts = {}
+    with deadlines.deadline(settings.PIPELINE_DEADLINES["sign_language"]):
+        for index, total, data, cached in iter_sign_segments(text):
+            parts[index] = data
+            yield {"index": index, "total": total, "cached": cached, **data}
+
+    merged = _merge_sign([parts[i] for i in sorted(parts)])
+    if not merged.get("degraded"):
+        _save_text("sign_language", source_hash, text, merged, text_key)
+
+
+def sign_language(text: str):
+    """
+    Near-duplicates of a stored input (differing only in spacing,
+    punctuation, casing or a signature) get its stored result.
+    """
+    source_hash = results.content_hash(text)
+    result = results.lookup("sign_language", source_hash)
+    if result is None:
+        result, text_key = _near_text("sign_language", text)
+    if result is not None:
+        return result.data
+
+    with deadlines.deadline(settings.PIPELINE_DEADLINES["sign_language"]):
+        if settings.SIGN_SEGMENTED:
+            parts = {index: data for index, _, data, _ in iter_sign_segments(text)}
+            data = _merge_sign([parts[i] for i in sorted(parts)])
+        else:
+            try:
+                data = uai.generate_sign_language_description(text)
+            except CircuitOpen:
+                data = {**fallbacks.sign_gloss(text), "degraded": True}
+    if data.get("degraded"):
+        return data
+    return _save_text("sign_language", source_hash, text, data, text_key).data
+
+
+def _merge_accessible(parts):
+    if len(parts) == 1:
+        return parts[0]
+
+    bullets = [p.get("bullet_points", "") for p in parts]
+    if any(isinstance(b, list) for b in bullets):
+        merged_bullets = [item for b in bullets for item in (b if isinstance(b, list) else [b]) if item]
+    else:
+        merged_bullets = "\n".join(b for b in bullets if b)
+
+    return {
+        "simplified_text": "\n\n".join(p.get("simplified_text", "") for p in parts),
+        "bullet_points": merged_bullets,
+        "alt_summary": " ".join(p.get("alt_summary", "") for p in parts),
+    }
+
+
+class _FigureDescriber:
+    """
+    Receives a PDF's embedded images as page ranges are extracted (the
+    `on_figures` callback of iter_document_pages) and describes them in
+    `pool` while the text is processed. Repeats of an image already seen
+    are skipped, as is everything past DOCUMENT_MAX_FIGURES; descriptions
+    are stored by image hash, so a figure is only described once.
+    """
+
+    def __init__(self, pool):
+        self.pool = pool
+        self.by_page = {}   # page index -> [(image hash, size, description or Future)]
+        self._seen = set()
+
+    def __call__(self, figures):
+        for page, digest, data, mime in figures:
+            if digest in self._seen or len(self._seen) >= settings.DOCUMENT_MAX_FIGURES:
+                continue
+            self._seen.add(digest)
+            cached = results.lookup("image_description", digest, {"detail_level": "brief"})
+            if cached is not None:
+                described = cached.data["description"]
+            else:
+                described = deadlines.submit(self.pool, uai.describe_image_bytes, data, mime)
+            self.by_page.setdefault(page, []).append((digest, len(data), described))
+
+    def resolve(self):
+        """
+        Returns ({page index: [description]}, degraded): while vision is
+        unavailable, figures not described before are left out.
+        """
+        described_pages, degraded = {}, False
+        for page, figures in sorted(self.by_page.items()):
+            for digest, size, described in figures:
+                if isinstance(described, Future):
+                    try:
+                        described = described.result()
+                    except CircuitOpen:
+                        degraded = True
+                        continue
+                    results.save(
+                        "image_description", digest, "image",
+                        {"description": described}, {"detail_level": "brief"}, size=size,
+                    )
+                described_pages.setdefault(page, []).append(described)
+        return described_pages, degraded
+
+
+def _interleave_figures(parts, last_pages, described_pages):
+    """
+    Appends each figure's alt text to the simplified text of the first chunk
+    reaching its page; figures on later pages go to the last chunk.
+    """
+    interleaved, previous = [], -1
+    for index, part in enumerate(parts):
+        last = last_pages[index] if index < len(parts) - 1 else float("inf")
+        lines = [
+            f"[Figure, page {page + 1}: {description}]"
+            for page in sorted(described_pages) if previous < page <= last
+            for description in described_pages[page]
+        ]
+        if lines:
+            part = {**part, "simplified_text": "\n\n".join([part.get("simplified_text", ""), *lines]).strip()}
+        interleaved.append(part)
+        previous = last
+    return interleaved
+
+
+def _accessible_text(pages, figures: _FigureDescriber = None):
+    """
+    Makes a document accessible chunk by chunk. Chunks are content-defined,
+    so a revised document shares most chunk hashes with the previous version
+    and only changed chunks are sent upstream (concurrently); the rest come
+    from the stored per-chunk results, as do chunks that are near-duplicates
+    of a stored chunk. With `figures`, the descriptions of the document's
+    images are interleaved as alt text near their pages.
+
+    Returns (result, degraded): while text generation is unavailable,
+    missing chunks get a local readability review instead.
+    """
+    position = [0]
+
+    def counted(pages):
+        for position[0], page in enumerate(pages):
+            yield page
+
+    entries = []
+    with ThreadPoolExecutor(max_workers=settings.DOCUMENT_MAX_CONCURRENCY) as pool:
+        for chunk in iter_chunks(counted(pages), settings.DOCUMENT_CHUNK_CHARS):
+            chunk_hash = results.content_hash(chunk)
+            cached, text_key = results.lookup("document_chunk", chunk_hash), None
+            if cached is None:
+                cached, text_key = _near_text("document_chunk", chunk)
+            if cached is not None:
+                entries.append((chunk_hash, chunk, cached.data, None, position[0]))
+            else:
+                future = deadlines.submit(pool, uai.make_document_accessible, chunk)
+                entries.append((chunk_hash, chunk, future, text_key, position[0]))
+
+        parts, last_pages, degraded = [], [], False
+        for chunk_hash, chunk, data, text_key, last_page in entries:
+            if isinstance(data, Future):
+                try:
+                    data = data.result()
+                    _save_text("document_chunk", chunk_hash, chunk, data, text_key)
+                except CircuitOpen:
+                    data, degraded = fallbacks.readability_review(chunk), True
+            parts.append(data)
+            last_pages.append(last_page)
+
+    if not parts:
+        try:
+            parts = [uai.make_document_accessible("")]
+        except CircuitOpen:
+            parts, degraded = [fallbacks.readability_review("")], True
+        last_pages = [0]
+    if figures is not None:
+        described_pages, figures_degraded = figures.resolve()
+        parts = _interleave_figures(parts, last_pages, described_pages)
+        degraded = degraded or figures_degraded
+    return _merge_accessible(parts), degraded
+
+
+def accessible_document(uploaded_doc, generate_audio: bool, audio_format: str):
+    """
+    Figures embedded in PDFs are described DOCUMENT_FIGURE_CONCURRENCY at a
+    time while the text is processed (with DOCUMENT_DESCRIBE_FIGURES).
+    A degraded result (see _accessible_text) is not stored and comes
+    without audio, as does any result while speech is unavailable.
+    """
+    source_hash = results.upload_hash(uploaded_doc)
+    degraded = False
+    with deadlines.deadline(settings.PIPELINE_DEADLINES["document_accessible"]):
+        result = results.lookup("document_accessible", source_hash)
+        if result is None:
+            with ThreadPoolExecutor(max_workers=settings.DOCUMENT_FIGURE_CONCURRENCY) as figure_pool:
+                figures = _FigureDescriber(figure_pool) if settings.DOCUMENT_DESCRIBE_FIGURES else None
+                pages = uai.iter_document_pages(uploaded_doc, on_figures=figures)
+                acc, degraded = _accessible_text(pages, figures)
+            if not degraded:
+                result = results.save(
+                    "document_accessible", source_hash, "document", acc, size=uploaded_doc.size,
+                )
+        acc = result.data if result is not None else acc
+
+        audio_url = None
+        if generate_audio and acc.get("alt_summary"):
+            if result is not None:
+                audio_url = _ensure_audio(result, acc["alt_summary"], audio_format)
+            degraded = degraded or audio_url is None
+
+    return {
+        "accessible": acc,
+        "audio_url": audio_url,
+        "audio_type": uai.audio_mime_type(audio_format),
+        "degraded": degraded,
+    }
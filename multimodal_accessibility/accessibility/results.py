@@ -0,0 +1,148 @@
+import hashlib
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Artifact, ConversionResult, SourceInput
+from .storage import media_store
+from .utils_openai import PROMPT_VERSIONS
+
+
+def content_hash(data) -> str:
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    return hashlib.sha256(data).hexdigest()
+
+
+def file_hash(path) -> str:
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+def upload_hash(uploaded_file) -> str:
+    """
+    Hashes a Django UploadedFile and rewinds it for later reads.
+    """
+    sha = hashlib.sha256()
+    for chunk in uploaded_file.chunks():
+        sha.update(chunk)
+    uploaded_file.seek(0)
+    return sha.hexdigest()
+
+
+def params_hash(params: dict) -> str:
+    return content_hash(json.dumps(params, sort_keys=True))
+
+
+def lookup(pipeline: str, source_hash: str, params: dict = None, touch: bool = True):
+    """
+    Returns the stored ConversionResult for this input, or None.
+    A hit bumps the access time used by retention pruning and the hit
+    count, unless `touch` is False.
+    """
+    result = (
+        ConversionResult.objects
+        .filter(
+            source__content_hash=source_hash,
+            pipeline=pipeline,
+            params_hash=params_hash(params or {}),
+            prompt_version=PROMPT_VERSIONS[pipeline],
+        )
+        .first()
+    )
+    if result is not None and touch:
+        ConversionResult.objects.filter(pk=result.pk).update(
+            last_accessed_at=timezone.now(),
+            hit_count=F("hit_count") + 1,
+        )
+    return result
+
+
+def save(pipeline: str, source_hash: str, kind: str, data: dict, params: dict = None, size: int = 0):
+    """
+    Stores a freshly computed result and returns it.
+    """
+    params = params or {}
+    source, _ = SourceInput.objects.get_or_create(
+        content_hash=source_hash, defaults={"kind": kind, "size": size}
+    )
+    try:
+        with transaction.atomic():
+            return ConversionResult.objects.create(
+                source=source,
+                pipeline=pipeline,
+                params_hash=params_hash(params),
+                params=params,
+                prompt_version=PROMPT_VERSIONS[pipeline],
+                data=data,
+            )
+    except IntegrityError:
+        # A concurrent request stored the same conversion first.
+        return lookup(pipeline, source_hash, params)
+
+
+def artifact_url(result, kind: str, media_format: str = "", touch: bool = True):
+    """
+    Returns the media URL of a result's artifact if the file still exists.
+    Artifacts evicted by media garbage collection count as missing. Unless
+    `touch` is False, the file counts as recently used.
+    """
+    artifact = result.artifacts.filter(kind=kind, media_format=media_format).first()
+    if artifact is None:
+        return None
+    path = media_store.path_for_url(artifact.url)
+    if not path.exists():
+        artifact.delete()
+        return None
+    if touch:
+        media_store.touch(path)
+    return artifact.url
+
+
+def add_artifact(result, kind: str, url: str, media_format: str = ""):
+    Artifact.objects.update_or_create(
+        result=result, kind=kind, media_format=media_format, defaults={"url": url}
+    )
+
+
+def recent(pipeline: str = None, limit: int = 50):
+    qs = ConversionResult.objects.select_related("source")
+    if pipeline:
+        qs = qs.filter(pipeline=pipeline)
+    return qs.order_by("-created_at")[:limit]
+
+
+def prune(max_age_days: int = None, max_rows: int = None):
+    """
+    Deletes results not accessed within `max_age_days`, then the least
+    recently accessed ones beyond `max_rows`, then orphaned inputs.
+    Returns the number of deleted results.
+    """
+    if max_age_days is None:
+        max_age_days = settings.RESULT_RETENTION_DAYS
+    if max_rows is None:
+        max_rows = settings.RESULT_MAX_ROWS
+
+    cutoff = timezone.now() - timedelta(days=max_age_days)
+    _, per_model = ConversionResult.objects.filter(last_accessed_at__lt=cutoff).delete()
+    deleted = per_model.get(ConversionResult._meta.label, 0)
+
+    overflow = ConversionResult.objects.count() - max_rows
+    if overflow > 0:
+        stale_ids = list(
+            ConversionResult.objects
+            .order_by("last_accessed_at")
+            .values_list("pk", flat=True)[:overflow]
+        )
+        ConversionResult.objects.filter(pk__in=stale_ids).delete()
+        deleted += len(stale_ids)
+
+    SourceInput.objects.filter(results__isnull=True).delete()
+    return deleted
@@ -0,0 +1,106 @@
+import logging
+import math
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+DETAIL_TIER_SHIFT = {"brief": -1, "standard": 0, "detailed": 1}
+
+
+def _size_bucket(input_size: int) -> int:
+    # Power-of-two buckets of input characters: latency grows with input size.
+    return int(math.log2(max(input_size, 1024) // 1024 + 1))
+
+
+class ModelRouter:
+    """
+    Picks a model per call from a capability's tiers (fastest first).
+
+    The starting tier is the capability's preferred tier, shifted by the
+    requested detail level. The router keeps an exponentially weighted
+    moving average of observed latency per (model, input size bucket) and
+    steps down to faster tiers while the expected latency exceeds the
+    endpoint's latency target. Estimates older than `stale_after` seconds
+    are ignored, so a model skipped for being slow is tried again later.
+    Recent decisions are kept for inspection.
+    """
+
+    def __init__(self, tiers: dict, preferred: dict, targets: dict, alpha: float = 0.2,
+                 stale_after: float = 300, history: int = 200):
+        self.tiers = tiers
+        self.preferred = preferred
+        self.targets = targets
+        self.alpha = alpha
+        self.stale_after = stale_after
+        self._latency = {}
+        self._lock = threading.Lock()
+        self.decisions = deque(maxlen=history)
+
+    def expected_latency(self, model: str, input_size: int):
+        value, observed_at = self._latency.get((model, _size_bucket(input_size)), (None, 0))
+        if time.monotonic() - observed_at > self.stale_after:
+            return None
+        return value
+
+    def choose(self, endpoint: str, capability: str, input_size: int = 0, detail_level: str = None) -> str:
+        tiers = self.tiers[capability]
+        start = tiers.index(self.preferred[capability]) + DETAIL_TIER_SHIFT.get(detail_level, 0)
+        start = min(max(start, 0), len(tiers) - 1)
+        target = self.targets.get(endpoint)
+
+        index, reason = start, "preferred"
+        with self._lock:
+            while target is not None and index > 0:
+                expected = self.expected_latency(tiers[index], input_size)
+                if expected is None or expected <= target:
+                    break
+                index -= 1
+                reason = f"{tiers[index + 1]} expected {expected:.1f}s > target {target:.1f}s"
+            expected = self.expected_latency(tiers[index], input_size)
+
+            decision = {
+                "time": time.time(),
+                "endpoint": endpoint,
+                "capability": capability,
+                "input_size": input_size,
+                "detail_level": detail_level,
+                "model": tiers[index],
+                "preferred": tiers[start],
+                "expected_latency": expected,
+                "target": target,
+                "reason": reason,
+            }
+            self.decisions.append(decision)
+
+        if index != start:
+            logger.info("Routed %s to %s: %s", endpoint, tiers[index], reason)
+        return tiers[index]
+
+    def observe(self, model: str, input_size: int, seconds: float):
+        key = (model, _size_bucket(input_size))
+        with self._lock:
+            previous = self.expected_latency(model, input_size)
+            value = seconds if previous is None else self.alpha * seconds + (1 - self.alpha) * previous
+            self._latency[key] = (value, time.monotonic())
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "latency": [
+                    {"model": model, "size_bucket": bucket, "ewma_seconds": round(value, 3)}
+                    for (model, bucket), (value, _) in sorted(self._latency.items())
+                ],
+                "decisions": list(self.decisions),
+            }
+
+
+router = ModelRouter(
+    settings.MODEL_TIERS,
+    settings.MODEL_PREFERRED,
+    settings.LATENCY_TARGETS,
+    stale_after=settings.ROUTING_STALE_SECONDS,
+)
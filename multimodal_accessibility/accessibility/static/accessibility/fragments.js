@@ -0,0 +1,45 @@
+// Submits the conversion forms in the background and swaps only the
+// returned result fragment into the page. Without JavaScript the forms
+// still post normally and the server renders the full page.
+document.querySelectorAll("form[data-fragment-target]").forEach(function (form) {
+  form.addEventListener("submit", function (event) {
+    event.preventDefault();
+
+    var target = document.querySelector(form.dataset.fragmentTarget);
+    var button = form.querySelector("button[type=submit]");
+    button.disabled = true;
+    target.setAttribute("aria-busy", "true");
+
+    fetch(form.action, {
+      method: "POST",
+      body: new FormData(form),
+      headers: { "X-Fragment": "1" },
+      credentials: "same-origin",
+    })
+      .then(function (response) {
+        // Invalid forms come back as a 400 fragment with the errors; any
+        // other failure (503 when busy, 504, 500) is an error page, not a
+        // fragment, and must not replace the form area.
+        if (!response.ok && response.status !== 400) {
+          var retry = response.headers.get("Retry-After");
+          var failure = new Error("HTTP " + response.status);
+          if (response.status === 503 && retry) {
+            failure.userMessage = "The service is busy. Please try again in " + retry + " seconds.";
+          }
+          throw failure;
+        }
+        return response.text();
+      })
+      .then(function (html) { target.innerHTML = html; })
+      .catch(function (error) {
+        var alert = document.createElement("div");
+        alert.className = "alert alert-danger mt-3";
+        alert.textContent = error.userMessage || "Request failed. Please try again.";
+        target.replaceChildren(alert);
+      })
+      .finally(function () {
+        button.disabled = false;
+        target.removeAttribute("aria-busy");
+      });
+  });
+});
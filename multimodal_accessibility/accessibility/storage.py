@@ -0,0 +1,162 @@
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+MANAGED_DIRS = ("uploads", "audio", "diagrams")
+ALLOWED_UPLOAD_EXTS = {".png", ".jpg", ".jpeg", ".gif", ".webp", ".bmp", ".tif", ".tiff", ".txt", ".pdf"}
+
+
+class MediaStore:
+    """
+    Content-addressed storage for uploads and generated artifacts.
+
+    Files are named after the SHA-256 of their content, so identical
+    artifacts are stored once. Files are immutable once written, which lets
+    the modification time double as the last-access time: every hit
+    re-touches the file and garbage collection evicts the least recently
+    used files until the managed directories fit in the quota.
+    """
+
+    def __init__(self, root, quota_bytes: int):
+        self.root = Path(root)
+        self.quota_bytes = quota_bytes
+        self._lock = threading.Lock()
+
+    def _target(self, subdir: str, digest: str, ext: str) -> Path:
+        return self.root / subdir / f"{digest[:32]}{ext.lower()}"
+
+    def touch(self, path: Path):
+        """
+        Marks a stored file as recently used.
+        """
+        try:
+            os.utime(path, None)
+        except FileNotFoundError:
+            pass
+
+    def save_bytes(self, data: bytes, subdir: str, ext: str) -> Path:
+        """
+        Stores `data` under its content hash and returns the path.
+        """
+        path = self._target(subdir, hashlib.sha256(data).hexdigest(), ext)
+        if path.exists():
+            self.touch(path)
+            return path
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+        return path
+
+    def save_upload(self, uploaded_file, subdir: str = "uploads") -> Path:
+        """
+        Streams a Django UploadedFile to disk, hashing as it goes, and stores
+        it under its content hash instead of the client-supplied name.
+        """
+        ext = Path(uploaded_file.name).suffix.lower()
+        if ext not in ALLOWED_UPLOAD_EXTS:
+            ext = ".bin"
+
+        target_dir = self.root / subdir
+        target_dir.mkdir(parents=True, exist_ok=True)
+        sha = hashlib.sha256()
+        fd, tmp = tempfile.mkstemp(dir=target_dir, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            for chunk in uploaded_file.chunks():
+                sha.update(chunk)
+                f.write(chunk)
+
+        path = self._target(subdir, sha.hexdigest(), ext)
+        if path.exists():
+            os.unlink(tmp)
+            self.touch(path)
+        else:
+            os.replace(tmp, path)
+        return path
+
+    def url(self, path: Path) -> str:
+        rel = Path(path).resolve().relative_to(self.root.resolve())
+        return f"{settings.MEDIA_URL}{rel.as_posix()}"
+
+    def path_for_url(self, url: str) -> Path:
+        rel = url[len(settings.MEDIA_URL):] if url.startswith(settings.MEDIA_URL) else url
+        return self.root / rel
+
+    def _managed_files(self):
+        for subdir in MANAGED_DIRS:
+            directory = self.root / subdir
+            if not directory.is_dir():
+                continue
+            for path in directory.iterdir():
+                if path.is_file():
+                    yield path
+
+    def usage(self) -> int:
+        return sum(p.stat().st_size for p in self._managed_files())
+
+    def collect_garbage(self, quota_bytes: int = None, tmp_max_age: float = 3600):
+        """
+        Evicts least recently used files until usage fits in the quota.
+        Leftover temp files from interrupted writes are removed as well.
+
+        Returns a tuple (evicted_paths, bytes_in_use_after).
+        """
+        quota = self.quota_bytes if quota_bytes is None else quota_bytes
+        evicted = []
+
+        with self._lock:
+            entries = []
+            now = time.time()
+            for path in self._managed_files():
+                try:
+                    st = path.stat()
+                except FileNotFoundError:
+                    continue
+                if path.suffix == ".tmp":
+                    if now - st.st_mtime > tmp_max_age:
+                        path.unlink(missing_ok=True)
+                        evicted.append(path)
+                    continue
+                entries.append((st.st_mtime, st.st_size, path))
+
+            total = sum(size for _, size, _ in entries)
+            entries.sort()
+            for _, size, path in entries:
+                if total <= quota:
+                    break
+                path.unlink(missing_ok=True)
+                evicted.append(path)
+                total -= size
+
+        if evicted:
+            logger.info("Media GC evicted %d files, %d bytes in use", len(evicted), total)
+        return evicted, total
+
+    def start_gc_thread(self, interval: float):
+        """
+        Runs garbage collection every `interval` seconds in a daemon thread.
+        """
+        def _loop():
+            while not stop.wait(interval):
+                try:
+                    self.collect_garbage()
+                except Exception:
+                    logger.exception("Media garbage collection failed")
+
+        stop = threading.Event()
+        thread = threading.Thread(target=_loop, name="media-gc", daemon=True)
+        thread.start()
+        return stop
+
+
+media_store = MediaStore(settings.MEDIA_ROOT, settings.MEDIA_QUOTA_BYTES)
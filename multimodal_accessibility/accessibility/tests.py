@@ -1,3 +1,606 @@
-from django.test import TestCase
+import io
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+import httpx
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.signals import request_started
+from django.test import Client, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from openai import APIConnectionError
+from PIL import Image, ImageDraw
+
+from . import deadlines, pipelines, results, views
+from . import utils_openai as uai
+from .admission import AdmissionGate, gate_for, gates
+from .apps import _start_media_gc
+from .breaker import CircuitBreaker, CircuitOpen, breakers
+from .hedging import Hedger
+from .image_index import PerceptualIndex, fingerprint
+from .keyframes import key_frame_indices
+from .models import ConversionResult
+from .pdf_extract import iter_pdf_pages
+from .storage import MediaStore
+
+
+class MediaStoreTests(TestCase):
+    def setUp(self):
+        self.store = MediaStore(tempfile.mkdtemp(), quota_bytes=0)
+
+    def test_identical_content_is_stored_once(self):
+        first = self.store.save_bytes(b"audio", "audio", ".mp3")
+        second = self.store.save_bytes(b"audio", "audio", ".mp3")
+        self.assertEqual(first, second)
+        self.assertEqual(len(list((self.store.root / "audio").iterdir())), 1)
+
+    def test_gc_evicts_least_recently_used_until_within_quota(self):
+        old = self.store.save_bytes(b"a" * 100, "audio", ".mp3")
+        used = self.store.save_bytes(b"b" * 100, "audio", ".mp3")
+        new = self.store.save_bytes(b"c" * 100, "audio", ".mp3")
+        now = time.time()
+        os.utime(old, (now - 300, now - 300))
+        os.utime(used, (now - 200, now - 200))
+        os.utime(new, (now - 100, now - 100))
+        self.store.touch(used)
+
+        evicted, usage = self.store.collect_garbage(quota_bytes=200)
+
+        self.assertEqual(evicted, [old])
+        self.assertEqual(usage, 200)
+        self.assertTrue(used.exists() and new.exists())
+
+    @override_settings(MEDIA_GC_INTERVAL=60)
+    def test_gc_thread_starts_once_with_the_first_request(self):
+        request_started.connect(_start_media_gc, dispatch_uid="accessibility.media_gc")
+        with mock.patch("accessibility.storage.media_store.start_gc_thread") as start:
+            self.client.get("/")
+            self.client.get("/")
+        start.assert_called_once_with(60)
+
+
+class StoredResultTests(TestCase):
+    def test_lookup_counts_hits(self):
+        results.save("sign_language", "hash", "text", {"gloss": "HELLO"})
+        self.assertEqual(results.lookup("sign_language", "hash").data, {"gloss": "HELLO"})
+        self.assertEqual(ConversionResult.objects.get().hit_count, 1)
+        self.assertIsNone(results.lookup("sign_language", "other"))
+
+    def test_lookup_without_touch_leaves_the_row_alone(self):
+        saved = results.save("sign_language", "hash", "text", {"gloss": "HELLO"})
+        self.assertEqual(results.lookup("sign_language", "hash", touch=False).pk, saved.pk)
+        row = ConversionResult.objects.get()
+        self.assertEqual((row.hit_count, row.last_accessed_at), (0, saved.last_accessed_at))
+
+    @override_settings(SIGN_SEGMENTED=False)
+    def test_repeat_submission_is_served_from_the_store(self):
+        gloss = {"simplified_english": "Hello.", "asl_gloss": "HELLO", "body_and_face_notes": ""}
+        with mock.patch.object(pipelines.uai, "generate_sign_language_description", return_value=gloss) as upstream:
+            first = pipelines.sign_language("Hello.")
+            second = pipelines.sign_language("Hello.")
+        self.assertEqual(upstream.call_count, 1)
+        self.assertEqual(first, second)
+
+    def test_prune_keeps_most_recently_accessed_rows(self):
+        for name in ("old", "recent", "expired"):
+            results.save("sign_language", name, "text", {"gloss": name})
+        now = timezone.now()
+        ConversionResult.objects.filter(source__content_hash="old").update(last_accessed_at=now - timedelta(days=2))
+        ConversionResult.objects.filter(source__content_hash="expired").update(last_accessed_at=now - timedelta(days=60))
+
+        self.assertEqual(results.prune(max_age_days=30, max_rows=1), 2)
+        self.assertEqual(
+            list(ConversionResult.objects.values_list("source__content_hash", flat=True)), ["recent"]
+        )
+
+
+class ServeMediaTests(TestCase):
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp())
+        (self.root / "audio").mkdir()
+        self.name = "0123456789abcdef0123456789abcdef.mp3"
+        (self.root / "audio" / self.name).write_bytes(b"0123456789")
+        self.url = f"/media/audio/{self.name}"
+
+    def get(self, **headers):
+        with override_settings(MEDIA_ROOT=self.root):
+            return self.client.get(self.url, **headers)
+
+    def test_content_addressed_file_has_strong_etag_and_immutable_caching(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["ETag"], '"0123456789abcdef0123456789abcdef"')
+        self.assertIn("immutable", response["Cache-Control"])
+        self.assertEqual(self.get(HTTP_IF_NONE_MATCH=response["ETag"]).status_code, 304)
+
+    def test_if_none_match_compares_whole_etags(self):
+        etag = '"0123456789abcdef0123456789abcdef"'
+        self.assertEqual(self.get(HTTP_IF_NONE_MATCH=f'"other", W/{etag}').status_code, 304)
+        self.assertEqual(self.get(HTTP_IF_NONE_MATCH="*").status_code, 304)
+        self.assertEqual(self.get(HTTP_IF_NONE_MATCH=f'{etag[:-1]}-gzip"').status_code, 200)
+        self.assertEqual(self.get(HTTP_IF_NONE_MATCH='"0123456789abcdef"').status_code, 200)
+
+    def test_range_requests(self):
+        response = self.get(HTTP_RANGE="bytes=2-5")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response["Content-Range"], "bytes 2-5/10")
+        self.assertEqual(b"".join(response.streaming_content), b"2345")
+
+        self.assertEqual(b"".join(self.get(HTTP_RANGE="bytes=-3").streaming_content), b"789")
+        self.assertEqual(self.get(HTTP_RANGE="bytes=20-").status_code, 416)
+
+    def test_stale_if_range_serves_whole_file(self):
+        response = self.get(HTTP_RANGE="bytes=2-5", HTTP_IF_RANGE='"other"')
+        self.assertEqual(response.status_code, 200)
+
+
+def _save_pdf(pages):
+    """
+    Writes a PDF with one page per image; PIL embeds each image as is.
+    """
+    path = Path(tempfile.mkdtemp()) / "document.pdf"
+    pages[0].save(path, save_all=True, append_images=pages[1:])
+    return path
+
+
+class PdfExtractTests(TestCase):
+    def test_text_stops_at_max_pages(self):
+        pdf = _save_pdf([Image.new("RGB", (10, 10), "white") for _ in range(8)])
+        self.assertEqual(len(list(iter_pdf_pages(pdf, max_pages=3))), 3)
+        self.assertEqual(len(list(iter_pdf_pages(pdf, max_pages=0))), 8)
+
+
+def _accessible(text):
+    return {"simplified_text": text.upper(), "bullet_points": [], "alt_summary": ""}
+
+
+class DocumentChunkCacheTests(TestCase):
+    def convert(self, text):
+        with mock.patch.object(pipelines.uai, "make_document_accessible", side_effect=_accessible) as upstream:
+            result, degraded = pipelines._accessible_text([text])
+        self.assertFalse(degraded)
+        return result, upstream.call_count
+
+    def test_repeated_chunk_is_served_from_the_store(self):
+        text = "Take 5 mg twice a day.\nStore below 25 degrees."
+        self.assertEqual(self.convert(text)[1], 1)
+        self.assertEqual(self.convert(text), (_accessible(text), 0))
+
+    @override_settings(DOCUMENT_CHUNK_CHARS=200)
+    def test_edited_document_only_converts_changed_chunks(self):
+        paragraphs = [f"Section {i}. " + "This paragraph explains a step of the procedure. " * 3 for i in range(12)]
+        _, first_calls = self.convert("\n\n".join(paragraphs))
+        paragraphs[-1] = "Section 11. The last step was rewritten."
+        _, calls = self.convert("\n\n".join(paragraphs))
+        self.assertGreater(first_calls, 2)
+        self.assertLess(calls, first_calls / 2)
+
+
+def _gloss(text):
+    if text == "boom":
+        raise RuntimeError("upstream failed")
+    return {"asl_gloss": text.upper()}
+
+
+@mock.patch.object(pipelines, "sign_language", side_effect=_gloss)
+class ApiTests(TestCase):
+    def post_json(self, url, body):
+        return self.client.post(url, body, content_type="application/json")
+
+    def test_convert_accepts_json_and_form_posts(self, _):
+        response = self.post_json("/api/v1/text-to-sign/", {"text": "Hello."})
+        self.assertEqual(response.json(), {"pipeline": "text-to-sign", "result": {"asl_gloss": "HELLO."}})
+        response = self.client.post("/api/v1/text-to-sign/", {"text": "Hi."})
+        self.assertEqual(response.json()["result"], {"asl_gloss": "HI."})
+
+    def test_convert_rejects_invalid_input(self, _):
+        response = self.client.post("/api/v1/text-to-sign/", "{", content_type="application/json")
+        self.assertEqual(response.status_code, 400)
+        response = self.post_json("/api/v1/text-to-sign/", {})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("text", response.json()["errors"])
+
+    def test_batch_returns_one_result_per_item_in_order(self, _):
+        with self.assertLogs("accessibility.api", "ERROR"):
+            response = self.post_json("/api/v1/batch/text-to-sign/", {"items": ["One.", "boom", {"text": ""}, "Two."]})
+        items = response.json()["results"]
+        self.assertEqual([item["index"] for item in items], [0, 1, 2, 3])
+        self.assertEqual(items[0]["result"], {"asl_gloss": "ONE."})
+        self.assertEqual(items[1], {"index": 1, "ok": False, "error": "upstream failed"})
+        self.assertIn("text", items[2]["errors"])
+        self.assertEqual(items[3]["result"], {"asl_gloss": "TWO."})
+
+        response = self.client.post("/api/v1/batch/text-to-sign/", {"text": ["A.", "B."]})
+        self.assertEqual([item["result"]["asl_gloss"] for item in response.json()["results"]], ["A.", "B."])
+
+    @override_settings(API_BATCH_MAX_ITEMS=2)
+    def test_batch_rejects_bad_or_oversized_bodies(self, _):
+        self.assertEqual(self.post_json("/api/v1/batch/text-to-sign/", {"items": []}).status_code, 400)
+        self.assertEqual(self.post_json("/api/v1/batch/text-to-sign/", ["A."]).status_code, 400)
+        response = self.post_json("/api/v1/batch/text-to-sign/", {"items": ["A.", "B.", "C."]})
+        self.assertEqual(response.status_code, 400)
+
+
+class DeadlineTests(TestCase):
+    def test_nested_deadline_only_shortens(self):
+        self.assertIsNone(deadlines.remaining())
+        with deadlines.deadline(10):
+            with deadlines.deadline(60):
+                self.assertLessEqual(deadlines.remaining(), 10)
+            with deadlines.deadline(1):
+                self.assertLessEqual(deadlines.remaining(), 1)
+        self.assertIsNone(deadlines.remaining())
+
+    def test_deadline_propagates_to_pool_threads(self):
+        with ThreadPoolExecutor(max_workers=1) as pool, deadlines.deadline(5):
+            remaining = deadlines.submit(pool, deadlines.remaining).result()
+            unbounded = pool.submit(deadlines.remaining).result()
+        self.assertTrue(0 < remaining <= 5)
+        self.assertIsNone(unbounded)
+
+    def test_expired_deadline_stops_before_calling_upstream(self):
+        upstream = mock.Mock()
+        with deadlines.deadline(0.01):
+            time.sleep(0.02)
+            with self.assertRaises(deadlines.DeadlineExceeded):
+                uai._upstream(upstream)
+        upstream.assert_not_called()
+
+    def test_deadline_exceeded_answers_504(self):
+        with mock.patch.object(pipelines, "sign_language", side_effect=deadlines.DeadlineExceeded()):
+            response = self.client.post("/text-to-sign/", {"text": "Hello."})
+        self.assertEqual(response.status_code, 504)
+
+
+class HedgingTests(TestCase):
+    def setUp(self):
+        self.hedger = Hedger(percentile=50, min_samples=3, max_workers=2)
+
+    def test_no_hedging_until_enough_samples(self):
+        for _ in range(2):
+            self.assertEqual(self.hedger.run("gloss", lambda: "ok"), "ok")
+        self.assertIsNone(self.hedger.delay("gloss"))
+        self.assertEqual(self.hedger.stats()["gloss"]["hedged"], 0)
+
+    def test_slow_attempt_is_hedged_and_the_faster_answer_wins(self):
+        for _ in range(3):
+            self.hedger.run("gloss", lambda: "ok")
+        release = threading.Event()
+        attempts = []
+
+        def call():
+            attempts.append(None)
+            if len(attempts) == 1:
+                release.wait(5)
+                return "slow"
+            return "fast"
+
+        try:
+            self.assertEqual(self.hedger.run("gloss", call), "fast")
+        finally:
+            release.set()
+        stats = self.hedger.stats()["gloss"]
+        self.assertEqual((stats["calls"], stats["hedged"], stats["hedge_wins"]), (4, 1, 1))
+
+    def test_hedged_call_respects_the_deadline(self):
+        for _ in range(3):
+            self.hedger.run("gloss", lambda: "ok")
+        release = threading.Event()
+        try:
+            with deadlines.deadline(0.05), self.assertRaises(deadlines.DeadlineExceeded):
+                self.hedger.run("gloss", lambda: release.wait(5))
+        finally:
+            release.set()
+
+
+def _upstream_error():
+    raise APIConnectionError(request=httpx.Request("POST", "https://api.openai.com/v1/responses"))
+
+
+class CircuitBreakerTests(TestCase):
+    def fail(self, breaker, times):
+        for _ in range(times):
+            with self.assertRaises(APIConnectionError):
+                breaker.call(_upstream_error)
+
+    def test_opens_after_failures_and_fails_fast(self):
+        breaker = CircuitBreaker("text", slow_seconds=10, min_calls=3, failure_rate=0.5, cooldown=60)
+        self.fail(breaker, 3)
+        self.assertEqual(breaker.state, "open")
+        upstream = mock.Mock()
+        with self.assertRaises(CircuitOpen):
+            breaker.call(upstream)
+        upstream.assert_not_called()
+
+    def test_half_open_probe_closes_on_success_and_reopens_on_failure(self):
+        breaker = CircuitBreaker("text", slow_seconds=10, min_calls=2, failure_rate=0.5, cooldown=0.05)
+        self.fail(breaker, 2)
+        time.sleep(0.06)
+        self.assertEqual(breaker.state, "half-open")
+        self.fail(breaker, 1)
+        self.assertEqual(breaker.state, "open")
+
+        time.sleep(0.06)
+        self.assertEqual(breaker.call(lambda: "ok"), "ok")
+        self.assertEqual(breaker.state, "closed")
+
+    def test_deadline_errors_are_not_counted(self):
+        breaker = CircuitBreaker("text", slow_seconds=10, min_calls=2, failure_rate=0.5, cooldown=60)
+        for _ in range(5):
+            with self.assertRaises(deadlines.DeadlineExceeded):
+                breaker.call(mock.Mock(side_effect=deadlines.DeadlineExceeded()))
+        self.assertEqual(breaker.state, "closed")
+        self.assertEqual(breaker.snapshot()["recent_calls"], 0)
+
+        upstream = mock.Mock()
+        with deadlines.deadline(0.01):
+            time.sleep(0.02)
+            with self.assertRaises(deadlines.DeadlineExceeded):
+                uai._upstream(upstream)
+        self.assertEqual(breakers["text"].state, "closed")
+
+    @override_settings(SIGN_SEGMENTED=False)
+    def test_open_breaker_serves_a_degraded_gloss_that_is_not_stored(self):
+        with mock.patch.object(pipelines.uai, "generate_sign_language_description", side_effect=CircuitOpen("text")):
+            data = pipelines.sign_language("The cat is hungry.")
+        self.assertTrue(data["degraded"])
+        self.assertEqual(data["asl_gloss"], "CAT HUNGRY")
+        self.assertFalse(ConversionResult.objects.exists())
+
+
+@override_settings(SIGN_SEGMENTED=False)
+class PrecomputeTests(TransactionTestCase):
+    # The command's worker threads use their own database connections.
+
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp())
+
+    def precompute(self, *args):
+        out = io.StringIO()
+        call_command("precompute_accessibility", *args, stdout=out, stderr=io.StringIO())
+        return out.getvalue()
+
+    def test_cached_items_are_skipped_without_counting_hits(self):
+        (self.root / "a.txt").write_text("Hello there.")
+        (self.root / "notes.md").write_text("Not supported.")
+        gloss = {"simplified_english": "Hello there.", "asl_gloss": "HELLO THERE", "body_and_face_notes": ""}
+        with mock.patch.object(pipelines.uai, "generate_sign_language_description", return_value=gloss) as upstream:
+            self.assertIn("1 to compute", self.precompute(str(self.root), "--text-as", "text-to-sign", "--dry-run"))
+            self.assertIn("1 computed", self.precompute(str(self.root), "--text-as", "text-to-sign"))
+            output = self.precompute(str(self.root), "--text-as", "text-to-sign")
+        self.assertEqual(upstream.call_count, 1)
+        self.assertIn("a.txt (cached)", output)
+        self.assertIn("notes.md (unsupported)", output)
+        self.assertEqual(ConversionResult.objects.get().hit_count, 0)
+
+    def test_document_without_alt_summary_needs_no_audio(self):
+        (self.root / "doc.txt").write_text("Short document.")
+        manifest = self.root / "manifest.json"
+        manifest.write_text('[{"path": "doc.txt", "generate_audio": "on"}]')
+        with mock.patch.object(pipelines.uai, "make_document_accessible", side_effect=_accessible) as upstream:
+            self.precompute(str(manifest))
+            output = self.precompute(str(manifest))
+        self.assertEqual(upstream.call_count, 1)
+        self.assertIn("doc.txt (cached)", output)
+
+
+def _save_animation(scenes, repeat=3):
+    """
+    Writes a GIF showing `scenes` (colours) in turn, each for `repeat`
+    frames that differ from each other by a single pixel.
+    """
+    frames = []
+    for scene, colour in enumerate(scenes):
+        base = Image.new("RGB", (64, 64), colour)
+        for x in range(0, 64, 8):
+            base.paste("white" if (x // 8 + scene) % 2 else "black", (x, 0, x + 4 + scene, 64))
+        for i in range(repeat):
+            frame = base.copy()
+            frame.putpixel((i, i), (i * 40, 0, 0))
+            frames.append(frame)
+    path = Path(tempfile.mkdtemp()) / "animation.gif"
+    frames[0].save(path, save_all=True, append_images=frames[1:], duration=100)
+    return path
+
+
+def _scene_descriptions(data_urls, first, total, detail_level):
+    return [f"scene {first + i}" for i in range(len(data_urls))]
+
+
+class KeyFrameTests(TestCase):
+    def test_near_identical_frames_are_skipped(self):
+        path = _save_animation(["red", "blue", "green"])
+        self.assertEqual(key_frame_indices(path, threshold=10, max_frames=12), ([0, 3, 6], 9))
+
+    def test_key_frames_beyond_the_maximum_are_evenly_spaced(self):
+        path = _save_animation(["red", "blue", "green", "yellow", "purple"], repeat=1)
+        self.assertEqual(key_frame_indices(path, threshold=10, max_frames=3)[0], [0, 2, 4])
+
+    @override_settings(KEYFRAME_BATCH=2)
+    def test_descriptions_are_labelled_with_their_frame_numbers(self):
+        path = _save_animation(["red", "blue", "green"])
+        with mock.patch.object(uai, "_describe_frames", side_effect=_scene_descriptions) as batches:
+            text = uai.generate_sequence_description(path)
+        self.assertEqual(batches.call_count, 2)
+        self.assertEqual(text, "Frame 1 of 9: scene 1\nFrame 4 of 9: scene 2\nFrame 7 of 9: scene 3")
+
+    def test_single_key_frame_is_described_as_a_still_image(self):
+        path = _save_animation(["red"])
+        with mock.patch.object(uai, "_describe_frames") as batches:
+            with mock.patch.object(uai, "_describe_data_url", return_value="A striped square.") as still:
+                self.assertEqual(uai.generate_sequence_description(path), "A striped square.")
+        still.assert_called_once()
+        batches.assert_not_called()
+
+    def test_batch_with_missing_descriptions_is_described_frame_by_frame(self):
+        path = _save_animation(["red", "blue", "green"])
+        with mock.patch.object(uai, "_describe_frames", return_value=["only one"]):
+            with mock.patch.object(uai, "_describe_data_url", side_effect=["first", "second", "third"]):
+                text = uai.generate_sequence_description(path)
+        self.assertEqual(text, "Frame 1 of 9: first\nFrame 4 of 9: second\nFrame 7 of 9: third")
+
+
+def _save_image(image, name):
+    path = Path(tempfile.mkdtemp()) / name
+    image.save(path)
+    return path
+
+
+def _detailed_image(width=320, height=240):
+    image = Image.new("RGB", (width, height), "white")
+    draw = ImageDraw.Draw(image)
+    for i in range(0, width, 40):
+        draw.rectangle([i, (i * 7) % height, i + 20, height], fill=(i % 255, 60, 200 - i % 200))
+    draw.ellipse([width // 4, height // 4, width // 2, height // 2], fill="black")
+    return image
+
+
+class PerceptualIndexTests(TestCase):
+    def test_flat_images_are_not_fingerprinted(self):
+        red = _save_image(Image.new("RGB", (64, 64), "red"), "red.png")
+        blue = _save_image(Image.new("RGB", (64, 64), "blue"), "blue.png")
+        self.assertIsNone(fingerprint(red))
+        self.assertIsNone(fingerprint(blue))
+
+    @override_settings(IMAGE_DESCRIPTION_ALL_LEVELS=False)
+    def test_flat_image_does_not_reuse_another_flat_images_description(self):
+        red = _save_image(Image.new("RGB", (64, 64), "red"), "red.png")
+        blue = _save_image(Image.new("RGB", (64, 64), "blue"), "blue.png")
+        with mock.patch.object(pipelines.uai, "generate_image_description",
+                               side_effect=["A red square.", "A blue square."]) as describe:
+            red_result, _ = pipelines._describe(red, results.content_hash(red.read_bytes()), "brief", 0)
+            blue_result, _ = pipelines._describe(blue, results.content_hash(blue.read_bytes()), "brief", 0)
+        self.assertEqual(describe.call_count, 2)
+        self.assertEqual(blue_result.data["description"], "A blue square.")
+
+    def test_resized_copy_matches_but_other_aspect_ratio_does_not(self):
+        index = PerceptualIndex(max_distance=6, max_entries=10, aspect_tolerance=0.02)
+        original = _detailed_image()
+        index.add(fingerprint(_save_image(original, "a.png")), "original")
+
+        resized = fingerprint(_save_image(original.resize((160, 120)), "b.jpg"))
+        self.assertEqual(index.find(resized)[0], "original")
+
+        stretched = fingerprint(_save_image(original.resize((320, 120)), "c.png"))
+        self.assertIsNone(index.find(stretched))
+
+
+class NearDuplicateTextTests(TestCase):
+    convert = DocumentChunkCacheTests.convert
+
+    def test_formatting_only_variant_reuses_the_result(self):
+        self.convert("Take 5 mg twice a day.")
+        result, calls = self.convert("take 5 MG,  twice a day\n-- \nSent from my phone")
+        self.assertEqual(calls, 0)
+        self.assertEqual(result["simplified_text"], "TAKE 5 MG TWICE A DAY.")
+
+    def test_edits_that_change_the_meaning_are_converted_again(self):
+        self.convert("Take 5 mg twice a day.")
+        self.assertEqual(self.convert("Take 50 mg twice a day.")[1], 1)
+        self.assertEqual(self.convert("Do not take 5 mg twice a day.")[1], 1)
+
+
+def _figure_pdf():
+    """
+    An 8-page PDF with figures on pages 1 and 7; the other pages only
+    hold a decorative speck.
+    """
+    speck = Image.new("RGB", (10, 10), "white")
+    pages = [speck] * 8
+    pages[0] = _detailed_image(120, 90)
+    pages[6] = _detailed_image(90, 120)
+    return _save_pdf(pages)
+
+
+def _describe_figure(data, mime):
+    with Image.open(io.BytesIO(data)) as image:
+        return "A chart." if image.width > image.height else "A photo."
+
+
+@override_settings(DOCUMENT_MAX_PAGES=3)
+class PdfFigureTests(TestCase):
+    def test_figures_come_from_every_page_while_text_stops_at_the_limit(self):
+        figures = []
+        texts = list(iter_pdf_pages(_figure_pdf(), on_figures=figures.extend))
+        self.assertEqual(len(texts), 3)
+        self.assertEqual([figure[0] for figure in figures], [0, 6])
+
+    def test_figures_past_the_text_limit_are_described(self):
+        upload = SimpleUploadedFile("document.pdf", _figure_pdf().read_bytes(), content_type="application/pdf")
+        with mock.patch.object(pipelines.uai, "make_document_accessible", side_effect=_accessible):
+            with mock.patch.object(pipelines.uai, "describe_image_bytes", side_effect=_describe_figure):
+                out = pipelines.accessible_document(upload, generate_audio=False, audio_format="mp3")
+        text = out["accessible"]["simplified_text"]
+        self.assertIn("[Figure, page 1: A chart.]", text)
+        self.assertIn("[Figure, page 7: A photo.]", text)
+
+
+class IndexCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_index_is_cached_per_visitor_and_its_csrf_token_stays_valid(self):
+        visitor = Client(enforce_csrf_checks=True)
+        visitor.get("/")
+        page = visitor.get("/")
+        with mock.patch.object(views, "_render_page", side_effect=AssertionError("rendered")):
+            cached = visitor.get("/")
+            with self.assertRaises(AssertionError):
+                Client().get("/")   # a new visitor gets their own token
+        self.assertEqual(cached.content, page.content)
+
+        token = page.context["csrf_token"]
+        with mock.patch.object(pipelines, "sign_language", return_value={}):
+            response = visitor.post("/text-to-sign/", {"text": "Hi.", "csrfmiddlewaretoken": str(token)})
+        self.assertEqual(response.status_code, 200)
+
+
+class AdmissionTests(TestCase):
+    def test_gate_sheds_when_queue_is_full_or_wait_too_long(self):
+        gate = AdmissionGate("test", limit=1, queue_size=1, max_wait=0.05)
+        self.assertTrue(gate.acquire())
+        self.assertFalse(gate.acquire())   # waited max_wait in the queue
+        self.assertEqual(gate.stats()["shed_timeout"], 1)
+
+        waiter = threading.Thread(target=gate.acquire)
+        with mock.patch.object(gate, "max_wait", 1):
+            waiter.start()
+            while gate.stats()["queue_depth"] == 0:
+                time.sleep(0.001)
+            self.assertFalse(gate.acquire())   # queue full
+            gate.release(0.1)
+            waiter.join()
+        self.assertEqual(gate.stats()["shed_queue_full"], 1)
+        self.assertEqual(gate.stats()["active"], 1)
+
+    def test_page_stream_and_api_routes_share_a_gate(self):
+        gate = gates["text_to_sign"]
+        for url_name in ("text_to_sign", "text_to_sign_stream", "api_text_to_sign", "api_batch_text_to_sign"):
+            self.assertIs(gate_for(url_name), gate)
+        self.assertIsNone(gate_for("index"))
+        self.assertIsNone(gate_for(None))
+
+    def test_busy_endpoint_answers_503_but_pages_stay_served(self):
+        gate = gates["text_to_sign"]
+        with mock.patch.multiple(gate, limit=1, queue_size=0):
+            self.assertTrue(gate.acquire())
+            try:
+                response = self.client.post("/text-to-sign/", {"text": "Hello."})
+                self.assertEqual(response.status_code, 503)
+                self.assertTrue(int(response["Retry-After"]) >= 1)
+                api_response = self.client.post(
+                    "/api/v1/text-to-sign/", {"text": "Hello."}, content_type="application/json"
+                )
+                self.assertEqual(api_response.status_code, 503)
+                self.assertEqual(self.client.get("/").status_code, 200)
+                self.assertEqual(self.client.get("/text-to-sign/").status_code, 200)
+            finally:
+                gate.release(0.1)
+        self.assertEqual(gate.stats()["active"], 0)
@@ -0,0 +1,71 @@
+import hashlib
+import re
+import threading
+
+from django.conf import settings
+
+from .models import SourceInput
+
+_SIGNATURE = re.compile(r"\n--\s*\n.*\Z", re.S)
+_NON_WORD = re.compile(r"[\W_]+")
+
+
+def normalize_text(text: str) -> str:
+    """
+    Drops a trailing "-- " signature block, case, punctuation and spacing.
+    """
+    text = _SIGNATURE.sub("", text)
+    return " ".join(_NON_WORD.sub(" ", text.casefold()).split())
+
+
+def normalized_hash(text: str) -> str:
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+class TextIndex:
+    """
+    Finds a stored input of one pipeline whose text is the same as a new
+    text once normalized (see normalize_text), so inputs that differ only in
+    spacing, punctuation, casing or a signature reuse the earlier result.
+    Matching is exact on the normalized text: any change to the words,
+    numbers included, is a different input.
+
+    The normalized hash is stored, indexed, on SourceInput.
+    """
+
+    def __init__(self, pipeline: str):
+        self.pipeline = pipeline
+        self._counts = {"lookups": 0, "near_hits": 0, "misses": 0}
+        self._lock = threading.Lock()
+
+    def find(self, key: str):
+        """
+        Returns the content hash of the most recent input of this pipeline
+        with normalized hash `key`, or None.
+        """
+        return (
+            SourceInput.objects
+            .filter(normalized_hash=key, results__pipeline=self.pipeline)
+            .order_by("-created_at")
+            .values_list("content_hash", flat=True)
+            .first()
+        )
+
+    def record(self, hit: bool):
+        with self._lock:
+            self._counts["lookups"] += 1
+            self._counts["near_hits" if hit else "misses"] += 1
+
+    def add(self, content_hash: str, key: str):
+        SourceInput.objects.filter(content_hash=content_hash).update(normalized_hash=key)
+
+    def stats(self):
+        with self._lock:
+            lookups = self._counts["lookups"]
+            return {
+                **self._counts,
+                "match_rate": round(self._counts["near_hits"] / lookups, 4) if lookups else None,
+            }
+
+
+text_indexes = {pipeline: TextIndex(pipeline) for pipeline in settings.TEXT_NORMALIZED_PIPELINES}
@@ -0,0 +1,117 @@
+import re
+import zlib
+
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+_STREAM_BREAK = re.compile(r"(?<=[.!?])\s+|\n\s*\n")
+
+
+def split_sentences(text: str):
+    """
+    Splits text into sentences at ., ! and ? followed by whitespace.
+    Paragraph breaks always end a sentence.
+    """
+    sentences = []
+    for paragraph in _PARAGRAPH_BREAK.split(text):
+        paragraph = " ".join(paragraph.split())
+        if paragraph:
+            sentences.extend(s for s in _SENTENCE_END.split(paragraph) if s)
+    return sentences
+
+
+def iter_stream_sentences(pieces):
+    """
+    Yields the sentences of text arriving in pieces (e.g. streamed model
+    output) as soon as each is complete, i.e. followed by whitespace or a
+    paragraph break; whatever is left is yielded at the end.
+    """
+    buffer = ""
+    for piece in pieces:
+        buffer += piece
+        last = None
+        for last in _STREAM_BREAK.finditer(buffer):
+            pass
+        if last is not None:
+            yield from split_sentences(buffer[:last.end()])
+            buffer = buffer[last.end():]
+    yield from split_sentences(buffer)
+
+
+def normalize_phrase(sentence: str) -> str:
+    """
+    Normalizes a sentence for phrase-memo lookups: case, spacing and a
+    trailing period are ignored; ? and ! are kept since they change the
+    signing (question face, emphasis).
+    """
+    return " ".join(sentence.split()).casefold().strip("\"' ").rstrip(".").strip()
+
+
+def _split_long(sentence: str, max_chars: int):
+    words, current = sentence.split(" "), ""
+    for word in words:
+        if current and len(current) + 1 + len(word) > max_chars:
+            yield current
+            current = word
+        else:
+            current = f"{current} {word}" if current else word
+    if current:
+        yield current
+
+
+def pack_segments(text: str, max_chars: int):
+    """
+    Groups consecutive sentences into segments of at most `max_chars`
+    characters. A sentence longer than the limit is split at word boundaries.
+    """
+    segments, current = [], ""
+    for sentence in split_sentences(text):
+        for piece in _split_long(sentence, max_chars):
+            if current and len(current) + 1 + len(piece) > max_chars:
+                segments.append(current)
+                current = piece
+            else:
+                current = f"{current} {piece}" if current else piece
+    if current:
+        segments.append(current)
+    return segments
+
+
+def _is_chunk_boundary(unit: str, size: int, target_chars: int) -> bool:
+    """
+    Content-defined boundary: whether a chunk ends after `unit` depends only
+    on the unit itself and the chunk size so far, so an edit moves at most
+    the boundaries next to it and the other chunks keep their hash.
+    Blank lines (paragraph ends) are preferred once a chunk is half full.
+    """
+    if size >= 2 * target_chars:
+        return True
+    if size < target_chars // 2:
+        return False
+    if not unit.strip():
+        return True
+    return zlib.crc32(unit.encode("utf-8")) % 8 == 0
+
+
+def iter_chunks(pieces, target_chars: int):
+    """
+    Groups the lines of an iterable of text pieces (e.g. PDF pages) into
+    chunks of roughly `target_chars`, yielding each chunk as soon as its
+    boundary is known so work can start before the last piece arrives.
+    Lines longer than `target_chars` are split into sentences.
+    """
+    chunk, size = [], 0
+    for piece in pieces:
+        for line in piece.split("\n"):
+            units = split_sentences(line) if len(line) > target_chars else [line]
+            for unit in units:
+                chunk.append(unit)
+                size += len(unit)
+                if _is_chunk_boundary(unit, size, target_chars):
+                    text = "\n".join(chunk).strip()
+                    if text:
+                        yield text
+                    chunk, size = [], 0
+
+    text = "\n".join(chunk).strip()
+    if text:
+        yield text
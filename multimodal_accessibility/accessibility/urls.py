@@ -1,12 +1,29 @@
 from django.urls import path
-from . import views
+from . import api, views
 
 app_name = "accessibility"
 
 urlpatterns = [
     path("", views.index, name="index"),
     path("image-to-audio/", views.image_to_audio_view, name="image_to_audio"),
+    path("image-to-audio/stream/", views.image_to_audio_stream_view, name="image_to_audio_stream"),
     path("text-to-visual/", views.complex_text_view, name="text_to_visual"),
     path("text-to-sign/", views.sign_language_view, name="text_to_sign"),
+    path("text-to-sign/stream/", views.sign_language_stream_view, name="text_to_sign_stream"),
     path("document-accessible/", views.document_accessible_view, name="document_accessible"),
+    path("history/", views.history_view, name="history"),
+    path("api/v1/routing/", api.routing, name="api_routing"),
+    path("api/v1/hedging/", api.hedging, name="api_hedging"),
+    path("api/v1/breakers/", api.breakers_status, name="api_breakers"),
+    path("api/v1/image-index/", api.image_index_status, name="api_image_index"),
+    path("api/v1/text-index/", api.text_index_status, name="api_text_index"),
+    path("api/v1/admission/", api.admission_status, name="api_admission"),
 ]
+
+# Versioned JSON API: one endpoint per pipeline plus a batch endpoint each.
+for _pipeline in api.PIPELINES:
+    _name = _pipeline.replace("-", "_")
+    urlpatterns += [
+        path(f"api/v1/{_pipeline}/", api.convert, {"pipeline": _pipeline}, name=f"api_{_name}"),
+        path(f"api/v1/batch/{_pipeline}/", api.batch, {"pipeline": _pipeline}, name=f"api_batch_{_name}"),
+    ]
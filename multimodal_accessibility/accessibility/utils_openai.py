@@ -1,16 +1,102 @@
 import base64
-from io import BytesIO
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import os
+import tempfile
+import time
 
-from openai import OpenAI
-from PyPDF2 import PdfReader
-from django.core.files.storage import default_storage
-from django.core.files.base import ContentFile
-from PIL import Image
+from openai import APITimeoutError, OpenAI
+from django.conf import settings
+
+from . import deadlines
+from .breaker import CircuitOpen, breakers
+from .hedging import hedger
+from .keyframes import frame_count, frame_data_urls, key_frame_indices
+from .pdf_extract import iter_pdf_pages
+from .routing import router
+from .storage import media_store
+from .text_segments import iter_stream_sentences, pack_segments
 
 client = OpenAI()  
 
+# Bump a pipeline's version whenever its prompt or output schema changes,
+# so results stored for the old prompt are no longer served.
+PROMPT_VERSIONS = {
+    "image_description": "1",
+    "visual_plan": "1",
+    "sign_language": "1",
+    "document_accessible": "1",
+    "document_chunk": "1",
+    "sign_phrase": "1",
+}
+
+
+def _client():
+    """
+    The OpenAI client, with the request timeout capped at what is left of
+    the current pipeline deadline (and no retries past it).
+    """
+    timeout = deadlines.remaining()
+    if timeout is None:
+        return client
+    return client.with_options(timeout=timeout, max_retries=0)
+
+
+def _upstream(call):
+    """
+    Runs call(client) under the current deadline, turning a timeout caused
+    by the deadline into DeadlineExceeded.
+    """
+    bounded = _client()
+    try:
+        return call(bounded)
+    except APITimeoutError:
+        if bounded is not client:
+            raise deadlines.DeadlineExceeded()
+        raise
+
+
+def _create_response(endpoint: str, capability: str, input_size: int, detail_level: str = None, **kwargs):
+    """
+    Sends a Responses API request with the model the router picks for this
+    endpoint and records the observed latency for future routing.
+    Endpoints listed in HEDGE_ENDPOINTS are idempotent and may be hedged.
+    Raises CircuitOpen without calling upstream while the capability's
+    breaker is open.
+    """
+    model = router.choose(endpoint, capability, input_size, detail_level)
+
+    def call():
+        return _upstream(lambda c: c.responses.create(model=model, **kwargs))
+
+    started = time.monotonic()
+    if endpoint in settings.HEDGE_ENDPOINTS:
+        resp = breakers[capability].call(hedger.run, endpoint, call)
+    else:
+        resp = breakers[capability].call(call)
+    router.observe(model, input_size, time.monotonic() - started)
+    return resp
+
+
+def _stream_response(endpoint: str, capability: str, input_size: int, detail_level: str = None, **kwargs):
+    """
+    Like _create_response, but streams the request and yields the output
+    text as it is generated. Streams are never hedged; the breaker sees
+    whether the stream could be opened.
+    """
+    model = router.choose(endpoint, capability, input_size, detail_level)
+    started = time.monotonic()
+    stream = breakers[capability].call(
+        _upstream, lambda c: c.responses.create(model=model, stream=True, **kwargs)
+    )
+    try:
+        for event in stream:
+            if event.type == "response.output_text.delta":
+                yield event.delta
+    except APITimeoutError:
+        raise deadlines.DeadlineExceeded()
+    router.observe(model, input_size, time.monotonic() - started)
+
 
 def encode_image_as_data_url(image_path: Path) -> str:
     ext = image_path.suffix.lower()
@@ -21,8 +107,40 @@ def encode_image_as_data_url(image_path: Path) -> str:
 
 
 def generate_image_description(image_path: Path, detail_level: str = "standard") -> str:
+    """
+    Describes a still image, or narrates the key frames of an animated GIF
+    or multi-page image (see generate_sequence_description).
+    """
+    if frame_count(image_path) > 1:
+        return generate_sequence_description(image_path, detail_level)
+    return _describe_data_url(encode_image_as_data_url(image_path), detail_level)
+
+
+def describe_image_bytes(data: bytes, mime: str, detail_level: str = "brief") -> str:
+    """
+    Describes an in-memory image, such as a figure embedded in a PDF.
+    """
+    b64 = base64.b64encode(data).decode("utf-8")
+    return _describe_data_url(f"data:{mime};base64,{b64}", detail_level)
+
+
+def stream_image_description(image_path: Path, detail_level: str = "standard"):
+    """
+    Yields the description of a still image in pieces as it is generated.
+    Multi-frame images are narrated as a whole (see
+    generate_sequence_description) and yielded in one piece.
+    """
+    if frame_count(image_path) > 1:
+        yield generate_sequence_description(image_path, detail_level)
+        return
     data_url = encode_image_as_data_url(image_path)
+    yield from _stream_response(
+        "image_description", "vision", len(data_url), detail_level,
+        input=_description_input(data_url, detail_level),
+    )
+
 
+def _description_input(data_url: str, detail_level: str):
     prompt = f"""
     You are an accessibility assistant generating image descriptions for blind and low-vision users.
 
@@ -33,9 +151,113 @@ def generate_image_description(image_path: Path, detail_level: str = "standard")
 
     Return ONLY the description text.
     """
+    return [
+        {
+            "role": "user",
+            "content": [
+                {"type": "input_text", "text": prompt},
+                {"type": "input_image", "image_url": data_url},
+            ],
+        }
+    ]
+
+
+def _describe_data_url(data_url: str, detail_level: str) -> str:
+    resp = _create_response(
+        "image_description", "vision", len(data_url), detail_level,
+        input=_description_input(data_url, detail_level),
+    )
+    return resp.output_text
+
+
+def _describe_frames(data_urls, first: int, total: int, detail_level: str):
+    prompt = f"""
+    You are an accessibility assistant generating image descriptions for blind and low-vision users.
+
+    The images are key frames {first} to {first + len(data_urls) - 1} of {total},
+    in order, from an animation or a multi-page image.
+    Describe each frame, focusing on what changed since the previous one.
+
+    Follow these principles:
+    - Be accurate and objective.
+    - Include only important details.
+    - Detail level: {detail_level.upper()}.
+
+    Return JSON with key:
+    - frames: list with one description per image, in order
+    """
+
+    content = [{"type": "input_text", "text": prompt}]
+    content += [{"type": "input_image", "image_url": url} for url in data_urls]
+    resp = _create_response(
+        "image_description", "vision", sum(len(url) for url in data_urls), detail_level,
+        input=[{"role": "user", "content": content}],
+        text={"format": {"type": "json_object"}},
+    )
+    import json
+    frames = json.loads(resp.output_text).get("frames") or []
+    return [str(f) for f in frames[:len(data_urls)]]
+
+
+def generate_sequence_description(image_path: Path, detail_level: str = "standard") -> str:
+    """
+    Narrates a multi-frame image. Only key frames, i.e. frames that differ
+    visibly from the previous key frame, are described, KEYFRAME_BATCH per
+    vision call, so the number of calls follows the visual changes rather
+    than the frame count.
+    """
+    indices, total = key_frame_indices(image_path, settings.KEYFRAME_THRESHOLD, settings.KEYFRAME_MAX)
+    data_urls = frame_data_urls(image_path, indices)
+    if len(data_urls) == 1:
+        return _describe_data_url(data_urls[0], detail_level)
+
+    def describe_batch(start):
+        batch = data_urls[start:start + settings.KEYFRAME_BATCH]
+        descriptions = _describe_frames(batch, start + 1, len(data_urls), detail_level)
+        if len(descriptions) != len(batch):
+            # Fewer descriptions than frames cannot be matched to frames
+            # reliably, so describe each frame of the batch on its own.
+            descriptions = [_describe_data_url(url, detail_level) for url in batch]
+        return descriptions
+
+    with ThreadPoolExecutor(max_workers=settings.KEYFRAME_MAX_CONCURRENCY) as pool:
+        futures = [
+            deadlines.submit(pool, describe_batch, start)
+            for start in range(0, len(data_urls), settings.KEYFRAME_BATCH)
+        ]
+        descriptions = [d for future in futures for d in future.result()]
+
+    return "\n".join(
+        f"Frame {index + 1} of {total}: {description}"
+        for index, description in zip(indices, descriptions)
+    )
+
+
+def generate_image_descriptions(image_path: Path) -> dict:
+    """
+    Returns brief, standard and detailed descriptions from one vision call.
+    """
+    data_url = encode_image_as_data_url(image_path)
+
+    prompt = """
+    You are an accessibility assistant generating image descriptions for blind and low-vision users.
+
+    Follow these principles:
+    - Be accurate and objective.
+    - Include only important details.
+
+    Write the description at three detail levels:
+    brief is one short sentence, standard is two to four sentences,
+    detailed is a thorough paragraph.
 
-    resp = client.responses.create(
-        model="gpt-4o-mini",
+    Return JSON with keys:
+    - brief
+    - standard
+    - detailed
+    """
+
+    resp = _create_response(
+        "image_description", "vision", len(data_url),
         input=[
             {
                 "role": "user",
@@ -45,25 +267,118 @@ def generate_image_description(image_path: Path, detail_level: str = "standard")
                 ],
             }
         ],
+        text={"format": {"type": "json_object"}},
     )
-    return resp.output_text
+    import json
+    data = json.loads(resp.output_text)
+    standard = data.get("standard", "")
+    return {
+        "brief": data.get("brief", standard),
+        "standard": standard,
+        "detailed": data.get("detailed", standard),
+    }
 
 
-def text_to_speech(text: str, basename: str = "audio_description") -> str:
-    """
-    Generates an mp3 file from text and returns its relative media path.
-    """
-    media_dir = Path("media/audio")
-    media_dir.mkdir(parents=True, exist_ok=True)
-    out_path = media_dir / f"{basename}.mp3"
+# Formats offered for generated speech: extension and MIME type. These
+# formats can be concatenated segment by segment without re-encoding
+# (MP3/ADTS frames, chained Ogg streams for Opus).
+AUDIO_FORMATS = {
+    "mp3": (".mp3", "audio/mpeg"),
+    "opus": (".opus", "audio/ogg"),
+    "aac": (".aac", "audio/aac"),
+}
+
+
+def audio_mime_type(audio_format: str) -> str:
+    return AUDIO_FORMATS[audio_format][1]
+
 
-    response = client.audio.speech.create(
-        model="gpt-4o-mini-tts",
+def _synthesize(text: str, audio_format: str) -> bytes:
+    model = router.choose("speech", "speech", len(text))
+    started = time.monotonic()
+    audio = breakers["speech"].call(_upstream, lambda c: c.audio.speech.create(
+        model=model,
         voice="alloy",
         input=text,
-    )
-    response.stream_to_file(out_path)
-    return f"/media/audio/{basename}.mp3"
+        response_format=audio_format,
+    ).read())
+    router.observe(model, len(text), time.monotonic() - started)
+    return audio
+
+
+def iter_speech_segments(text: str, audio_format: str = None, max_chars: int = None, max_workers: int = None):
+    """
+    Splits text at sentence boundaries into segments of at most `max_chars`
+    and synthesizes them concurrently. Yields the audio bytes of each
+    segment in order, each as soon as it and all earlier segments are done.
+    """
+    audio_format = audio_format or settings.TTS_AUDIO_FORMAT
+    max_chars = max_chars or settings.TTS_SEGMENT_CHARS
+    max_workers = max_workers or settings.TTS_MAX_CONCURRENCY
+    segments = pack_segments(text, max_chars) or [text]
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(segments))) as pool:
+        futures = [deadlines.submit(pool, _synthesize, segment, audio_format) for segment in segments]
+        try:
+            for future in futures:
+                yield future.result()
+        finally:
+            for future in futures:
+                future.cancel()
+
+
+def iter_speech_as_generated(pieces, audio_format: str = None, max_workers: int = None):
+    """
+    Synthesizes text while it is still being generated: the pieces are cut
+    into sentences and each sentence goes to TTS as soon as it is complete,
+    at most `max_workers` at once. Yields (sentence, audio bytes) in order,
+    each as soon as it and all earlier sentences are done. Once speech is
+    unavailable the remaining sentences are yielded with no audio.
+    """
+    audio_format = audio_format or settings.TTS_AUDIO_FORMAT
+    max_workers = max_workers or settings.TTS_MAX_CONCURRENCY
+    pending = []   # (sentence, future), oldest first
+
+    def ready(block: bool):
+        while pending and (block or pending[0][1].done()):
+            sentence, future = pending.pop(0)
+            try:
+                audio = future.result()
+            except CircuitOpen:
+                audio = None
+            yield sentence, audio
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        try:
+            for sentence in iter_stream_sentences(pieces):
+                pending.append((sentence, deadlines.submit(pool, _synthesize, sentence, audio_format)))
+                yield from ready(block=False)
+            yield from ready(block=True)
+        finally:
+            for _, future in pending:
+                future.cancel()
+
+
+def text_to_speech(text: str, audio_format: str = None) -> str:
+    """
+    Generates an audio file from text and returns its media URL.
+    Identical audio is stored once under its content hash.
+
+    `audio_format` is one of AUDIO_FORMATS and defaults to TTS_AUDIO_FORMAT.
+    Texts longer than TTS_SEGMENT_CHARS are synthesized sentence-parallel
+    and joined in order. (Pages that play audio before it is complete use
+    iter_speech_as_generated instead; see pipelines.iter_describe_image.)
+    """
+    audio_format = audio_format or settings.TTS_AUDIO_FORMAT
+    ext = AUDIO_FORMATS[audio_format][0]
+
+    if len(text) <= settings.TTS_SEGMENT_CHARS:
+        audio = _synthesize(text, audio_format)
+    else:
+        audio = b"".join(iter_speech_segments(text, audio_format))
+
+    out_path = media_store.save_bytes(audio, "audio", ext)
+    return media_store.url(out_path)
 
 
 def generate_sign_language_description(text: str):
@@ -84,8 +399,8 @@ def generate_sign_language_description(text: str):
     - body_and_face_notes
     """
 
-    resp = client.responses.create(
-        model="gpt-4.1-mini",
+    resp = _create_response(
+        "sign_language", "text", len(text),
         input=[
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": text},
@@ -120,8 +435,8 @@ def generate_visual_plan(text: str):
     - simple_explanation
     """
 
-    resp = client.responses.create(
-        model="gpt-4.1-mini",
+    resp = _create_response(
+        "visual_plan", "text", len(text),
         input=[
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": text},
@@ -142,52 +457,53 @@ def generate_diagram_image(prompt: str) -> str:
     """
     Generates a diagram image using GPT-Image and returns its media URL.
     """
-    result = client.images.generate(
+    result = breakers["image"].call(_upstream, lambda c: c.images.generate(
         model="gpt-image-1",
         prompt=prompt,
         size="1024x1024",
         output_format="png",
-    )
+    ))
 
     b64 = result.data[0].b64_json
     image_bytes = base64.b64decode(b64)
-    img = Image.open(BytesIO(image_bytes))
-
-    media_dir = Path("media/diagrams")
-    media_dir.mkdir(parents=True, exist_ok=True)
-    out_path = media_dir / "diagram.png"
-    img.save(out_path, format="PNG")
 
-    return "/media/diagrams/diagram.png"
+    out_path = media_store.save_bytes(image_bytes, "diagrams", ".png")
+    return media_store.url(out_path)
 
 
-def extract_text_from_document(uploaded_file) -> str:
+def iter_document_pages(uploaded_file, on_figures=None):
     """
-    Very simple extractor:
-    - If .txt: decode directly
-    - If .pdf: use PyPDF2
+    Yields the document text page by page:
+    - If .txt: the decoded text as a single page
+    - If .pdf: each page in order, extracted in parallel worker processes
+      (embedded images are passed to `on_figures`, see iter_pdf_pages)
     """
     name = uploaded_file.name.lower()
-    content = uploaded_file.read()
 
     if name.endswith(".txt"):
+        content = uploaded_file.read()
         try:
-            return content.decode("utf-8")
+            yield content.decode("utf-8")
         except Exception:
-            return content.decode("latin-1", errors="ignore")
+            yield content.decode("latin-1", errors="ignore")
+        return
 
     if name.endswith(".pdf"):
-        tmp_path = default_storage.save("tmp_upload.pdf", ContentFile(content))
-        full_path = Path(default_storage.path(tmp_path))
-        reader = PdfReader(str(full_path))
-        text = []
-        for page in reader.pages[:5]:  
-            text.append(page.extract_text() or "")
-        full_path.unlink(missing_ok=True)
-        return "\n".join(text)
-
-    return "Unsupported document format or empty content."
-    
+        with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as tmp:
+            for chunk in uploaded_file.chunks():
+                tmp.write(chunk)
+        try:
+            yield from iter_pdf_pages(tmp.name, on_figures=on_figures)
+        finally:
+            os.unlink(tmp.name)
+        return
+
+    yield "Unsupported document format or empty content."
+
+
+def extract_text_from_document(uploaded_file) -> str:
+    return "\n".join(iter_document_pages(uploaded_file))
+
 
 def make_document_accessible(text: str):
     """
@@ -210,8 +526,8 @@ def make_document_accessible(text: str):
     - alt_summary
     """
 
-    resp = client.responses.create(
-        model="gpt-4.1-mini",
+    resp = _create_response(
+        "document_accessible", "text", len(text),
         input=[
             {"role": "system", "content": prompt},
             {"role": "user", "content": text},
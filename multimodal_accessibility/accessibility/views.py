@@ -1,7 +1,25 @@
+import json
+import mimetypes
+import re
 from pathlib import Path
 
-from django.shortcuts import render
 from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import (
+    FileResponse,
+    Http404,
+    HttpResponse,
+    HttpResponseNotModified,
+    JsonResponse,
+    StreamingHttpResponse,
+)
+from django.shortcuts import render
+from django.utils._os import safe_join
+from django.utils.http import parse_etags
+from django.views.decorators.cache import cache_page
+from django.views.decorators.csrf import csrf_protect
+from django.views.decorators.http import require_POST, require_safe
+from django.views.decorators.vary import vary_on_cookie
 
 from .forms import (
     ImageToAudioForm,
@@ -9,19 +27,52 @@ from .forms import (
     SignLanguageForm,
     DocumentUploadForm,
 )
-from . import utils_openai as uai
+from . import pipelines, results
+from .deadlines import DeadlineExceeded
+from .models import ConversionResult
+from .storage import media_store
 
 
-def index(request):
-    context = {
-        "image_form": ImageToAudioForm(),
-        "complex_form": ComplexTextForm(),
-        "sign_form": SignLanguageForm(),
-        "doc_form": DocumentUploadForm(),
-    }
+PAGE_FORMS = {
+    "image_form": ImageToAudioForm,
+    "complex_form": ComplexTextForm,
+    "sign_form": SignLanguageForm,
+    "doc_form": DocumentUploadForm,
+}
+
+
+def _render_page(request, context, partial=None, form=None):
+    """
+    Renders a conversion result. Requests sent with an `X-Fragment: 1`
+    header get only the result partial; everything else gets the full page,
+    whose unbound forms come from the template fragment cache (the index
+    page as a whole is cached, see `index`).
+    """
+    if partial and request.headers.get("X-Fragment") == "1":
+        context["fragment"] = True
+        status = 400 if form is not None and form.errors else 200
+        return render(request, partial, context, status=status)
+
+    for name, form_class in PAGE_FORMS.items():
+        context.setdefault(name, form_class())
+    context["shell_cache_seconds"] = settings.INDEX_SHELL_CACHE_SECONDS
     return render(request, "accessibility/index.html", context)
 
 
+@require_safe
+@cache_page(settings.INDEX_SHELL_CACHE_SECONDS)
+@vary_on_cookie
+@csrf_protect
+def index(request):
+    """
+    The page shell with empty forms. Cached whole per visitor (its forms
+    carry the visitor's CSRF token, so the cache varies on the cookie);
+    first visits, which set the CSRF cookie, are rendered and not cached.
+    csrf_protect sets the cookie before cache_page sees the response.
+    """
+    return _render_page(request, {})
+
+
 def image_to_audio_view(request):
     context = {}
     if request.method == "POST":
@@ -29,28 +80,49 @@ def image_to_audio_view(request):
         if form.is_valid():
             image_file = form.cleaned_data["image"]
             detail_level = form.cleaned_data["detail_level"]
+            audio_format = form.cleaned_data["audio_format"] or settings.TTS_AUDIO_FORMAT
 
-            media_dir = Path(settings.MEDIA_ROOT) / "uploads"
-            media_dir.mkdir(parents=True, exist_ok=True)
-            img_path = media_dir / image_file.name
-            with open(img_path, "wb+") as f:
-                for chunk in image_file.chunks():
-                    f.write(chunk)
+            img_path = media_store.save_upload(image_file)
+            describe = pipelines.describe_image_pipelined if settings.IMAGE_AUDIO_PIPELINED else pipelines.describe_image
+            out = describe(img_path, detail_level, audio_format, size=image_file.size)
 
-            description = uai.generate_image_description(img_path, detail_level)
-            audio_url = uai.text_to_speech(description, basename="image_description")
-
-            context["image_description"] = description
-            context["image_audio_url"] = audio_url
+            context["image_description"] = out["description"]
+            context["image_audio_url"] = out["audio_url"]
+            context["image_audio_type"] = out["audio_type"]
+            context["image_degraded"] = out["degraded"]
     else:
         form = ImageToAudioForm()
 
-    context.setdefault("image_form", form)
-    context.setdefault("complex_form", ComplexTextForm())
-    context.setdefault("sign_form", SignLanguageForm())
-    context.setdefault("doc_form", DocumentUploadForm())
+    context["image_form"] = form
+    return _render_page(request, context, "accessibility/partials/image_result.html", form)
 
-    return render(request, "accessibility/index.html", context)
+
+@require_POST
+def image_to_audio_stream_view(request):
+    """
+    Streams the pipelined image description as newline-delimited JSON: one
+    line per sentence with the URL of its audio as soon as it is playable,
+    then the full result with "done": true.
+    """
+    form = ImageToAudioForm(request.POST, request.FILES)
+    if not form.is_valid():
+        return JsonResponse({"errors": form.errors}, status=400)
+
+    image_file = form.cleaned_data["image"]
+    audio_format = form.cleaned_data["audio_format"] or settings.TTS_AUDIO_FORMAT
+    img_path = media_store.save_upload(image_file)
+
+    def lines():
+        try:
+            for event in pipelines.iter_describe_image(
+                img_path, form.cleaned_data["detail_level"], audio_format,
+                size=image_file.size, segment_urls=True,
+            ):
+                yield json.dumps(event) + "\n"
+        except DeadlineExceeded:
+            yield json.dumps({"error": "deadline exceeded"}) + "\n"
+
+    return StreamingHttpResponse(lines(), content_type="application/x-ndjson")
 
 
 def complex_text_view(request):
@@ -61,20 +133,17 @@ def complex_text_view(request):
             text = form.cleaned_data["text"]
             generate_diagram = form.cleaned_data["generate_diagram"]
 
-            plan = uai.generate_visual_plan(text)
-            context["visual_plan"] = plan
+            out = pipelines.visual_explanation(text, generate_diagram)
+            context["visual_plan"] = out["plan"]
+            context["visual_degraded"] = out["degraded"]
 
-            if generate_diagram:
-                img_url = uai.generate_diagram_image(plan["diagram_description"])
-                context["diagram_image_url"] = img_url
+            if out["diagram_url"]:
+                context["diagram_image_url"] = out["diagram_url"]
     else:
         form = ComplexTextForm()
 
-    context.setdefault("image_form", ImageToAudioForm())
-    context.setdefault("complex_form", form)
-    context.setdefault("sign_form", SignLanguageForm())
-    context.setdefault("doc_form", DocumentUploadForm())
-    return render(request, "accessibility/index.html", context)
+    context["complex_form"] = form
+    return _render_page(request, context, "accessibility/partials/visual_result.html", form)
 
 
 def sign_language_view(request):
@@ -83,16 +152,32 @@ def sign_language_view(request):
         form = SignLanguageForm(request.POST)
         if form.is_valid():
             text = form.cleaned_data["text"]
-            result = uai.generate_sign_language_description(text)
-            context["sign_result"] = result
+            context["sign_result"] = pipelines.sign_language(text)
     else:
         form = SignLanguageForm()
 
-    context.setdefault("image_form", ImageToAudioForm())
-    context.setdefault("complex_form", ComplexTextForm())
-    context.setdefault("sign_form", form)
-    context.setdefault("doc_form", DocumentUploadForm())
-    return render(request, "accessibility/index.html", context)
+    context["sign_form"] = form
+    return _render_page(request, context, "accessibility/partials/sign_result.html", form)
+
+
+@require_POST
+def sign_language_stream_view(request):
+    """
+    Streams per-sentence sign translations as newline-delimited JSON,
+    each line as soon as that sentence is translated or found in the memo.
+    """
+    form = SignLanguageForm(request.POST)
+    if not form.is_valid():
+        return JsonResponse({"errors": form.errors}, status=400)
+
+    def lines():
+        try:
+            for segment in pipelines.stream_sign_language(form.cleaned_data["text"]):
+                yield json.dumps(segment) + "\n"
+        except DeadlineExceeded:
+            yield json.dumps({"error": "deadline exceeded"}) + "\n"
+
+    return StreamingHttpResponse(lines(), content_type="application/x-ndjson")
 
 
 def document_accessible_view(request):
@@ -102,20 +187,121 @@ def document_accessible_view(request):
         if form.is_valid():
             uploaded_doc = form.cleaned_data["document"]
             generate_audio = form.cleaned_data["generate_audio"]
+            audio_format = form.cleaned_data["audio_format"] or settings.TTS_AUDIO_FORMAT
 
-            raw_text = uai.extract_text_from_document(uploaded_doc)
-            acc = uai.make_document_accessible(raw_text)
+            out = pipelines.accessible_document(uploaded_doc, generate_audio, audio_format)
 
-            context["doc_accessible"] = acc
+            context["doc_accessible"] = out["accessible"]
+            context["doc_degraded"] = out["degraded"]
 
-            if generate_audio and acc.get("alt_summary"):
-                audio_url = uai.text_to_speech(acc["alt_summary"], basename="doc_summary")
-                context["doc_audio_url"] = audio_url
+            if out["audio_url"]:
+                context["doc_audio_url"] = out["audio_url"]
+                context["doc_audio_type"] = out["audio_type"]
     else:
         form = DocumentUploadForm()
 
-    context.setdefault("image_form", ImageToAudioForm())
-    context.setdefault("complex_form", ComplexTextForm())
-    context.setdefault("sign_form", SignLanguageForm())
-    context.setdefault("doc_form", form)
-    return render(request, "accessibility/index.html", context)
+    context["doc_form"] = form
+    return _render_page(request, context, "accessibility/partials/document_result.html", form)
+
+
+def history_view(request):
+    pipeline = request.GET.get("pipeline") or None
+    context = {
+        "results": results.recent(pipeline),
+        "pipeline": pipeline,
+        "pipelines": ConversionResult.PIPELINE_CHOICES,
+    }
+    return render(request, "accessibility/history.html", context)
+
+
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+_CONTENT_HASH_RE = re.compile(r"^[0-9a-f]{32}$")
+mimetypes.add_type("audio/ogg", ".opus")
+mimetypes.add_type("audio/aac", ".aac")
+
+
+def _read_range(path: Path, start: int, length: int, block_size: int = 64 * 1024):
+    with open(path, "rb") as f:
+        f.seek(start)
+        while length > 0:
+            data = f.read(min(block_size, length))
+            if not data:
+                break
+            length -= len(data)
+            yield data
+
+
+@require_safe
+def serve_media(request, path):
+    """
+    Serves files under MEDIA_ROOT with ETag validation, long-lived cache
+    headers and single-range HTTP Range support, so audio players can
+    seek and resume without downloading the whole file again.
+    """
+    try:
+        full_path = Path(safe_join(settings.MEDIA_ROOT, path))
+    except SuspiciousFileOperation:
+        raise Http404("Invalid media path")
+    if not full_path.is_file():
+        raise Http404("Media file not found")
+
+    stat = full_path.stat()
+    size = stat.st_size
+    # Content-addressed files never change, so their name is a strong ETag.
+    # Their mtime is bumped on every access for LRU, so it can't be used.
+    immutable = bool(_CONTENT_HASH_RE.match(full_path.stem))
+    if immutable:
+        etag = f'"{full_path.stem}"'
+    else:
+        etag = f'"{size:x}-{int(stat.st_mtime):x}"'
+
+    cache_control = f"public, max-age={settings.MEDIA_CACHE_MAX_AGE}"
+    if immutable:
+        cache_control += ", immutable"
+        media_store.touch(full_path)
+
+    def _headers(response):
+        response["ETag"] = etag
+        response["Cache-Control"] = cache_control
+        response["Accept-Ranges"] = "bytes"
+        return response
+
+    # If-None-Match uses weak comparison, so W/ prefixes are ignored.
+    client_etags = [tag[2:] if tag.startswith("W/") else tag
+                    for tag in parse_etags(request.headers.get("If-None-Match", ""))]
+    if "*" in client_etags or etag in client_etags:
+        return _headers(HttpResponseNotModified())
+
+    content_type = mimetypes.guess_type(full_path.name)[0] or "application/octet-stream"
+    range_header = request.headers.get("Range", "")
+    if_range = request.headers.get("If-Range")
+    match = _RANGE_RE.match(range_header.strip())
+
+    if match and (if_range is None or if_range == etag):
+        first, last = match.groups()
+        if first:
+            start = int(first)
+            end = min(int(last), size - 1) if last else size - 1
+        elif last:
+            start = max(size - int(last), 0)
+            end = size - 1
+        else:
+            start, end = 0, -1
+
+        if start > end or start >= size:
+            response = HttpResponse(status=416)
+            response["Content-Range"] = f"bytes */{size}"
+            return _headers(response)
+
+        length = end - start + 1
+        response = StreamingHttpResponse(
+            _read_range(full_path, start, length),
+            status=206,
+            content_type=content_type,
+        )
+        response["Content-Range"] = f"bytes {start}-{end}/{size}"
+        response["Content-Length"] = str(length)
+        return _headers(response)
+
+    response = FileResponse(open(full_path, "rb"), content_type=content_type)
+    return _headers(response)
@@ -48,6 +48,8 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'accessibility.middleware.DeadlineMiddleware',
+    'accessibility.middleware.AdmissionMiddleware',
 ]
 
 ROOT_URLCONF = 'multimodal_accessibility.urls'
@@ -130,6 +132,192 @@ STATICFILES_DIRS = [BASE_DIR / 'accessibility' / 'static']
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Total size allowed for media/uploads, media/audio and media/diagrams.
+# Least recently used files are evicted once the quota is exceeded.
+MEDIA_QUOTA_BYTES = int(os.getenv('MEDIA_QUOTA_BYTES', 512 * 1024 * 1024))
+
+# Seconds between background garbage collection runs in each process that
+# serves requests; the thread starts with its first request (0 disables it;
+# use `python manage.py gc_media` from cron instead).
+MEDIA_GC_INTERVAL = int(os.getenv('MEDIA_GC_INTERVAL', 0))
+
+# Default format for generated speech: 'mp3', 'opus' (smallest, best for
+# slow mobile links) or 'aac'. Users can override it per request.
+TTS_AUDIO_FORMAT = os.getenv('TTS_AUDIO_FORMAT', 'mp3')
+
+# Fetch brief, standard and detailed image descriptions in one vision call
+# and store all three, so switching detail level is served from the database.
+# With IMAGE_PREFETCH_LEVEL_AUDIO the other levels' speech is synthesized in
+# the background too.
+IMAGE_DESCRIPTION_ALL_LEVELS = os.getenv('IMAGE_DESCRIPTION_ALL_LEVELS', '1') == '1'
+IMAGE_PREFETCH_LEVEL_AUDIO = os.getenv('IMAGE_PREFETCH_LEVEL_AUDIO', '0') == '1'
+
+# Pipelined image-to-audio: stream the description and synthesize each
+# sentence as soon as it is complete, instead of describing first and then
+# synthesizing. Generates only the requested detail level.
+IMAGE_AUDIO_PIPELINED = os.getenv('IMAGE_AUDIO_PIPELINED', '0') == '1'
+
+# Text longer than TTS_SEGMENT_CHARS is split at sentence boundaries and the
+# segments are synthesized concurrently, at most TTS_MAX_CONCURRENCY at once.
+TTS_SEGMENT_CHARS = int(os.getenv('TTS_SEGMENT_CHARS', 600))
+TTS_MAX_CONCURRENCY = int(os.getenv('TTS_MAX_CONCURRENCY', 4))
+
+# PDF text extraction: text beyond DOCUMENT_MAX_PAGES pages is ignored (0
+# means no limit), while figures are taken from every page. Ranges of
+# PDF_PAGES_PER_TASK pages are extracted in a pool of PDF_EXTRACT_WORKERS
+# processes; a page taking longer than PDF_PAGE_TIMEOUT seconds is skipped.
+DOCUMENT_MAX_PAGES = int(os.getenv('DOCUMENT_MAX_PAGES', 5))
+PDF_EXTRACT_WORKERS = int(os.getenv('PDF_EXTRACT_WORKERS', os.cpu_count() or 2))
+PDF_PAGES_PER_TASK = int(os.getenv('PDF_PAGES_PER_TASK', 4))
+PDF_PAGE_TIMEOUT = float(os.getenv('PDF_PAGE_TIMEOUT', 10))
+
+# Documents are processed in content-defined chunks of about
+# DOCUMENT_CHUNK_CHARS characters, each cached by hash, so re-uploading an
+# edited document only re-runs the changed chunks (DOCUMENT_MAX_CONCURRENCY
+# at a time).
+DOCUMENT_CHUNK_CHARS = int(os.getenv('DOCUMENT_CHUNK_CHARS', 4000))
+DOCUMENT_MAX_CONCURRENCY = int(os.getenv('DOCUMENT_MAX_CONCURRENCY', 4))
+
+# Images embedded in PDFs are described and interleaved as alt text in the
+# simplified text. Images smaller than PDF_FIGURE_MIN_SIDE pixels on a side
+# count as decorative and repeats of an image are skipped; at most
+# DOCUMENT_MAX_FIGURES are described, DOCUMENT_FIGURE_CONCURRENCY at once.
+DOCUMENT_DESCRIBE_FIGURES = os.getenv('DOCUMENT_DESCRIBE_FIGURES', '1') == '1'
+PDF_FIGURE_MIN_SIDE = int(os.getenv('PDF_FIGURE_MIN_SIDE', 64))
+DOCUMENT_MAX_FIGURES = int(os.getenv('DOCUMENT_MAX_FIGURES', 20))
+DOCUMENT_FIGURE_CONCURRENCY = int(os.getenv('DOCUMENT_FIGURE_CONCURRENCY', 4))
+
+# Translate text to sign language sentence by sentence, reusing memoized
+# translations of common phrases and translating the rest concurrently.
+SIGN_SEGMENTED = os.getenv('SIGN_SEGMENTED', '1') == '1'
+SIGN_MAX_CONCURRENCY = int(os.getenv('SIGN_MAX_CONCURRENCY', 4))
+
+# JSON API batch endpoints: maximum items per request, and how many items
+# are processed concurrently.
+API_BATCH_MAX_ITEMS = int(os.getenv('API_BATCH_MAX_ITEMS', 50))
+API_BATCH_CONCURRENCY = int(os.getenv('API_BATCH_CONCURRENCY', 4))
+
+# Stored conversion results not accessed for this many days, and the least
+# recently accessed ones beyond the row cap, are removed by `prune_results`.
+RESULT_RETENTION_DAYS = int(os.getenv('RESULT_RETENTION_DAYS', 30))
+RESULT_MAX_ROWS = int(os.getenv('RESULT_MAX_ROWS', 10000))
+
+# Seconds the index page is kept in the cache (per visitor, as it carries
+# their CSRF token) and the unbound forms of the other pages in the template
+# fragment cache.
+INDEX_SHELL_CACHE_SECONDS = int(os.getenv('INDEX_SHELL_CACHE_SECONDS', 3600))
+
+# Django serves MEDIA_URL itself (with ETags and Range support) only when
+# SERVE_MEDIA is on, by default only with DEBUG; in production let the web
+# server serve MEDIA_ROOT.
+SERVE_MEDIA = os.getenv('SERVE_MEDIA', '1' if DEBUG else '0') == '1'
+
+# Cache lifetime for files served from MEDIA_URL. Content-addressed files
+# never change, so they are additionally marked immutable.
+MEDIA_CACHE_MAX_AGE = int(os.getenv('MEDIA_CACHE_MAX_AGE', 365 * 24 * 3600))
+
+# Model routing: per capability, the models to choose from (fastest first)
+# and the preferred one. A "detailed" request starts one tier up, a "brief"
+# one tier down. When the observed latency of the chosen model exceeds the
+# endpoint's target (seconds), calls fall back to a faster tier; latency
+# observations older than ROUTING_STALE_SECONDS are forgotten.
+MODEL_TIERS = {
+    'vision': ['gpt-4.1-nano', 'gpt-4o-mini', 'gpt-4o'],
+    'text': ['gpt-4.1-nano', 'gpt-4.1-mini', 'gpt-4.1'],
+    'speech': ['tts-1', 'gpt-4o-mini-tts'],
+}
+MODEL_PREFERRED = {
+    'vision': os.getenv('MODEL_VISION', 'gpt-4o-mini'),
+    'text': os.getenv('MODEL_TEXT', 'gpt-4.1-mini'),
+    'speech': os.getenv('MODEL_SPEECH', 'gpt-4o-mini-tts'),
+}
+LATENCY_TARGETS = {
+    'image_description': float(os.getenv('LATENCY_TARGET_IMAGE', 6)),
+    'visual_plan': float(os.getenv('LATENCY_TARGET_VISUAL', 8)),
+    'sign_language': float(os.getenv('LATENCY_TARGET_SIGN', 5)),
+    'document_accessible': float(os.getenv('LATENCY_TARGET_DOCUMENT', 15)),
+    'speech': float(os.getenv('LATENCY_TARGET_SPEECH', 4)),
+}
+ROUTING_STALE_SECONDS = float(os.getenv('ROUTING_STALE_SECONDS', 300))
+
+# Seconds each pipeline may spend on upstream calls, across all its stages
+# (0 disables the deadline). Past it the request fails with 504.
+PIPELINE_DEADLINES = {
+    'image_description': float(os.getenv('DEADLINE_IMAGE', 30)),
+    'visual_plan': float(os.getenv('DEADLINE_VISUAL', 90)),
+    'sign_language': float(os.getenv('DEADLINE_SIGN', 30)),
+    'document_accessible': float(os.getenv('DEADLINE_DOCUMENT', 120)),
+}
+
+# Hedged requests for the idempotent calls (description, gloss, plan): when
+# an attempt is slower than the HEDGE_PERCENTILE latency of the last calls,
+# a second attempt is sent and the first answer wins. Endpoints need
+# HEDGE_MIN_SAMPLES observed calls before they are hedged.
+HEDGE_ENDPOINTS = (
+    ('image_description', 'sign_language', 'visual_plan')
+    if os.getenv('HEDGE_REQUESTS', '0') == '1' else ()
+)
+HEDGE_PERCENTILE = float(os.getenv('HEDGE_PERCENTILE', 95))
+HEDGE_MIN_SAMPLES = int(os.getenv('HEDGE_MIN_SAMPLES', 20))
+HEDGE_MAX_WORKERS = int(os.getenv('HEDGE_MAX_WORKERS', 16))
+
+# Circuit breaker per upstream capability: a call failing or slower than
+# its BREAKER_SLOW_SECONDS entry counts as bad. Once BREAKER_FAILURE_RATE of
+# the last calls (at least BREAKER_MIN_CALLS) are bad, calls fail fast for
+# BREAKER_COOLDOWN seconds and pages serve simplified local results.
+BREAKER_SLOW_SECONDS = {
+    'vision': float(os.getenv('BREAKER_SLOW_VISION', 20)),
+    'text': float(os.getenv('BREAKER_SLOW_TEXT', 30)),
+    'speech': float(os.getenv('BREAKER_SLOW_SPEECH', 20)),
+    'image': float(os.getenv('BREAKER_SLOW_IMAGE', 60)),
+}
+BREAKER_MIN_CALLS = int(os.getenv('BREAKER_MIN_CALLS', 5))
+BREAKER_FAILURE_RATE = float(os.getenv('BREAKER_FAILURE_RATE', 0.5))
+BREAKER_COOLDOWN = float(os.getenv('BREAKER_COOLDOWN', 30))
+
+# Animated GIFs and multi-page images: a frame is described only if its
+# perceptual hash differs from the previous key frame's by more than
+# KEYFRAME_THRESHOLD of 64 bits. At most KEYFRAME_MAX key frames are kept,
+# sent KEYFRAME_BATCH per vision call, KEYFRAME_MAX_CONCURRENCY calls at once.
+KEYFRAME_THRESHOLD = int(os.getenv('KEYFRAME_THRESHOLD', 10))
+KEYFRAME_MAX = int(os.getenv('KEYFRAME_MAX', 12))
+KEYFRAME_BATCH = int(os.getenv('KEYFRAME_BATCH', 6))
+KEYFRAME_MAX_CONCURRENCY = int(os.getenv('KEYFRAME_MAX_CONCURRENCY', 2))
+
+# A still image whose difference hash is within PHASH_MAX_DISTANCE of 64 bits
+# of an already described image reuses that image's description and audio
+# (-1 disables this), provided their aspect ratios differ by at most
+# PHASH_ASPECT_TOLERANCE. Images with too little detail for the hash to tell
+# them apart are not indexed: a thumbnail grey-level deviation below
+# PHASH_MIN_CONTRAST, or fewer than PHASH_MIN_BITS set (or unset) hash bits.
+# The PHASH_INDEX_SIZE most recently used hashes are kept in memory.
+PHASH_MAX_DISTANCE = int(os.getenv('PHASH_MAX_DISTANCE', 6))
+PHASH_INDEX_SIZE = int(os.getenv('PHASH_INDEX_SIZE', 10000))
+PHASH_ASPECT_TOLERANCE = float(os.getenv('PHASH_ASPECT_TOLERANCE', 0.02))
+PHASH_MIN_CONTRAST = float(os.getenv('PHASH_MIN_CONTRAST', 12))
+PHASH_MIN_BITS = int(os.getenv('PHASH_MIN_BITS', 8))
+
+# Text inputs of these pipelines that equal a stored input after dropping
+# case, punctuation, spacing and a "-- " signature get that input's result.
+# Matching is exact on the normalized text, never by similarity, so changed
+# words or numbers are always converted anew.
+TEXT_NORMALIZED_PIPELINES = ['sign_language', 'visual_plan', 'document_chunk']
+
+# Admission control for the conversion endpoints (page, stream and API
+# routes share one limit): at most ADMISSION_LIMITS requests run at once
+# (0 disables the limit), ADMISSION_QUEUE_SIZE more wait up to
+# ADMISSION_MAX_WAIT seconds, the rest are answered 503 with Retry-After
+# (ADMISSION_RETRY_AFTER seconds until a hold time has been observed).
+ADMISSION_LIMITS = {
+    'image_to_audio': int(os.getenv('ADMISSION_IMAGE', 4)),
+    'text_to_visual': int(os.getenv('ADMISSION_VISUAL', 2)),
+    'text_to_sign': int(os.getenv('ADMISSION_SIGN', 8)),
+    'document_accessible': int(os.getenv('ADMISSION_DOCUMENT', 2)),
+}
+ADMISSION_QUEUE_SIZE = int(os.getenv('ADMISSION_QUEUE_SIZE', 8))
+ADMISSION_MAX_WAIT = float(os.getenv('ADMISSION_MAX_WAIT', 5))
+ADMISSION_RETRY_AFTER = int(os.getenv('ADMISSION_RETRY_AFTER', 5))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
@@ -1,10 +1,19 @@
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Literal
 
+from src.cache import JsonCache, sha256_text
+from src.config import MODEL_PREFERRED
+from src.routing import router
+from src.storage import ArtifactStore
+from src.text_segments import iter_stream_sentences, pack_segments
+
 from . import client_singleton
 
 client = client_singleton.client
 
+AudioFormat = Literal["mp3", "opus", "aac"]
+
 VoiceName = Literal[
     "alloy",
     "coral",
@@ -23,26 +32,129 @@ VoiceName = Literal[
 class AudioProducerAgent:
     """
     Converts text descriptions into spoken audio using the OpenAI TTS models.
+
+    Texts longer than `max_segment_chars` are split at sentence boundaries and
+    the segments are synthesized concurrently (at most `max_concurrency` at a
+    time), then joined in order into one file.
+
+    `audio_format` is passed through to the TTS call; Opus gives the smallest
+    files for speech. All offered formats can be joined segment by segment.
+
+    Without a `model`, each segment is routed to a TTS model by observed
+    latency (see src/routing.py).
     """
 
-    def __init__(self, model: str = "gpt-4o-mini-tts", voice: VoiceName = "alloy", output_dir: str = "outputs/audio"):
+    def __init__(
+        self,
+        model: str = None,
+        voice: VoiceName = "alloy",
+        output_dir: str = "outputs/audio",
+        audio_format: AudioFormat = "mp3",
+        max_segment_chars: int = 600,
+        max_concurrency: int = 4,
+    ):
         self.model = model
         self.voice = voice
+        self.audio_format = audio_format
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.max_segment_chars = max_segment_chars
+        self.max_concurrency = max_concurrency
+        self.store = ArtifactStore()
+        self.speech_cache = JsonCache("speech")
 
-    def synthesize(self, text: str, basename: str = "description", file_ext: str = "mp3"):
-        """
-        Generate an audio file from text and return the path.
-        """
-        output_path = self.output_dir / f"{basename}.{file_ext}"
-
-        response = client.audio.speech.create(
+    def _speech_bytes(self, text: str, audio_format: AudioFormat) -> bytes:
+        response = router.call(
+            "speech", "speech", len(text), client.audio.speech.create,
             model=self.model,
             voice=self.voice,
             input=text,
+            response_format=audio_format,
         )
+        return response.read()
+
+    def iter_segments(self, text: str, audio_format: AudioFormat = None):
+        """
+        Yields audio bytes for each sentence-bounded segment, in order,
+        as soon as that segment and all earlier ones are ready.
+        """
+        audio_format = audio_format or self.audio_format
+        segments = pack_segments(text, self.max_segment_chars) or [text]
+        workers = min(self.max_concurrency, len(segments))
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(self._speech_bytes, segment, audio_format) for segment in segments]
+            try:
+                for future in futures:
+                    yield future.result()
+            finally:
+                for future in futures:
+                    future.cancel()
 
-        response.stream_to_file(output_path)
+    def synthesize(self, text: str, audio_format: AudioFormat = None, on_first_segment=None):
+        """
+        Generate an audio file from text and return the path.
+        The file is named after its content hash, so identical audio is stored once,
+        and text already synthesized with the same voice and format is reused.
+
+        For long texts, `on_first_segment` is called with the path of the first
+        segment's audio as soon as it is written.
+        """
+        audio_format = audio_format or self.audio_format
+        key = sha256_text(f"{self.model or MODEL_PREFERRED['speech']}|{self.voice}|{audio_format}|{text}")
+        cached = self.store.find(key) or self.speech_cache.get(key)
+        if cached and self.store.exists(cached):
+            self.store.touch(Path(cached))
+            return Path(cached)
 
+        if len(text) <= self.max_segment_chars:
+            audio = self._speech_bytes(text, audio_format)
+            output_path = self.store.save_bytes(audio, self.output_dir, audio_format, input_hash=key)
+        else:
+            parts = []
+            for audio in self.iter_segments(text, audio_format):
+                if not parts and on_first_segment is not None:
+                    on_first_segment(self.store.save_bytes(audio, self.output_dir, audio_format))
+                parts.append(audio)
+            output_path = self.store.save_bytes(b"".join(parts), self.output_dir, audio_format, input_hash=key)
+
+        self.speech_cache.set(key, str(output_path))
         return output_path
+
+    def synthesize_stream(self, pieces, audio_format: AudioFormat = None, on_first_segment=None):
+        """
+        Synthesizes text while it is still being generated (e.g. from
+        VisualDescriberAgent.stream_description): each sentence goes to TTS
+        as soon as it is complete, and the segments are joined in order.
+        Returns (full text, audio path); the audio is cached like synthesize's.
+
+        `on_first_segment` is called with the path of the first sentence's
+        audio as soon as it is written.
+        """
+        audio_format = audio_format or self.audio_format
+        received = []
+
+        def collected():
+            for piece in pieces:
+                received.append(piece)
+                yield piece
+
+        def first_segment(sentence):
+            audio = self._speech_bytes(sentence, audio_format)
+            on_first_segment(self.store.save_bytes(audio, self.output_dir, audio_format))
+            return audio
+
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as pool:
+            futures = []
+            for sentence in iter_stream_sentences(collected()):
+                if not futures and on_first_segment is not None:
+                    futures.append(pool.submit(first_segment, sentence))
+                else:
+                    futures.append(pool.submit(self._speech_bytes, sentence, audio_format))
+            audio = b"".join(future.result() for future in futures)
+
+        text = "".join(received)
+        key = sha256_text(f"{self.model or MODEL_PREFERRED['speech']}|{self.voice}|{audio_format}|{text}")
+        output_path = self.store.save_bytes(audio, self.output_dir, audio_format, input_hash=key)
+        self.speech_cache.set(key, str(output_path))
+        return text, output_path
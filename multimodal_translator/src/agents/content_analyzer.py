@@ -1,5 +1,8 @@
 from typing import Literal, Dict, Any
 
+from src.profiling import stage
+from src.routing import router
+
 from . import client_singleton
 
 client = client_singleton.client
@@ -12,7 +15,7 @@ class ContentAnalyzerAgent:
     Decides what kind of content we have and what transformations are appropriate.
     """
 
-    def __init__(self, model: str = "gpt-4o-mini"):
+    def __init__(self, model: str = None):
         self.model = model
 
     def analyze(self, user_goal: str, has_image: bool = False, has_text: bool = False):
@@ -44,7 +47,8 @@ class ContentAnalyzerAgent:
         - notes: short explanation
         """
 
-        response = client.responses.create(
+        response = router.call(
+            "content_analysis", "review", len(description), client.responses.create,
             model=self.model,
             input=[
                 {"role": "system", "content": system_prompt},
@@ -55,7 +59,8 @@ class ContentAnalyzerAgent:
 
         import json
 
-        data = json.loads(response.output_text)
+        with stage("parse"):
+            data = json.loads(response.output_text)
 
         ct: ContentType = data.get("content_type", "unknown")
         rec = data.get("recommended_pipelines", [])
@@ -1,5 +1,8 @@
 from typing import Dict
 
+from src.profiling import stage
+from src.routing import router
+
 from . import client_singleton
 
 client = client_singleton.client
@@ -10,7 +13,7 @@ class QualityCheckerAgent:
     Gives a quick accessibility/readability review for outputs.
     """
 
-    def __init__(self, model: str = "gpt-4o-mini"):
+    def __init__(self, model: str = None):
         self.model = model
 
     def review_description(self, description: str):
@@ -34,7 +37,8 @@ class QualityCheckerAgent:
         - suggestions
         """
 
-        response = client.responses.create(
+        response = router.call(
+            "quality_review", "review", len(description), client.responses.create,
             model=self.model,
             input=[
                 {"role": "system", "content": system_prompt},
@@ -45,7 +49,8 @@ class QualityCheckerAgent:
 
         import json
 
-        data = json.loads(response.output_text)
+        with stage("parse"):
+            data = json.loads(response.output_text)
         return {
             "readability_level": data.get("readability_level", ""),
             "issues": data.get("issues", ""),
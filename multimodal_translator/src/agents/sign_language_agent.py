@@ -1,5 +1,12 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import Dict
 
+from src.cache import JsonCache, sha256_text
+from src.config import MODEL_PREFERRED
+from src.profiling import stage
+from src.routing import router
+from src.text_segments import normalize_phrase, split_sentences
+
 from . import client_singleton
 
 client = client_singleton.client
@@ -11,10 +18,19 @@ class SignLanguageAgent:
 
     This is a *linguistic* translator, not a video generator.
     Output can later be fed into avatar tools.
+
+    In segmented mode the text is translated sentence by sentence; sentences
+    already seen (after normalization) come from a persistent phrase memo in
+    outputs/cache and only the rest are sent upstream, concurrently.
+
+    Without a `model`, each call is routed to a text model tier by observed
+    latency (see src/routing.py).
     """
 
-    def __init__(self, model: str = "gpt-4.1-mini"):
+    def __init__(self, model: str = None, max_concurrency: int = 4):
         self.model = model
+        self.max_concurrency = max_concurrency
+        self.phrase_memo = JsonCache("sign_phrases")
 
     def text_to_sign_description(self, text: str):
         """
@@ -40,7 +56,8 @@ class SignLanguageAgent:
         - body_and_face_notes
         """
 
-        response = client.responses.create(
+        response = router.call(
+            "sign_language", "text", len(text), client.responses.create,
             model=self.model,
             input=[
                 {"role": "system", "content": system_prompt},
@@ -52,10 +69,61 @@ class SignLanguageAgent:
         raw = response.output[0].content[0].text
 
         import json
-        data = json.loads(raw)
+        with stage("parse"):
+            data = json.loads(raw)
 
         return {
             "simplified_english": data.get("simplified_english", text),
             "asl_gloss": data.get("asl_gloss", ""),
             "body_and_face_notes": data.get("body_and_face_notes", ""),
         }
+
+
+    def iter_segments(self, text: str):
+        """
+        Yields (index, total, result, cached) per sentence as soon as each
+        result is available; memo hits come first, then misses as they finish.
+        """
+        sentences = split_sentences(text) or [text]
+        total = len(sentences)
+        futures = {}
+        submitted = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as pool:
+            for index, sentence in enumerate(sentences):
+                key = sha256_text(f"{self.model or MODEL_PREFERRED['text']}|{normalize_phrase(sentence)}")
+                if key in submitted:
+                    futures[submitted[key]][1].append(index)
+                    continue
+                cached = self.phrase_memo.get(key)
+                if cached is not None:
+                    yield index, total, cached, True
+                    continue
+                future = pool.submit(self.text_to_sign_description, sentence)
+                submitted[key] = future
+                futures[future] = (key, [index])
+
+            for future in as_completed(futures):
+                key, indices = futures[future]
+                data = future.result()
+                self.phrase_memo.set(key, data)
+                for index in indices:
+                    yield index, total, data, False
+
+    def text_to_sign_segmented(self, text: str, on_segment=None):
+        """
+        Same result shape as text_to_sign_description, assembled in sentence
+        order from per-sentence translations. `on_segment(index, total, result,
+        cached)` is called as each sentence completes.
+        """
+        parts = {}
+        for index, total, data, cached in self.iter_segments(text):
+            parts[index] = data
+            if on_segment is not None:
+                on_segment(index, total, data, cached)
+
+        ordered = [parts[i] for i in sorted(parts)]
+        return {
+            key: " ".join(p[key] for p in ordered if p.get(key))
+            for key in ("simplified_english", "asl_gloss", "body_and_face_notes")
+        }
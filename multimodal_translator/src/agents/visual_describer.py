@@ -1,7 +1,17 @@
 import base64
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Literal
 
+from src.cache import JsonCache, sha256_file
+from src.config import KEYFRAME_BATCH, KEYFRAME_MAX, KEYFRAME_MAX_CONCURRENCY, KEYFRAME_THRESHOLD
+from src.image_index import image_index
+from src.keyframes import frame_count, frame_data_urls, key_frame_indices
+from src.profiling import stage, timed
+from src.routing import router
+
 from . import client_singleton
 
 DetailLevel = Literal["brief", "standard", "detailed"]
@@ -18,24 +28,146 @@ def _encode_image_as_data_url(image_path: str):
         raise FileNotFoundError(f"Image not found: {image_path}")
 
     mime = "image/png" if path.suffix.lower() in {".png"} else "image/jpeg"
-    data = path.read_bytes()
-    b64 = base64.b64encode(data).decode("utf-8")
+    with stage("encode"):
+        data = path.read_bytes()
+        b64 = base64.b64encode(data).decode("utf-8")
     return f"data:{mime};base64,{b64}"
 
 
+def _description_input(data_url: str, detail_level: DetailLevel):
+    prompt = f"""
+    You are an accessibility assistant generating image descriptions for blind and low-vision users.
+
+    Follow these principles:
+    - Be accurate, concise, and objective.
+    - Mention only what is important for understanding the image.
+    - Avoid guessing about things that aren't clear.
+
+    Detail level required: {detail_level.upper()}.
+
+    Return ONLY the description text, no headings or bullets.
+    """
+    return [
+        {
+            "role": "user",
+            "content": [
+                {"type": "input_text", "text": prompt},
+                {
+                    "type": "input_image",
+                    "image_url": data_url,
+                },
+            ],
+        }
+    ]
+
+
 class VisualDescriberAgent:
     """
     Generates accessibility-friendly image descriptions at multiple detail levels,
     following W3C WAI guidance (concise, relevant, no over-explaining). :contentReference[oaicite:3]{index=3}
+
+    Without a `model`, each call is routed to a vision model tier by detail
+    level and observed latency (see src/routing.py).
     """
 
-    def __init__(self, model: str = "gpt-4o-mini"):
+    def __init__(self, model: str = None):
         self.model = model
+        self.levels_cache = JsonCache("description_levels")
+        self.description_cache = JsonCache("descriptions")
+
+    def describe_image(self, image_path: str, detail_level: DetailLevel = "standard", all_levels: bool = False):
+        """
+        Descriptions are cached by image; a visually identical copy (see
+        src/image_index.py) counts as the same image. With `all_levels`,
+        every detail level is fetched in one call and cached, so asking for
+        another level later needs no vision call. Animated GIFs and
+        multi-page images are narrated frame by frame at the requested level
+        (see describe_sequence).
+        """
+        if frame_count(image_path) > 1:
+            return self.describe_sequence(image_path, detail_level)
+        if all_levels:
+            return self.describe_all_levels(image_path)[detail_level]
+
+        image_hash, value, cached = self._cached_description(image_path, detail_level)
+        if cached is not None:
+            return cached
+
+        description = self._describe_data_url(_encode_image_as_data_url(image_path), detail_level)
+        self._store_description(image_hash, value, detail_level, description)
+        return description
+
+    def _describe_data_url(self, data_url: str, detail_level: DetailLevel):
+        response = router.call(
+            "image_description", "vision", len(data_url), client.responses.create,
+            detail_level=detail_level,
+            model=self.model,
+            input=_description_input(data_url, detail_level),
+        )
+        return response.output_text
+
+    def _cached_description(self, image_path: str, detail_level: DetailLevel):
+        """
+        Returns (cache key hash, perceptual hash to index, cached description or None).
+        """
+        image_hash, value = image_index.resolve(image_path, sha256_file(image_path))
+        cached = (
+            self.levels_cache.get(image_hash, {}).get(detail_level)
+            or self.description_cache.get(f"{image_hash}|{detail_level}")
+        )
+        return image_hash, value, cached
+
+    def _store_description(self, image_hash: str, value, detail_level: DetailLevel, description: str):
+        self.description_cache.set(f"{image_hash}|{detail_level}", description)
+        if value is not None:
+            image_index.add(value, image_hash)
+
+    def stream_description(self, image_path: str, detail_level: DetailLevel = "standard"):
+        """
+        Yields the description in pieces as it is generated, for starting
+        speech before it is complete (see AudioProducerAgent.synthesize_stream).
+        Cached descriptions and narrated multi-frame images come in one piece.
+        """
+        if frame_count(image_path) > 1:
+            yield self.describe_sequence(image_path, detail_level)
+            return
+        image_hash, value, cached = self._cached_description(image_path, detail_level)
+        if cached is not None:
+            yield cached
+            return
 
-    def describe_image(self, image_path: str, detail_level: DetailLevel = "standard"):
         data_url = _encode_image_as_data_url(image_path)
+        model = self.model or router.choose("image_description", "vision", len(data_url), detail_level)
+        started = time.monotonic()
+        with stage("request"):
+            stream = client.responses.create(
+                model=model,
+                input=_description_input(data_url, detail_level),
+                stream=True,
+            )
+        pieces = []
+        # "request" covers opening the stream, "stream" reading it.
+        for event in timed("stream", stream):
+            if event.type == "response.output_text.delta":
+                pieces.append(event.delta)
+                yield event.delta
+        router.observe(model, len(data_url), time.monotonic() - started)
+        self._store_description(image_hash, value, detail_level, "".join(pieces))
 
-        prompt = f"""
+    def describe_all_levels(self, image_path: str):
+        """
+        Returns {"brief", "standard", "detailed"} descriptions from one vision
+        call, cached in outputs/cache by the image's SHA-256 (or that of a
+        visually identical image described before).
+        """
+        image_hash, value = image_index.resolve(image_path, sha256_file(image_path))
+        cached = self.levels_cache.get(image_hash)
+        if cached is not None:
+            return cached
+
+        data_url = _encode_image_as_data_url(image_path)
+
+        prompt = """
         You are an accessibility assistant generating image descriptions for blind and low-vision users.
 
         Follow these principles:
@@ -43,12 +175,18 @@ class VisualDescriberAgent:
         - Mention only what is important for understanding the image.
         - Avoid guessing about things that aren't clear.
 
-        Detail level required: {detail_level.upper()}.
+        Write the description at three detail levels:
+        brief is one short sentence, standard is two to four sentences,
+        detailed is a thorough paragraph. No headings or bullets.
 
-        Return ONLY the description text, no headings or bullets.
+        Return a json object with:
+        - brief
+        - standard
+        - detailed
         """
 
-        response = client.responses.create(
+        response = router.call(
+            "image_description", "vision", len(data_url), client.responses.create,
             model=self.model,
             input=[
                 {
@@ -62,5 +200,85 @@ class VisualDescriberAgent:
                     ],
                 }
             ],
+            text={"format": {"type": "json_object"}},
+        )
+
+        with stage("parse"):
+            data = json.loads(response.output_text)
+        standard = data.get("standard", "")
+        levels = {
+            "brief": data.get("brief", standard),
+            "standard": standard,
+            "detailed": data.get("detailed", standard),
+        }
+        self.levels_cache.set(image_hash, levels)
+        if value is not None:
+            image_index.add(value, image_hash)
+        return levels
+
+    def _describe_frames(self, data_urls, first: int, total: int, detail_level: DetailLevel):
+        prompt = f"""
+        You are an accessibility assistant generating image descriptions for blind and low-vision users.
+
+        The images are key frames {first} to {first + len(data_urls) - 1} of {total},
+        in order, from an animation or a multi-page image.
+        Describe each frame, focusing on what changed since the previous one.
+
+        Follow these principles:
+        - Be accurate, concise, and objective.
+        - Mention only what is important for understanding the image.
+        - Avoid guessing about things that aren't clear.
+
+        Detail level required: {detail_level.upper()}.
+
+        Return a json object with:
+        - frames: list with one description per image, in order
+        """
+
+        content = [{"type": "input_text", "text": prompt}]
+        content += [{"type": "input_image", "image_url": url} for url in data_urls]
+        response = router.call(
+            "image_description", "vision", sum(len(url) for url in data_urls), client.responses.create,
+            detail_level=detail_level,
+            model=self.model,
+            input=[{"role": "user", "content": content}],
+            text={"format": {"type": "json_object"}},
+        )
+
+        with stage("parse"):
+            frames = json.loads(response.output_text).get("frames") or []
+        return [str(f) for f in frames[:len(data_urls)]]
+
+    def describe_sequence(self, image_path: str, detail_level: DetailLevel = "standard"):
+        """
+        Narrates an animated GIF or multi-page image. Only key frames, i.e.
+        frames whose perceptual hash differs from the previous key frame's
+        by more than KEYFRAME_THRESHOLD bits, are described, KEYFRAME_BATCH
+        per vision call, so the number of calls follows the visual changes
+        rather than the frame count.
+        """
+        if not Path(image_path).exists():
+            raise FileNotFoundError(f"Image not found: {image_path}")
+
+        indices, total = key_frame_indices(image_path, KEYFRAME_THRESHOLD, KEYFRAME_MAX)
+        data_urls = frame_data_urls(image_path, indices)
+        if len(data_urls) == 1:
+            return self._describe_data_url(data_urls[0], detail_level)
+
+        def describe_batch(start):
+            batch = data_urls[start:start + KEYFRAME_BATCH]
+            descriptions = self._describe_frames(batch, start + 1, len(data_urls), detail_level)
+            if len(descriptions) != len(batch):
+                # Fewer descriptions than frames cannot be matched to frames
+                # reliably, so describe each frame of the batch on its own.
+                descriptions = [self._describe_data_url(url, detail_level) for url in batch]
+            return descriptions
+
+        with ThreadPoolExecutor(max_workers=KEYFRAME_MAX_CONCURRENCY) as pool:
+            results = pool.map(describe_batch, range(0, len(data_urls), KEYFRAME_BATCH))
+            descriptions = [d for batch in results for d in batch]
+
+        return "\n".join(
+            f"Frame {index + 1} of {total}: {description}"
+            for index, description in zip(indices, descriptions)
         )
-        return response.output_text
@@ -2,9 +2,11 @@ from pathlib import Path
 from typing import Dict, Optional
 
 import base64
-from io import BytesIO
 
-from PIL import Image
+from src.cache import sha256_text
+from src.profiling import stage
+from src.routing import router
+from src.storage import ArtifactStore
 
 from . import client_singleton
 
@@ -14,13 +16,17 @@ client = client_singleton.client
 class VisualSimplifierAgent:
     """
     Converts complex text into a diagram concept plus an optional generated image.
+
+    Without a `text_model`, planning calls are routed to a text model tier by
+    observed latency (see src/routing.py).
     """
 
-    def __init__(self, text_model: str = "gpt-4.1-mini", image_model: str = "gpt-image-1", output_dir: str = "outputs/visuals"):
+    def __init__(self, text_model: str = None, image_model: str = "gpt-image-1", output_dir: str = "outputs/visuals"):
         self.text_model = text_model
         self.image_model = image_model
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.store = ArtifactStore()
 
     def plan_diagram(self, text: str):
         """
@@ -47,7 +53,8 @@ class VisualSimplifierAgent:
         - simple_explanation
         """
 
-        response = client.responses.create(
+        response = router.call(
+            "visual_plan", "text", len(text), client.responses.create,
             model=self.text_model,
             input=[
                 {"role": "system", "content": system_prompt},
@@ -59,7 +66,8 @@ class VisualSimplifierAgent:
         raw = response.output_text
         import json
 
-        data = json.loads(raw)
+        with stage("parse"):
+            data = json.loads(raw)
         return {
             "short_title": data.get("short_title", "Visual Summary"),
             "diagram_description": data.get("diagram_description", ""),
@@ -67,24 +75,28 @@ class VisualSimplifierAgent:
             "simple_explanation": data.get("simple_explanation", ""),
         }
 
-    def generate_diagram_image(self, prompt: str, filename: str = "diagram.png", size: str = "1024x1024"):
+    def generate_diagram_image(self, prompt: str, size: str = "1024x1024"):
         """
         Uses GPT Image to generate a simple diagram / infographic. :contentReference[oaicite:9]{index=9}
+        The PNG is stored under its content hash in the output directory.
+        With the archive backend, a diagram already generated for the same
+        prompt, size and model is returned without a new request.
         """
-        img_path = self.output_dir / filename
-
-        result = client.images.generate(
-            model=self.image_model,
-            prompt=prompt,
-            size=size,
-            quality="low",
-            output_format="png",
-        )
-
-        b64 = result.data[0].b64_json
-        image_bytes = base64.b64decode(b64)
-
-        image = Image.open(BytesIO(image_bytes))
-        image.save(img_path, format="PNG")
-
-        return img_path
+        key = sha256_text(f"{self.image_model}|{size}|{prompt}")
+        cached = self.store.find(key)
+        if cached is not None:
+            return cached
+
+        with stage("request"):
+            result = client.images.generate(
+                model=self.image_model,
+                prompt=prompt,
+                size=size,
+                quality="low",
+                output_format="png",
+            )
+
+        with stage("parse"):
+            image_bytes = base64.b64decode(result.data[0].b64_json)
+
+        return self.store.save_bytes(image_bytes, self.output_dir, "png", input_hash=key)
@@ -0,0 +1,157 @@
+import hashlib
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from src.profiling import stage
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS artifacts (
+    digest TEXT PRIMARY KEY,
+    ext TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    data BLOB NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS artifacts_accessed ON artifacts (accessed_at);
+CREATE TABLE IF NOT EXISTS results (
+    input_hash TEXT PRIMARY KEY,
+    digest TEXT NOT NULL REFERENCES artifacts (digest) ON DELETE CASCADE,
+    created_at REAL NOT NULL
+);
+"""
+
+
+class ResultArchive:
+    """
+    Single-file archive of generated artifacts: a SQLite database holding
+    each artifact as a blob under the SHA-256 of its bytes, plus an index
+    from input hash (what the artifact was generated from) to artifact.
+
+    Artifacts are referred to by a path inside the archive,
+    `<archive>/<digest>.<ext>` with the archive's absolute path, so callers
+    can keep treating results as paths, relative or resolved. These paths
+    are not files; `python -m src.demo archive --extract` copies one out.
+    Reads go through SQLite's memory-mapped I/O (`mmap_bytes` of the file
+    are mapped). Each thread gets its own connection; the database is in
+    WAL mode so concurrent CLI runs can read while one writes.
+    """
+
+    def __init__(self, path, mmap_bytes: int = 256 * 1024 * 1024):
+        self.path = Path(path).resolve()
+        self.mmap_bytes = mmap_bytes
+        self._local = threading.local()
+
+    def _db(self):
+        db = getattr(self._local, "db", None)
+        if db is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA foreign_keys=ON")
+            db.execute(f"PRAGMA mmap_size={int(self.mmap_bytes)}")
+            db.executescript(_SCHEMA)
+            self._local.db = db
+        return db
+
+    def ref(self, digest: str, ext: str) -> Path:
+        return self.path / f"{digest}.{ext}"
+
+    def owns(self, path) -> bool:
+        return Path(path).resolve().parent == self.path
+
+    def put(self, data: bytes, ext: str, input_hash: str = None) -> Path:
+        """
+        Stores `data` (once per content) and, with `input_hash`, records it
+        as the result for that input. Returns the artifact's reference.
+        """
+        digest = hashlib.sha256(data).hexdigest()
+        ext = ext.lstrip(".")
+        now = time.time()
+        with stage("write"):
+            db = self._db()
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                db.execute(
+                    "INSERT INTO artifacts (digest, ext, size, data, accessed_at) VALUES (?, ?, ?, ?, ?) "
+                    "ON CONFLICT (digest) DO UPDATE SET accessed_at = excluded.accessed_at",
+                    (digest, ext, len(data), data, now),
+                )
+                if input_hash is not None:
+                    db.execute(
+                        "INSERT OR REPLACE INTO results (input_hash, digest, created_at) VALUES (?, ?, ?)",
+                        (input_hash, digest, now),
+                    )
+                db.execute("COMMIT")
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+        return self.ref(digest, ext)
+
+    def lookup(self, input_hash: str):
+        """
+        Returns the reference of the artifact stored for `input_hash`, or None.
+        """
+        row = self._db().execute(
+            "SELECT a.digest, a.ext FROM results r JOIN artifacts a ON a.digest = r.digest "
+            "WHERE r.input_hash = ?",
+            (input_hash,),
+        ).fetchone()
+        if row is None:
+            return None
+        ref = self.ref(*row)
+        self.touch(ref)
+        return ref
+
+    def exists(self, path) -> bool:
+        return self._db().execute(
+            "SELECT 1 FROM artifacts WHERE digest = ?", (Path(path).stem,)
+        ).fetchone() is not None
+
+    def touch(self, path):
+        self._db().execute(
+            "UPDATE artifacts SET accessed_at = ? WHERE digest = ?", (time.time(), Path(path).stem)
+        )
+
+    def read(self, path) -> bytes:
+        row = self._db().execute(
+            "SELECT data FROM artifacts WHERE digest = ?", (Path(path).stem,)
+        ).fetchone()
+        if row is None:
+            raise FileNotFoundError(f"Not in archive: {path}")
+        return row[0]
+
+    def usage(self) -> int:
+        return self._db().execute("SELECT COALESCE(SUM(size), 0) FROM artifacts").fetchone()[0]
+
+    def stats(self):
+        db = self._db()
+        artifacts, size = db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM artifacts").fetchone()
+        (results,) = db.execute("SELECT COUNT(*) FROM results").fetchone()
+        return {
+            "path": str(self.path),
+            "artifacts": artifacts,
+            "artifact_bytes": size,
+            "results": results,
+            "file_bytes": self.path.stat().st_size if self.path.exists() else 0,
+        }
+
+    def collect_garbage(self, quota_bytes: int):
+        """
+        Deletes least recently used artifacts (and their input index
+        entries) until the stored bytes fit in the quota. Freed pages are
+        reused by later writes. Returns (evicted references, bytes in use).
+        """
+        db = self._db()
+        total = self.usage()
+        evicted = []
+        for digest, ext, size in db.execute(
+            "SELECT digest, ext, size FROM artifacts ORDER BY accessed_at"
+        ).fetchall():
+            if total <= quota_bytes:
+                break
+            db.execute("DELETE FROM artifacts WHERE digest = ?", (digest,))
+            evicted.append(self.ref(digest, ext))
+            total -= size
+        return evicted, total
@@ -0,0 +1,155 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from src.config import CACHE_MAX_ENTRIES
+from src.profiling import stage
+
+CACHE_DIR = Path("outputs/cache")
+# Eviction runs once per this many writes, not on every write.
+_EVICT_EVERY = 100
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed_at);
+"""
+
+
+def sha256_file(path) -> str:
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+def sha256_text(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class JsonCache:
+    """
+    Small persistent key/value cache of JSON values, stored as one SQLite
+    file per cache in outputs/cache (`<name>.sqlite3`).
+
+    Each write updates only its own row, so concurrent CLI runs merge their
+    entries instead of overwriting each other's, and the cost of a write
+    does not grow with the cache. At most `max_entries` entries are kept;
+    the least recently used are evicted. Entries of a `<name>.json` file
+    left by earlier versions are imported on first use.
+    """
+
+    def __init__(self, name: str, cache_dir=CACHE_DIR, max_entries: int = CACHE_MAX_ENTRIES):
+        self.path = Path(cache_dir) / f"{name}.sqlite3"
+        self.legacy_path = Path(cache_dir) / f"{name}.json"
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._writes = 0
+        self._lock = threading.Lock()
+
+    def _db(self):
+        db = getattr(self._local, "db", None)
+        if db is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.executescript(_SCHEMA)
+            self._local.db = db
+            with self._lock:
+                self._import_legacy(db)
+        return db
+
+    def _import_legacy(self, db):
+        try:
+            data = json.loads(self.legacy_path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, json.JSONDecodeError):
+            return
+        now = time.time()
+        db.executemany(
+            "INSERT OR IGNORE INTO entries (key, value, accessed_at) VALUES (?, ?, ?)",
+            [(key, json.dumps(value), now) for key, value in data.items()],
+        )
+        try:
+            self.legacy_path.rename(self.legacy_path.with_suffix(".json.imported"))
+        except FileNotFoundError:
+            pass  # imported by another run at the same time
+
+    def get(self, key: str, default=None):
+        db = self._db()
+        row = db.execute("SELECT value FROM entries WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return default
+        db.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (time.time(), key))
+        return json.loads(row[0])
+
+    def items(self):
+        """
+        Returns all (key, value) pairs, without marking them as used.
+        """
+        rows = self._db().execute("SELECT key, value FROM entries").fetchall()
+        return [(key, json.loads(value)) for key, value in rows]
+
+    def __len__(self):
+        return self._db().execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def set(self, key: str, value):
+        self.update({key: value})
+
+    def update(self, items: dict):
+        now = time.time()
+        with stage("write"):
+            db = self._db()
+            db.executemany(
+                "INSERT INTO entries (key, value, accessed_at) VALUES (?, ?, ?) "
+                "ON CONFLICT (key) DO UPDATE SET value = excluded.value, accessed_at = excluded.accessed_at",
+                [(key, json.dumps(value), now) for key, value in items.items()],
+            )
+            with self._lock:
+                self._writes += len(items)
+                evict = self._writes >= _EVICT_EVERY
+                if evict:
+                    self._writes = 0
+            if evict:
+                self.evict()
+
+    def merge(self, key: str, combine, default=None):
+        """
+        Atomically replaces the value with combine(stored value or
+        `default`) and returns the result, so concurrent runs updating the
+        same entry each see the other's writes.
+        """
+        with stage("write"):
+            db = self._db()
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                row = db.execute("SELECT value FROM entries WHERE key = ?", (key,)).fetchone()
+                value = combine(default if row is None else json.loads(row[0]))
+                db.execute(
+                    "INSERT INTO entries (key, value, accessed_at) VALUES (?, ?, ?) "
+                    "ON CONFLICT (key) DO UPDATE SET value = excluded.value, accessed_at = excluded.accessed_at",
+                    (key, json.dumps(value), time.time()),
+                )
+                db.execute("COMMIT")
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+        return value
+
+    def evict(self):
+        """
+        Deletes the least recently used entries beyond `max_entries`.
+        """
+        if self.max_entries is None:
+            return
+        self._db().execute(
+            "DELETE FROM entries WHERE key IN "
+            "(SELECT key FROM entries ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
@@ -11,6 +11,71 @@ PROJECT_ROOT = Path(__file__).resolve().parents[1]
 
 load_dotenv(dotenv_path=PROJECT_ROOT / ".env")
 
+# Size budget for outputs/audio and outputs/visuals; least recently used
+# artifacts are evicted by `python -m src.demo gc`.
+OUTPUTS_QUOTA_BYTES = int(os.getenv("OUTPUTS_QUOTA_BYTES", 256 * 1024 * 1024))
+
+# "files" writes each artifact to outputs/audio or outputs/visuals; "archive"
+# appends them to one SQLite file at ARCHIVE_PATH, indexed by input hash,
+# with up to ARCHIVE_MMAP_BYTES of it memory-mapped for reads.
+OUTPUTS_BACKEND = os.getenv("OUTPUTS_BACKEND", "files")
+ARCHIVE_PATH = os.getenv("ARCHIVE_PATH", "outputs/archive.sqlite3")
+ARCHIVE_MMAP_BYTES = int(os.getenv("ARCHIVE_MMAP_BYTES", 256 * 1024 * 1024))
+
+# Entries kept per cache in outputs/cache (descriptions, speech, sign
+# phrases, ...); the least recently used are evicted beyond this.
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", 20000))
+
+# Model routing for agents not pinned to a model: per capability, the models
+# to choose from (fastest first) and the preferred one. A "detailed" request
+# starts one tier up, a "brief" one tier down; when the observed latency
+# exceeds the endpoint's target (seconds) a faster tier is used instead.
+MODEL_TIERS = {
+    "vision": ["gpt-4.1-nano", "gpt-4o-mini", "gpt-4o"],
+    "text": ["gpt-4.1-nano", "gpt-4.1-mini", "gpt-4.1"],
+    "review": ["gpt-4.1-nano", "gpt-4o-mini", "gpt-4.1-mini"],
+    "speech": ["tts-1", "gpt-4o-mini-tts"],
+}
+MODEL_PREFERRED = {
+    "vision": os.getenv("MODEL_VISION", "gpt-4o-mini"),
+    "text": os.getenv("MODEL_TEXT", "gpt-4.1-mini"),
+    "review": os.getenv("MODEL_REVIEW", "gpt-4o-mini"),
+    "speech": os.getenv("MODEL_SPEECH", "gpt-4o-mini-tts"),
+}
+LATENCY_TARGETS = {
+    "image_description": float(os.getenv("LATENCY_TARGET_IMAGE", 6)),
+    "quality_review": float(os.getenv("LATENCY_TARGET_REVIEW", 5)),
+    "content_analysis": float(os.getenv("LATENCY_TARGET_ANALYSIS", 5)),
+    "visual_plan": float(os.getenv("LATENCY_TARGET_VISUAL", 8)),
+    "sign_language": float(os.getenv("LATENCY_TARGET_SIGN", 5)),
+    "speech": float(os.getenv("LATENCY_TARGET_SPEECH", 4)),
+}
+ROUTING_STALE_SECONDS = float(os.getenv("ROUTING_STALE_SECONDS", 300))
+# How often routing observations are merged into outputs/cache (and at exit).
+ROUTING_FLUSH_SECONDS = float(os.getenv("ROUTING_FLUSH_SECONDS", 5))
+
+# Animated GIFs and multi-page images: a frame is described only if its
+# perceptual hash differs from the previous key frame's by more than
+# KEYFRAME_THRESHOLD of 64 bits. At most KEYFRAME_MAX key frames are kept,
+# sent KEYFRAME_BATCH per vision call, KEYFRAME_MAX_CONCURRENCY calls at once.
+KEYFRAME_THRESHOLD = int(os.getenv("KEYFRAME_THRESHOLD", 10))
+KEYFRAME_MAX = int(os.getenv("KEYFRAME_MAX", 12))
+KEYFRAME_BATCH = int(os.getenv("KEYFRAME_BATCH", 6))
+KEYFRAME_MAX_CONCURRENCY = int(os.getenv("KEYFRAME_MAX_CONCURRENCY", 2))
+
+# A still image whose difference hash is within PHASH_MAX_DISTANCE of 64 bits
+# of an already described image reuses that image's descriptions (-1
+# disables this), provided their aspect ratios differ by at most
+# PHASH_ASPECT_TOLERANCE. Images with too little detail for the hash to tell
+# them apart are not indexed: a thumbnail grey-level deviation below
+# PHASH_MIN_CONTRAST, or fewer than PHASH_MIN_BITS set (or unset) hash bits.
+# At most PHASH_INDEX_SIZE hashes are kept, least recently used evicted first.
+PHASH_MAX_DISTANCE = int(os.getenv("PHASH_MAX_DISTANCE", 6))
+PHASH_INDEX_SIZE = int(os.getenv("PHASH_INDEX_SIZE", 10000))
+PHASH_ASPECT_TOLERANCE = float(os.getenv("PHASH_ASPECT_TOLERANCE", 0.02))
+PHASH_MIN_CONTRAST = float(os.getenv("PHASH_MIN_CONTRAST", 12))
+PHASH_MIN_BITS = int(os.getenv("PHASH_MIN_BITS", 8))
+
 
 # -------------------------------------------------------
 # 2. Create and return a shared OpenAI client
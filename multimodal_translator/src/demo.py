@@ -1,4 +1,12 @@
+import time
+
+# Measured for `--profile`: the agent imports also create the OpenAI client.
+_STARTED = time.perf_counter()
+
 import argparse
+import cProfile
+import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import textwrap
 
@@ -8,6 +16,25 @@ from src.agents.sign_language_agent import SignLanguageAgent
 from src.agents.visual_simplifier import VisualSimplifierAgent
 from src.agents.content_analyzer import ContentAnalyzerAgent
 from src.agents.quality_checker import QualityCheckerAgent
+from src import profiling
+from src.image_index import image_index
+from src.routing import router
+from src.storage import ArtifactStore
+from src.watcher import FolderWatcher
+
+_IMPORT_SECONDS = time.perf_counter() - _STARTED
+
+
+def _location(path) -> str:
+    """
+    Printable location of an artifact. With the archive backend it is a
+    path inside the archive file rather than a file of its own, so the
+    command extracting it is printed too.
+    """
+    archive = ArtifactStore().archive
+    if archive is not None and archive.owns(path):
+        return f"{path}\n  (stored in the archive; extract with: python -m src.demo archive --extract {path} --to FILE)"
+    return str(Path(path).resolve())
 
 
 def run_image_to_audio(args):
@@ -17,14 +44,27 @@ def run_image_to_audio(args):
     print(f"\n[Image -> Audio] Processing image: {img_path} (detail={detail})")
 
     visual_agent = VisualDescriberAgent()
-    audio_agent = AudioProducerAgent()
+    audio_agent = AudioProducerAgent(audio_format=args.audio_format)
     qc_agent = QualityCheckerAgent()
 
+    if args.pipelined:
+        run_image_to_audio_pipelined(img_path, detail, visual_agent, audio_agent, qc_agent)
+        return
+
     # 1) Image -> text description
-    description = visual_agent.describe_image(img_path, detail_level=detail)
+    description = visual_agent.describe_image(img_path, detail_level=detail, all_levels=args.all_levels)
     print("\n=== Image -> text description ===")
     print(textwrap.fill(description, width=80))
 
+    prefetch = None
+    if args.prefetch_audio:
+        # Synthesize the other levels while the review and main TTS run.
+        levels = visual_agent.describe_all_levels(img_path)
+        others = [levels[level] for level in levels if level != detail]
+        prefetch = ThreadPoolExecutor(max_workers=len(others))
+        for text in others:
+            prefetch.submit(audio_agent.synthesize, text)
+
     # 2) Quality review
     review = qc_agent.review_description(description)
     print("\n=== Quality review ===")
@@ -33,9 +73,39 @@ def run_image_to_audio(args):
     print(f"Suggestions       : {review['suggestions']}")
 
     # 3) Text -> speech
-    audio_path = audio_agent.synthesize(description, basename="image_description")
     print("\n=== Text -> speech ===")
-    print(f"\nAudio file saved at: {audio_path.resolve()}")
+    audio_path = audio_agent.synthesize(
+        description,
+        on_first_segment=lambda p: print(f"First audio segment ready: {_location(p)}"),
+    )
+    print(f"\nAudio file saved at: {_location(audio_path)}")
+
+    if prefetch is not None:
+        prefetch.shutdown(wait=True)
+        print("Audio for the other detail levels is cached in outputs/audio.")
+
+
+def run_image_to_audio_pipelined(img_path, detail, visual_agent, audio_agent, qc_agent):
+    # 1+3) Description streamed straight into speech, sentence by sentence
+    print("\n=== Image -> text description (streamed into speech) ===")
+
+    def shown(pieces):
+        for piece in pieces:
+            print(piece, end="", flush=True)
+            yield piece
+
+    description, audio_path = audio_agent.synthesize_stream(
+        shown(visual_agent.stream_description(img_path, detail_level=detail)),
+        on_first_segment=lambda p: print(f"\n[First audio segment ready: {_location(p)}]"),
+    )
+    print(f"\n\nAudio file saved at: {_location(audio_path)}")
+
+    # 2) Quality review, on the finished description
+    review = qc_agent.review_description(description)
+    print("\n=== Quality review ===")
+    print(f"Readability level : {review['readability_level']}")
+    print(f"Issues            : {review['issues']}")
+    print(f"Suggestions       : {review['suggestions']}")
 
 
 def run_text_to_sign(args):
@@ -44,7 +114,14 @@ def run_text_to_sign(args):
     print(textwrap.fill(text, width=80))
 
     sign_agent = SignLanguageAgent()
-    result = sign_agent.text_to_sign_description(text)
+    if args.segmented:
+        def show_segment(index, total, data, cached):
+            source = "memo" if cached else "translated"
+            print(f"\n[{index + 1}/{total}, {source}] {data['asl_gloss']}")
+
+        result = sign_agent.text_to_sign_segmented(text, on_segment=show_segment)
+    else:
+        result = sign_agent.text_to_sign_description(text)
 
     print("\n=== Simplified English ===")
     print(textwrap.fill(result["simplified_english"], width=80))
@@ -89,11 +166,8 @@ def run_text_to_visual(args):
 
     if args.generate_image:
         print("\nGenerating diagram image with GPT Image...")
-        img_path = visual_agent.generate_diagram_image(
-            prompt=plan["diagram_description"],
-            filename="diagram.png",
-        )
-        print(f"Diagram image saved at: {img_path.resolve()}")
+        img_path = visual_agent.generate_diagram_image(prompt=plan["diagram_description"])
+        print(f"Diagram image saved at: {_location(img_path)}")
 
 
 def run_analyzer_demo(args):
@@ -114,11 +188,86 @@ def run_analyzer_demo(args):
     print(f"Notes : {result['notes']}")
 
 
+def run_gc(args):
+    store = ArtifactStore()
+    if args.dry_run:
+        print(f"Outputs usage: {store.usage()} bytes (quota {store.quota_bytes})")
+        return
+
+    evicted, usage = store.collect_garbage(quota_bytes=args.quota)
+    for path in evicted:
+        print(f"evicted {path}")
+    print(f"Evicted {len(evicted)} files, {usage} bytes in use")
+
+
+def run_archive(args):
+    store = ArtifactStore(backend="archive")
+    if args.extract:
+        Path(args.to).write_bytes(store.read_bytes(args.extract))
+        print(f"Extracted {args.extract} to {args.to}")
+        return
+
+    stats = store.archive.stats()
+    print("\n=== Output archive ===")
+    print(f"File      : {stats['path']} ({stats['file_bytes']} bytes)")
+    print(f"Artifacts : {stats['artifacts']} ({stats['artifact_bytes']} bytes)")
+    print(f"Results   : {stats['results']} indexed by input hash")
+
+
+def run_watch(args):
+    watcher = FolderWatcher(
+        args.input_dir,
+        workers=args.workers,
+        poll_interval=args.poll_interval,
+        debounce=args.debounce,
+        detail_level=args.detail_level,
+        audio_format=args.audio_format,
+        text_mode=args.text_mode,
+        generate_image=args.generate_image,
+        gc_interval=args.gc_interval,
+    )
+    watcher.run_forever()
+
+
+def run_routing(args):
+    print("\n=== Observed latency (EWMA) ===")
+    for key, (seconds, _) in sorted(router.state.get("latency", {}).items()):
+        model, bucket = key.split("|")
+        print(f"{model:<18} size bucket {bucket:>2} : {seconds:6.2f}s")
+
+    print(f"\n=== Last {args.last} routing decisions ===")
+    for d in router.state.get("decisions", [])[-args.last:]:
+        print(f"{d['endpoint']:<18} -> {d['model']:<16} ({d['reason']})")
+
+
+def run_image_index(args):
+    stats = image_index.stats()
+    rate = f"{stats['match_rate']:.1%}" if stats["match_rate"] is not None else "n/a"
+    print("\n=== Near-duplicate image index ===")
+    print(f"Indexed images : {stats['indexed']} (max {stats['max_entries']})")
+    print(f"Max distance   : {stats['max_distance']} bits")
+    print(f"Lookups        : {stats['lookups']}")
+    print(f"Near hits      : {stats['near_hits']} ({rate})")
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="Multimodal Accessibility Translator demo",
         formatter_class=argparse.ArgumentDefaultsHelpFormatter,
     )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Report wall-clock time per stage (import, encode, request, stream, parse, write) on stderr",
+    )
+    parser.add_argument(
+        "--profile-format", choices=["table", "json"], default="table", help="Format of the --profile report"
+    )
+    parser.add_argument(
+        "--profile-dump",
+        metavar="FILE",
+        help="Also write a cProfile dump of the main thread to FILE (implies --profile)",
+    )
     subparsers = parser.add_subparsers(dest="command", required=True)
 
     # 1) Image -> Audio
@@ -132,6 +281,27 @@ def main():
         default="standard",
         help="Description detail level",
     )
+    p_img.add_argument(
+        "--audio-format",
+        choices=["mp3", "opus", "aac"],
+        default=os.getenv("TTS_AUDIO_FORMAT", "mp3"),
+        help="Speech output format (opus is smallest)",
+    )
+    p_img.add_argument(
+        "--all-levels",
+        action="store_true",
+        help="Fetch all detail levels in one call and cache them by image hash.",
+    )
+    p_img.add_argument(
+        "--prefetch-audio",
+        action="store_true",
+        help="With --all-levels, also synthesize audio for the other levels.",
+    )
+    p_img.add_argument(
+        "--pipelined",
+        action="store_true",
+        help="Stream the description into speech sentence by sentence (first audio sooner).",
+    )
     p_img.set_defaults(func=run_image_to_audio)
 
     # 2) Text -> Sign language description
@@ -139,6 +309,11 @@ def main():
         "text_to_sign", help="Convert text to an ASL-style sign description."
     )
     p_sign.add_argument("text", type=str, help="Input sentence")
+    p_sign.add_argument(
+        "--segmented",
+        action="store_true",
+        help="Translate sentence by sentence with a phrase memo, printing each as it completes.",
+    )
     p_sign.set_defaults(func=run_text_to_sign)
 
     # 3) Complex text -> visual
@@ -169,8 +344,88 @@ def main():
     p_ana.add_argument("--text", type=str, help="Optional text input")
     p_ana.set_defaults(func=run_analyzer_demo)
 
+    # 5) Evict old artifacts from outputs/
+    p_gc = subparsers.add_parser(
+        "gc", help="Evict least recently used files from outputs/ to fit the quota."
+    )
+    p_gc.add_argument("--quota", type=int, default=None, help="Quota in bytes for this run")
+    p_gc.add_argument("--dry-run", action="store_true", help="Only report current usage")
+    p_gc.set_defaults(func=run_gc)
+
+    # 6) Inspect model routing
+    p_route = subparsers.add_parser(
+        "routing", help="Show observed model latencies and recent routing decisions."
+    )
+    p_route.add_argument("--last", type=int, default=20, help="Number of decisions to show")
+    p_route.set_defaults(func=run_routing)
+
+    # 7) Inspect the near-duplicate image index
+    p_index = subparsers.add_parser(
+        "image_index", help="Show how often new images matched an already described one."
+    )
+    p_index.set_defaults(func=run_image_index)
+
+    # 8) Inspect or extract from the output archive
+    p_archive = subparsers.add_parser(
+        "archive", help="Show the output archive (OUTPUTS_BACKEND=archive) or extract an artifact from it."
+    )
+    p_archive.add_argument("--extract", metavar="PATH", help="Artifact path as printed by the other commands")
+    p_archive.add_argument("--to", metavar="FILE", help="Where to write the extracted artifact")
+    p_archive.set_defaults(func=run_archive)
+
+    # 9) Watch a folder and process new or changed files
+    p_watch = subparsers.add_parser(
+        "watch", help="Process new or changed images and text files dropped into a folder."
+    )
+    p_watch.add_argument("input_dir", type=str, help="Directory to watch")
+    p_watch.add_argument("--workers", type=int, default=4, help="Files processed concurrently")
+    p_watch.add_argument("--poll-interval", type=float, default=1.0, help="Seconds between scans")
+    p_watch.add_argument(
+        "--debounce", type=float, default=2.0,
+        help="Seconds a file must stay unchanged before it is processed",
+    )
+    p_watch.add_argument(
+        "--detail-level", choices=["brief", "standard", "detailed"], default="standard",
+        help="Description detail level for images",
+    )
+    p_watch.add_argument(
+        "--audio-format", choices=["mp3", "opus", "aac"],
+        default=os.getenv("TTS_AUDIO_FORMAT", "mp3"), help="Speech output format",
+    )
+    p_watch.add_argument(
+        "--text-mode", choices=["sign", "visual"], default="sign",
+        help="Convert text files to a sign gloss or a diagram plan",
+    )
+    p_watch.add_argument("--generate-image", action="store_true", help="With --text-mode visual, also draw the diagram")
+    p_watch.add_argument(
+        "--gc-interval", type=float, default=0,
+        help="Seconds between outputs/ garbage collection runs (0 disables)",
+    )
+    p_watch.set_defaults(func=run_watch)
+
     args = parser.parse_args()
-    args.func(args)
+    if args.command == "archive" and args.extract and not args.to:
+        parser.error("archive --extract needs --to")
+    if args.command == "image_to_audio" and args.pipelined and args.all_levels:
+        parser.error("image_to_audio --pipelined cannot be combined with --all-levels")
+    if args.command == "image_to_audio" and args.prefetch_audio and not args.all_levels:
+        parser.error("image_to_audio --prefetch-audio needs --all-levels")
+    if not (args.profile or args.profile_dump):
+        args.func(args)
+        return
+
+    profiling.enable()
+    profiling.record("import", _IMPORT_SECONDS)
+    profiler = cProfile.Profile() if args.profile_dump else None
+    try:
+        if profiler is not None:
+            profiler.enable()
+        args.func(args)
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(args.profile_dump)
+        profiling.report(time.perf_counter() - _STARTED, args.profile_format)
 
 
 if __name__ == "__main__":
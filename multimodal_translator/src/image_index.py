@@ -0,0 +1,101 @@
+from PIL import Image
+
+from src.cache import JsonCache
+from src.config import (
+    PHASH_ASPECT_TOLERANCE,
+    PHASH_INDEX_SIZE,
+    PHASH_MAX_DISTANCE,
+    PHASH_MIN_BITS,
+    PHASH_MIN_CONTRAST,
+)
+from src.perceptual_hash import bit_balance, contrast, dhash, hamming
+
+
+def fingerprint(image_path):
+    """
+    Returns (hash, width, height), or None if the image has too little
+    detail to be told apart from other images by its hash (flat or smooth
+    images, large plain areas).
+    """
+    with Image.open(image_path) as image:
+        value = dhash(image)
+        if contrast(image) < PHASH_MIN_CONTRAST or bit_balance(value) < PHASH_MIN_BITS:
+            return None
+        return (value, *image.size)
+
+
+def _same_shape(width, height, other_width, other_height, tolerance: float) -> bool:
+    return abs(width * other_height - other_width * height) <= tolerance * width * other_height
+
+
+class PerceptualIndex:
+    """
+    Maps perceptual hashes of described images to their SHA-256, so a
+    resized, recompressed or re-tagged copy of an image resolves to the
+    original and reuses its cached descriptions (and, through the same
+    text, its audio). Only images of the same aspect ratio (within
+    `aspect_tolerance`) match.
+
+    Kept in outputs/cache/image_index_entries.sqlite3, one row per image,
+    least recently used evicted beyond `max_entries`; lookup and match
+    counts are in image_index_counts.sqlite3. Concurrent runs add entries
+    and counts without overwriting each other's.
+    """
+
+    def __init__(self, max_distance: int, max_entries: int, aspect_tolerance: float):
+        self.max_distance = max_distance
+        self.max_entries = max_entries
+        self.aspect_tolerance = aspect_tolerance
+        self.entries = JsonCache("image_index_entries", max_entries=max_entries)
+        self.counts = JsonCache("image_index_counts", max_entries=None)
+
+    def resolve(self, image_path, image_hash: str):
+        """
+        Returns (cache key, fingerprint): the hash of an indexed image within
+        `max_distance` bits, or `image_hash` itself. The fingerprint is only
+        returned for an image new to the index, to `add` once described;
+        images too plain to fingerprint are never indexed.
+        """
+        if self.max_distance < 0 or self.entries.get(image_hash) is not None:
+            return image_hash, None
+
+        found = fingerprint(image_path)
+        if found is None:
+            return image_hash, None
+        value, width, height = found
+        best = min(
+            (
+                (hamming(value, int(hex_value, 16)), key)
+                for key, (hex_value, other_width, other_height) in self.entries.items()
+                if _same_shape(width, height, other_width, other_height, self.aspect_tolerance)
+            ),
+            default=None,
+        )
+        hit = best is not None and best[0] <= self.max_distance
+        if hit:
+            self.entries.get(best[1])   # marks it as recently used
+
+        self.counts.merge(
+            "counts",
+            lambda counts: {"lookups": counts["lookups"] + 1, "near_hits": counts["near_hits"] + hit},
+            {"lookups": 0, "near_hits": 0},
+        )
+        return (best[1], None) if hit else (image_hash, found)
+
+    def add(self, found, image_hash: str):
+        value, width, height = found
+        self.entries.set(image_hash, [f"{value:016x}", width, height])
+
+    def stats(self):
+        counts = self.counts.get("counts", {"lookups": 0, "near_hits": 0})
+        lookups = counts["lookups"]
+        return {
+            **counts,
+            "match_rate": round(counts["near_hits"] / lookups, 4) if lookups else None,
+            "indexed": len(self.entries),
+            "max_entries": self.max_entries,
+            "max_distance": self.max_distance,
+        }
+
+
+image_index = PerceptualIndex(PHASH_MAX_DISTANCE, PHASH_INDEX_SIZE, PHASH_ASPECT_TOLERANCE)
@@ -0,0 +1,98 @@
+import json
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+STAGES = ("import", "encode", "request", "stream", "parse", "write")
+
+_enabled = False
+_lock = threading.Lock()
+_stats = {}
+
+
+def enable():
+    global _enabled
+    _enabled = True
+
+
+def record(name: str, seconds: float):
+    with _lock:
+        calls, total, longest = _stats.get(name, (0, 0.0, 0.0))
+        _stats[name] = (calls + 1, total + seconds, max(longest, seconds))
+
+
+@contextmanager
+def stage(name: str):
+    """
+    Adds the wall-clock time spent in the block to stage `name` when
+    profiling is enabled (`--profile`); free otherwise. Stages running in
+    parallel threads are each counted in full.
+    """
+    if not _enabled:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - started)
+
+
+def timed(name: str, iterable):
+    """
+    Yields the items of `iterable` (a streamed response), adding the time
+    spent waiting for them to stage `name` as one call. Time the consumer
+    spends between items is not counted.
+    """
+    if not _enabled:
+        yield from iterable
+        return
+    waited = 0.0
+    iterator = iter(iterable)
+    try:
+        while True:
+            started = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                waited += time.perf_counter() - started
+            yield item
+    finally:
+        record(name, waited)
+
+
+def summary(wall_seconds: float) -> dict:
+    with _lock:
+        stats = dict(_stats)
+    names = [s for s in STAGES if s in stats] + sorted(set(stats) - set(STAGES))
+    return {
+        "wall_seconds": round(wall_seconds, 4),
+        "stages": {
+            name: {
+                "calls": stats[name][0],
+                "total_seconds": round(stats[name][1], 4),
+                "mean_ms": round(stats[name][1] / stats[name][0] * 1000, 2),
+                "max_ms": round(stats[name][2] * 1000, 2),
+            }
+            for name in names
+        },
+    }
+
+
+def report(wall_seconds: float, fmt: str = "table", out=sys.stderr):
+    data = summary(wall_seconds)
+    if fmt == "json":
+        print(json.dumps(data, indent=2), file=out)
+        return
+
+    print("\n=== Profile ===", file=out)
+    print(f"{'stage':<10} {'calls':>6} {'total s':>9} {'mean ms':>9} {'max ms':>9}", file=out)
+    for name, s in data["stages"].items():
+        print(
+            f"{name:<10} {s['calls']:>6} {s['total_seconds']:>9.3f} {s['mean_ms']:>9.1f} {s['max_ms']:>9.1f}",
+            file=out,
+        )
+    print(f"{'wall':<10} {'':>6} {data['wall_seconds']:>9.3f}", file=out)
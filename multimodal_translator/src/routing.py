@@ -0,0 +1,162 @@
+import atexit
+import math
+import threading
+import time
+
+from src.cache import JsonCache
+from src.config import (
+    LATENCY_TARGETS,
+    MODEL_PREFERRED,
+    MODEL_TIERS,
+    ROUTING_FLUSH_SECONDS,
+    ROUTING_STALE_SECONDS,
+)
+from src.profiling import stage
+
+DETAIL_TIER_SHIFT = {"brief": -1, "standard": 0, "detailed": 1}
+
+
+def _size_bucket(input_size: int) -> int:
+    # Power-of-two buckets of input characters: latency grows with input size.
+    return int(math.log2(max(input_size, 1024) // 1024 + 1))
+
+
+class ModelRouter:
+    """
+    Picks a model per call from a capability's tiers (fastest first).
+
+    The starting tier is the capability's preferred tier, shifted by the
+    requested detail level. Observed latencies are kept as an exponentially
+    weighted moving average per (model, input size bucket) in
+    outputs/cache/routing.sqlite3, so they carry over between CLI runs; while
+    the expected latency exceeds the endpoint's target the router steps down
+    to faster tiers. Estimates older than `stale_after` seconds are ignored
+    so a slow model is tried again later. The last decisions are stored
+    alongside (`python -m src.demo routing` prints them).
+
+    Routing works on an in-memory copy; new observations and decisions are
+    merged into the stored state at most every `flush_interval` seconds and
+    at exit, keeping the newer estimate per key, so concurrent runs do not
+    overwrite each other and upstream calls do no disk I/O in between.
+    """
+
+    def __init__(self, tiers: dict, preferred: dict, targets: dict, alpha: float = 0.2,
+                 stale_after: float = 300, history: int = 200, flush_interval: float = 5):
+        self.tiers = tiers
+        self.preferred = preferred
+        self.targets = targets
+        self.alpha = alpha
+        self.stale_after = stale_after
+        self.history = history
+        self.flush_interval = flush_interval
+        self.state = JsonCache("routing")
+        self._latency = None       # "model|bucket" -> (seconds, observed at)
+        self._dirty = {}           # latency entries not flushed yet
+        self._decisions = []       # decisions not flushed yet
+        self._flushed_at = time.monotonic()
+        self._lock = threading.Lock()
+        atexit.register(self.flush)
+
+    def _estimates(self):
+        if self._latency is None:
+            self._latency = dict(self.state.get("latency", {}))
+        return self._latency
+
+    def expected_latency(self, model: str, input_size: int):
+        with self._lock:
+            latency = self._estimates()
+            value, observed_at = latency.get(f"{model}|{_size_bucket(input_size)}", (None, 0))
+        if time.time() - observed_at > self.stale_after:
+            return None
+        return value
+
+    def choose(self, endpoint: str, capability: str, input_size: int = 0, detail_level: str = None) -> str:
+        tiers = self.tiers[capability]
+        start = tiers.index(self.preferred[capability]) + DETAIL_TIER_SHIFT.get(detail_level, 0)
+        start = min(max(start, 0), len(tiers) - 1)
+        target = self.targets.get(endpoint)
+
+        index, reason = start, "preferred"
+        while target is not None and index > 0:
+            expected = self.expected_latency(tiers[index], input_size)
+            if expected is None or expected <= target:
+                break
+            index -= 1
+            reason = f"{tiers[index + 1]} expected {expected:.1f}s > target {target:.1f}s"
+
+        self._record({
+            "time": time.time(),
+            "endpoint": endpoint,
+            "input_size": input_size,
+            "detail_level": detail_level,
+            "model": tiers[index],
+            "preferred": tiers[start],
+            "expected_latency": self.expected_latency(tiers[index], input_size),
+            "target": target,
+            "reason": reason,
+        })
+        return tiers[index]
+
+    def observe(self, model: str, input_size: int, seconds: float):
+        previous = self.expected_latency(model, input_size)
+        value = seconds if previous is None else self.alpha * seconds + (1 - self.alpha) * previous
+        key = f"{model}|{_size_bucket(input_size)}"
+        with self._lock:
+            self._estimates()[key] = self._dirty[key] = (value, time.time())
+        self._maybe_flush()
+
+    def _record(self, decision: dict):
+        with self._lock:
+            self._decisions.append(decision)
+        self._maybe_flush()
+
+    def _maybe_flush(self):
+        if time.monotonic() - self._flushed_at >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        """
+        Merges pending observations and decisions into the stored state.
+        """
+        with self._lock:
+            dirty, self._dirty = self._dirty, {}
+            decisions, self._decisions = self._decisions, []
+            self._flushed_at = time.monotonic()
+        if not dirty and not decisions:
+            return
+
+        def merge_latency(stored):
+            for key, entry in dirty.items():
+                if key not in stored or stored[key][1] <= entry[1]:
+                    stored[key] = entry
+            return stored
+
+        latency = self.state.merge("latency", merge_latency, {})
+        if decisions:
+            self.state.merge(
+                "decisions",
+                lambda stored: sorted(stored + decisions, key=lambda d: d["time"])[-self.history:],
+                [],
+            )
+        with self._lock:
+            # Take in estimates other runs stored, keeping ours observed since.
+            self._latency = {**latency, **self._dirty}
+
+    def call(self, endpoint: str, capability: str, input_size: int, create, detail_level: str = None,
+             model: str = None, **kwargs):
+        """
+        Calls `create(model=..., **kwargs)` with the routed model, or with
+        `model` if the agent was pinned to one, and records the latency.
+        """
+        model = model or self.choose(endpoint, capability, input_size, detail_level)
+        started = time.monotonic()
+        with stage("request"):
+            result = create(model=model, **kwargs)
+        self.observe(model, input_size, time.monotonic() - started)
+        return result
+
+
+router = ModelRouter(
+    MODEL_TIERS, MODEL_PREFERRED, LATENCY_TARGETS,
+    stale_after=ROUTING_STALE_SECONDS, flush_interval=ROUTING_FLUSH_SECONDS,
+)
@@ -0,0 +1,138 @@
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from src.archive import ResultArchive
+from src.config import ARCHIVE_MMAP_BYTES, ARCHIVE_PATH, OUTPUTS_BACKEND, OUTPUTS_QUOTA_BYTES
+from src.profiling import stage
+
+MANAGED_DIRS = ("audio", "visuals")
+
+
+class ArtifactStore:
+    """
+    Content-addressed store for generated audio and images under `outputs/`.
+
+    Artifacts are named after the SHA-256 of their bytes, so repeated runs
+    reuse the existing file instead of overwriting or duplicating it.
+    The modification time is refreshed on every hit and used as the
+    last-access time for LRU eviction.
+
+    With the "archive" backend (OUTPUTS_BACKEND), artifacts go into one
+    SQLite file instead (see src/archive.py) and the returned paths point
+    inside it; `exists`, `read_bytes` and `find` work for both backends.
+    """
+
+    def __init__(self, root: str = "outputs", quota_bytes: int = OUTPUTS_QUOTA_BYTES, backend: str = OUTPUTS_BACKEND):
+        self.root = Path(root)
+        self.quota_bytes = quota_bytes
+        self.archive = _archive() if backend == "archive" else None
+
+    def touch(self, path: Path):
+        if self.archive is not None and self.archive.owns(path):
+            self.archive.touch(path)
+            return
+        try:
+            os.utime(path, None)
+        except FileNotFoundError:
+            pass
+
+    def exists(self, path) -> bool:
+        if self.archive is not None and self.archive.owns(path):
+            return self.archive.exists(path)
+        return Path(path).exists()
+
+    def read_bytes(self, path) -> bytes:
+        if self.archive is not None and self.archive.owns(path):
+            return self.archive.read(path)
+        return Path(path).read_bytes()
+
+    def find(self, input_hash: str):
+        """
+        Returns the artifact stored for `input_hash` (see save_bytes), or
+        None. Only the archive keeps this index.
+        """
+        if self.archive is None:
+            return None
+        return self.archive.lookup(input_hash)
+
+    def save_bytes(self, data: bytes, directory, ext: str, input_hash: str = None) -> Path:
+        """
+        Writes `data` into `directory` under its content hash and returns the path.
+        With the archive backend, `input_hash` also records the artifact as
+        the result for that input (see find).
+        """
+        if self.archive is not None:
+            return self.archive.put(data, ext, input_hash)
+
+        digest = hashlib.sha256(data).hexdigest()
+        path = Path(directory) / f"{digest[:32]}.{ext.lstrip('.')}"
+        if path.exists():
+            self.touch(path)
+            return path
+
+        with stage("write"):
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        return path
+
+    def _managed_files(self):
+        for subdir in MANAGED_DIRS:
+            directory = self.root / subdir
+            if directory.is_dir():
+                yield from (p for p in directory.iterdir() if p.is_file())
+
+    def usage(self) -> int:
+        if self.archive is not None:
+            return self.archive.usage()
+        return sum(p.stat().st_size for p in self._managed_files())
+
+    def collect_garbage(self, quota_bytes: int = None, tmp_max_age: float = 3600):
+        """
+        Deletes least recently used artifacts until usage fits in the quota.
+        Returns (evicted_paths, bytes_in_use_after).
+        """
+        quota = self.quota_bytes if quota_bytes is None else quota_bytes
+        if self.archive is not None:
+            return self.archive.collect_garbage(quota)
+        now = time.time()
+        evicted = []
+        entries = []
+
+        for path in self._managed_files():
+            st = path.stat()
+            if path.suffix == ".tmp":
+                if now - st.st_mtime > tmp_max_age:
+                    path.unlink(missing_ok=True)
+                    evicted.append(path)
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= quota:
+                break
+            path.unlink(missing_ok=True)
+            evicted.append(path)
+            total -= size
+
+        return evicted, total
+
+
+_shared_archive = None
+_archive_lock = threading.Lock()
+
+
+def _archive():
+    # One archive object per process, so its per-thread connections are shared.
+    global _shared_archive
+    with _archive_lock:
+        if _shared_archive is None:
+            _shared_archive = ResultArchive(ARCHIVE_PATH, ARCHIVE_MMAP_BYTES)
+        return _shared_archive
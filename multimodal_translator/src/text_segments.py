@@ -0,0 +1,75 @@
+import re
+
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+_STREAM_BREAK = re.compile(r"(?<=[.!?])\s+|\n\s*\n")
+
+
+def split_sentences(text: str):
+    """
+    Splits text into sentences at ., ! and ? followed by whitespace.
+    Paragraph breaks always end a sentence.
+    """
+    sentences = []
+    for paragraph in _PARAGRAPH_BREAK.split(text):
+        paragraph = " ".join(paragraph.split())
+        if paragraph:
+            sentences.extend(s for s in _SENTENCE_END.split(paragraph) if s)
+    return sentences
+
+
+def iter_stream_sentences(pieces):
+    """
+    Yields the sentences of text arriving in pieces (e.g. streamed model
+    output) as soon as each is complete, i.e. followed by whitespace or a
+    paragraph break; whatever is left is yielded at the end.
+    """
+    buffer = ""
+    for piece in pieces:
+        buffer += piece
+        last = None
+        for last in _STREAM_BREAK.finditer(buffer):
+            pass
+        if last is not None:
+            yield from split_sentences(buffer[:last.end()])
+            buffer = buffer[last.end():]
+    yield from split_sentences(buffer)
+
+
+def normalize_phrase(sentence: str) -> str:
+    """
+    Normalizes a sentence for phrase-memo lookups: case, spacing and a
+    trailing period are ignored; ? and ! are kept since they change the
+    signing (question face, emphasis).
+    """
+    return " ".join(sentence.split()).casefold().strip("\"' ").rstrip(".").strip()
+
+
+def _split_long(sentence: str, max_chars: int):
+    words, current = sentence.split(" "), ""
+    for word in words:
+        if current and len(current) + 1 + len(word) > max_chars:
+            yield current
+            current = word
+        else:
+            current = f"{current} {word}" if current else word
+    if current:
+        yield current
+
+
+def pack_segments(text: str, max_chars: int):
+    """
+    Groups consecutive sentences into segments of at most `max_chars`
+    characters. A sentence longer than the limit is split at word boundaries.
+    """
+    segments, current = [], ""
+    for sentence in split_sentences(text):
+        for piece in _split_long(sentence, max_chars):
+            if current and len(current) + 1 + len(piece) > max_chars:
+                segments.append(current)
+                current = piece
+            else:
+                current = f"{current} {piece}" if current else piece
+    if current:
+        segments.append(current)
+    return segments
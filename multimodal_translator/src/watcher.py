@@ -0,0 +1,177 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+from src.agents.audio_producer import AudioProducerAgent
+from src.agents.sign_language_agent import SignLanguageAgent
+from src.agents.visual_describer import VisualDescriberAgent
+from src.agents.visual_simplifier import VisualSimplifierAgent
+from src.cache import JsonCache, sha256_file
+from src.storage import ArtifactStore
+
+IMAGE_EXTS = {".png", ".jpg", ".jpeg", ".gif", ".tif", ".tiff"}
+TEXT_EXTS = {".txt", ".md"}
+PARTIAL_SUFFIXES = {".tmp", ".part", ".crdownload", ".swp"}
+
+
+class FolderWatcher:
+    """
+    Watches an input directory and runs new or changed files through the
+    agents: images become a description plus audio, text files a sign
+    language gloss or a diagram plan.
+
+    The directory is polled every `poll_interval` seconds. A file is only
+    picked up once its size and mtime have not changed for `debounce`
+    seconds, so half-copied files are not processed. Results are recorded
+    in outputs/index.sqlite3 by source path, with the content hash they were
+    computed from; a file is reprocessed only when its content changes.
+    A file is hashed once per size and mtime, not on every poll.
+    One set of agents (and so one client) serves every file.
+    """
+
+    def __init__(
+        self,
+        input_dir,
+        workers: int = 4,
+        poll_interval: float = 1.0,
+        debounce: float = 2.0,
+        detail_level: str = "standard",
+        audio_format: str = "mp3",
+        text_mode: str = "sign",
+        generate_image: bool = False,
+        gc_interval: float = 0,
+    ):
+        self.input_dir = Path(input_dir)
+        self.poll_interval = poll_interval
+        self.debounce = debounce
+        self.detail_level = detail_level
+        self.text_mode = text_mode
+        self.generate_image = generate_image
+        self.gc_interval = gc_interval
+
+        self.describer = VisualDescriberAgent()
+        self.audio = AudioProducerAgent(audio_format=audio_format)
+        self.sign = SignLanguageAgent()
+        self.simplifier = VisualSimplifierAgent()
+        self.store = ArtifactStore()
+        self.index = JsonCache("index", cache_dir="outputs", max_entries=None)
+
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="watch")
+        self._seen = {}        # path -> ((size, mtime_ns), time the signature last changed)
+        self._digests = {}     # path -> ((size, mtime_ns), sha256 of the content at that signature)
+        self._in_flight = set()
+        self._failed = set()   # (path, sha256) that failed; retried when the content changes
+
+    def _candidates(self):
+        for path in self.input_dir.rglob("*"):
+            ext = path.suffix.lower()
+            if path.name.startswith(".") or ext in PARTIAL_SUFFIXES:
+                continue
+            if ext in IMAGE_EXTS or ext in TEXT_EXTS:
+                yield path
+
+    def _stable_files(self, now: float):
+        """
+        Yields (path, (size, mtime_ns)) for files whose size and mtime have
+        been unchanged for `debounce`.
+        """
+        present = set()
+        for path in self._candidates():
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            key = str(path)
+            present.add(key)
+            signature = (stat.st_size, stat.st_mtime_ns)
+            previous = self._seen.get(key)
+            if previous is None or previous[0] != signature:
+                self._seen[key] = (signature, now)
+            elif now - previous[1] >= self.debounce:
+                yield path, signature
+
+        for key in set(self._seen) - present:
+            del self._seen[key]
+            self._digests.pop(key, None)
+
+    def _digest(self, path: Path, signature):
+        key = str(path)
+        known = self._digests.get(key)
+        if known is not None and known[0] == signature:
+            return known[1]
+        digest = sha256_file(path)
+        self._digests[key] = (signature, digest)
+        return digest
+
+    def _process(self, path: Path, digest: str):
+        started = time.monotonic()
+        entry = {"sha256": digest}
+        if path.suffix.lower() in IMAGE_EXTS:
+            description = self.describer.describe_image(str(path), detail_level=self.detail_level)
+            entry.update(
+                kind="image_to_audio",
+                description=description,
+                audio=str(self.audio.synthesize(description)),
+            )
+        elif self.text_mode == "sign":
+            text = path.read_text(encoding="utf-8")
+            entry.update(kind="text_to_sign", **self.sign.text_to_sign_segmented(text))
+        else:
+            text = path.read_text(encoding="utf-8")
+            plan = self.simplifier.plan_diagram(text)
+            entry.update(kind="text_to_visual", plan=plan)
+            if self.generate_image:
+                entry["diagram"] = str(self.simplifier.generate_diagram_image(plan["diagram_description"]))
+
+        entry["processed_at"] = datetime.now(timezone.utc).isoformat()
+        entry["seconds"] = round(time.monotonic() - started, 2)
+        return entry
+
+    def _run(self, path: Path, digest: str):
+        key = str(path)
+        try:
+            entry = self._process(path, digest)
+            self.index.set(key, entry)
+            print(f"[watch] done   {path} ({entry['seconds']}s)")
+        except Exception as exc:
+            self._failed.add((key, digest))
+            print(f"[watch] failed {path}: {exc}")
+        finally:
+            self._in_flight.discard(key)
+
+    def scan(self):
+        """
+        Submits every stable file whose content is not in the index yet.
+        """
+        for path, signature in self._stable_files(time.monotonic()):
+            key = str(path)
+            if key in self._in_flight:
+                continue
+            try:
+                digest = self._digest(path, signature)
+            except FileNotFoundError:
+                continue
+            entry = self.index.get(key)
+            if (entry and entry.get("sha256") == digest) or (key, digest) in self._failed:
+                continue
+            self._in_flight.add(key)
+            print(f"[watch] queued {path}")
+            self.pool.submit(self._run, path, digest)
+
+    def run_forever(self):
+        print(f"[watch] watching {self.input_dir.resolve()} (Ctrl+C to stop)")
+        last_gc = time.monotonic()
+        try:
+            while True:
+                self.scan()
+                if self.gc_interval and time.monotonic() - last_gc >= self.gc_interval:
+                    evicted, usage = self.store.collect_garbage()
+                    if evicted:
+                        print(f"[watch] evicted {len(evicted)} files, {usage} bytes in use")
+                    last_gc = time.monotonic()
+                time.sleep(self.poll_interval)
+        except KeyboardInterrupt:
+            print("\n[watch] stopping, waiting for files in progress...")
+        finally:
+            self.pool.shutdown(wait=True)
@@ -0,0 +1,18 @@
+import os
+import tempfile
+
+# The agents build their OpenAI client on import, and the caches and
+# outputs live under the relative `outputs/` directory: give the tests a
+# dummy key and a scratch working directory before anything imports src.
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+os.chdir(tempfile.mkdtemp(prefix="translator-tests-"))
+
+
+def use_scratch_dir(test):
+    """
+    Runs `test` in a fresh working directory, so its caches and outputs
+    start empty.
+    """
+    previous = os.getcwd()
+    os.chdir(tempfile.mkdtemp(prefix="translator-tests-"))
+    test.addCleanup(os.chdir, previous)
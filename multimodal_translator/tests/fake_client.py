@@ -0,0 +1,135 @@
+import base64
+import io
+import json
+import threading
+from pathlib import Path
+from types import SimpleNamespace
+
+from PIL import Image
+
+
+def png_bytes(color="red", size=(8, 8)) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", size, color).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def save_png(name, color="red", size=(32, 32)) -> str:
+    path = Path(name)
+    path.write_bytes(png_bytes(color, size))
+    return str(path)
+
+
+def save_animation(name, scenes, repeat=3) -> str:
+    """
+    Writes a GIF showing `scenes` (colours) in turn, each for `repeat`
+    frames that differ from each other by a single pixel.
+    """
+    frames = []
+    for scene, colour in enumerate(scenes):
+        base = Image.new("RGB", (64, 64), colour)
+        for x in range(0, 64, 8):
+            base.paste("white" if (x // 8 + scene) % 2 else "black", (x, 0, x + 4 + scene, 64))
+        for i in range(repeat):
+            frame = base.copy()
+            frame.putpixel((i, i), (i * 40, 0, 0))
+            frames.append(frame)
+    frames[0].save(name, save_all=True, append_images=frames[1:], duration=100)
+    return str(name)
+
+
+class FakeClient:
+    """
+    Stands in for the OpenAI client: records every call and answers
+    without the network. Speech is the input text as bytes, structured
+    responses fill every "- key:" listed in the prompt (quoting the user's
+    text, if it is plain text), and plain
+    responses return `text` (streamed in small deltas when asked).
+    """
+
+    def __init__(self, text="A red square. It sits on a white page. Nothing else is shown."):
+        self.text = text
+        self.calls = []
+        self.frames_short = 0
+        self._lock = threading.Lock()
+        self.audio = SimpleNamespace(speech=SimpleNamespace(create=self._speech))
+        self.responses = SimpleNamespace(create=self._respond)
+        self.images = SimpleNamespace(generate=self._image)
+
+    def with_options(self, **kwargs):
+        return self
+
+    def calls_to(self, endpoint):
+        return [kwargs for name, kwargs in self.calls if name == endpoint]
+
+    def _record(self, endpoint, kwargs):
+        with self._lock:
+            self.calls.append((endpoint, kwargs))
+
+    def _speech(self, **kwargs):
+        self._record("speech", kwargs)
+        data = ("AUDIO:" + kwargs["input"]).encode("utf-8")
+        return SimpleNamespace(read=lambda: data, content=data)
+
+    def _image(self, **kwargs):
+        self._record("image", kwargs)
+        return SimpleNamespace(data=[SimpleNamespace(b64_json=base64.b64encode(png_bytes()).decode())])
+
+    def _respond(self, **kwargs):
+        self._record("responses", kwargs)
+        content = kwargs["input"][-1]["content"]
+        if kwargs.get("text"):
+            output = json.dumps(self._structured(kwargs["input"], content))
+        else:
+            output = self.text
+        if kwargs.get("stream"):
+            return self._events(output)
+        return SimpleNamespace(
+            output_text=output,
+            output=[SimpleNamespace(content=[SimpleNamespace(text=output)])],
+        )
+
+    def _structured(self, messages, content):
+        prompt = "\n".join(m["content"] for m in messages if isinstance(m["content"], str))
+        if isinstance(content, list):
+            prompt += "\n" + "\n".join(part["text"] for part in content if part.get("type") == "input_text")
+        keys = [
+            line.strip()[2:].split(":")[0].strip()
+            for line in prompt.splitlines()
+            if line.strip().startswith("- ")
+        ]
+        if isinstance(content, str):
+            data = {key: f"{key} for {content}" for key in keys}
+        else:
+            data = {key: f"{key} text" for key in keys}
+        if "frames" in data:
+            images = sum(1 for part in content if part.get("type") == "input_image")
+            data["frames"] = [f"frame {i}" for i in range(images - self.frames_short)]
+        return data
+
+    @staticmethod
+    def _events(output):
+        for i in range(0, len(output), 7):
+            yield SimpleNamespace(type="response.output_text.delta", delta=output[i:i + 7])
+        yield SimpleNamespace(type="response.completed")
+
+
+def install(test, client=None):
+    """
+    Patches `client` (a new FakeClient by default) into every agent module
+    for the duration of `test`, and returns it.
+    """
+    import importlib
+    import pkgutil
+    from unittest import mock
+
+    import src.agents
+
+    client = client or FakeClient()
+    for info in pkgutil.iter_modules(src.agents.__path__):
+        module = importlib.import_module(f"src.agents.{info.name}")
+        if hasattr(module, "client"):
+            patcher = mock.patch.object(module, "client", client)
+            patcher.start()
+            test.addCleanup(patcher.stop)
+    return client
@@ -0,0 +1,47 @@
+import unittest
+from pathlib import Path
+
+from src.archive import ResultArchive
+
+from tests import use_scratch_dir
+
+
+class ResultArchiveTests(unittest.TestCase):
+    def setUp(self):
+        use_scratch_dir(self)
+        self.archive = ResultArchive("outputs/archive.sqlite3")
+
+    def test_artifacts_are_stored_once_and_found_by_input_hash(self):
+        first = self.archive.put(b"audio", "mp3", input_hash="caption-1")
+        second = self.archive.put(b"audio", ".mp3", input_hash="caption-2")
+
+        self.assertEqual(first, second)
+        self.assertTrue(self.archive.owns(first))
+        self.assertFalse(first.exists())
+        self.assertEqual(self.archive.read(first), b"audio")
+        self.assertEqual(self.archive.lookup("caption-2"), first)
+        self.assertIsNone(self.archive.lookup("caption-3"))
+        self.assertEqual(self.archive.stats()["artifacts"], 1)
+        self.assertEqual(self.archive.stats()["results"], 2)
+
+    def test_paths_outside_the_archive_are_not_owned(self):
+        self.assertFalse(self.archive.owns(Path("outputs/audio/abc.mp3")))
+        with self.assertRaises(FileNotFoundError):
+            self.archive.read(self.archive.ref("0" * 64, "mp3"))
+
+    def test_garbage_collection_evicts_least_recently_used(self):
+        old = self.archive.put(b"old" * 10, "mp3", input_hash="old")
+        new = self.archive.put(b"new" * 10, "mp3", input_hash="new")
+        self.archive.touch(new)
+
+        evicted, usage = self.archive.collect_garbage(quota_bytes=30)
+
+        self.assertEqual(evicted, [old])
+        self.assertEqual(usage, 30)
+        self.assertFalse(self.archive.exists(old))
+        self.assertIsNone(self.archive.lookup("old"))
+        self.assertEqual(self.archive.lookup("new"), new)
+
+
+if __name__ == "__main__":
+    unittest.main()
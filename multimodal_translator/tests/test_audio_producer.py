@@ -0,0 +1,91 @@
+import time
+import unittest
+from unittest import mock
+
+from src.agents import audio_producer
+from src.agents.audio_producer import AudioProducerAgent
+
+from tests import use_scratch_dir
+from tests.fake_client import FakeClient
+
+LONG_TEXT = " ".join(f"Sentence number {i} describes part {i} of the image." for i in range(12))
+
+
+class AudioProducerTests(unittest.TestCase):
+    def setUp(self):
+        use_scratch_dir(self)
+        self.client = FakeClient()
+        patcher = mock.patch.object(audio_producer, "client", self.client)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.agent = AudioProducerAgent(model="tts-test", max_segment_chars=120)
+
+    def test_long_text_is_synthesized_in_segments_joined_in_order(self):
+        path = self.agent.synthesize(LONG_TEXT)
+
+        segments = [call["input"] for call in self.client.calls_to("speech")]
+        self.assertGreater(len(segments), 1)
+        self.assertTrue(all(len(segment) <= 120 for segment in segments))
+        self.assertEqual(" ".join(segments), LONG_TEXT)
+        self.assertEqual(path.read_bytes(), b"".join(("AUDIO:" + s).encode() for s in segments))
+
+    def test_first_segment_is_reported_before_the_whole_file(self):
+        first = []
+        path = self.agent.synthesize(LONG_TEXT + " Once more.", on_first_segment=first.append)
+
+        self.assertEqual(len(first), 1)
+        self.assertNotEqual(first[0], path)
+        self.assertTrue(path.read_bytes().startswith(first[0].read_bytes()))
+
+    def test_repeated_text_is_served_from_the_cache(self):
+        first = self.agent.synthesize("A short caption.")
+        second = self.agent.synthesize("A short caption.")
+
+        self.assertEqual(first, second)
+        self.assertEqual(len(self.client.calls_to("speech")), 1)
+
+    def test_voice_and_format_are_part_of_the_cache_key(self):
+        self.agent.synthesize("A short caption.")
+        self.agent.synthesize("A short caption.", audio_format="opus")
+
+        self.assertEqual([c["response_format"] for c in self.client.calls_to("speech")], ["mp3", "opus"])
+
+
+    def test_streamed_text_is_spoken_sentence_by_sentence(self):
+        pieces = ["A red sq", "uare. It sits on a ", "white page. Nothing", " else."]
+        first = []
+        text, path = self.agent.synthesize_stream(iter(pieces), on_first_segment=first.append)
+
+        self.assertEqual(text, "".join(pieces))
+        spoken = [call["input"] for call in self.client.calls_to("speech")]
+        self.assertEqual(spoken[0], "A red square.")
+        self.assertGreater(len(spoken), 1)
+        self.assertEqual(first[0].read_bytes(), b"AUDIO:A red square.")
+        self.assertEqual(path.read_bytes(), b"".join(("AUDIO:" + s).encode() for s in spoken))
+
+    def test_first_segment_is_ready_before_the_stream_ends(self):
+        first, ready_early = [], []
+
+        def pieces():
+            yield "First sentence. Second"
+            # The first sentence's audio is synthesized in the background.
+            for _ in range(200):
+                if first:
+                    break
+                time.sleep(0.005)
+            ready_early.append(bool(first))
+            yield " sentence."
+
+        self.agent.synthesize_stream(pieces(), on_first_segment=first.append)
+
+        self.assertEqual(ready_early, [True])
+
+    def test_streamed_speech_is_cached_like_synthesize(self):
+        text, path = self.agent.synthesize_stream(iter(["One sentence. ", "Two sentences."]))
+
+        self.assertEqual(self.agent.synthesize(text), path)
+        self.assertEqual(len(self.client.calls_to("speech")), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
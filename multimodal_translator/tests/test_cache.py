@@ -0,0 +1,55 @@
+import json
+import threading
+import unittest
+from pathlib import Path
+
+from src.cache import JsonCache
+
+from tests import use_scratch_dir
+
+
+class JsonCacheTests(unittest.TestCase):
+    def setUp(self):
+        use_scratch_dir(self)
+
+    def test_values_round_trip_and_persist(self):
+        JsonCache("levels").set("abc", {"brief": "A dog."})
+
+        self.assertEqual(JsonCache("levels").get("abc"), {"brief": "A dog."})
+        self.assertIsNone(JsonCache("levels").get("missing"))
+
+    def test_least_recently_used_entries_are_evicted(self):
+        cache = JsonCache("small", max_entries=2)
+        cache.update({"a": 1, "b": 2})
+        cache.set("c", 3)
+        cache.get("a")
+        cache.evict()
+
+        self.assertEqual(sorted(key for key, _ in cache.items()), ["a", "c"])
+
+    def test_merge_is_atomic_across_threads(self):
+        def count():
+            cache = JsonCache("counts", max_entries=None)
+            for _ in range(25):
+                cache.merge("hits", lambda n: n + 1, default=0)
+
+        threads = [threading.Thread(target=count) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(JsonCache("counts").get("hits"), 100)
+
+    def test_legacy_json_file_is_imported_once(self):
+        legacy = Path("outputs/cache/old.json")
+        legacy.parent.mkdir(parents=True)
+        legacy.write_text(json.dumps({"x": [1, 2]}), encoding="utf-8")
+
+        self.assertEqual(JsonCache("old").get("x"), [1, 2])
+        self.assertFalse(legacy.exists())
+        self.assertTrue(legacy.with_suffix(".json.imported").exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+import contextlib
+import functools
+import io
+import sys
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from src import demo, profiling, storage
+from src.archive import ResultArchive
+
+from tests import use_scratch_dir
+from tests.fake_client import install, save_png
+
+
+def run_demo(*argv):
+    """
+    Runs the CLI with `argv` and returns what it printed.
+    """
+    output = io.StringIO()
+    with mock.patch.object(sys, "argv", ["demo", *argv]):
+        with contextlib.redirect_stdout(output):
+            demo.main()
+    return output.getvalue()
+
+
+class ArgumentTests(unittest.TestCase):
+    def assertRejected(self, *argv):
+        with contextlib.redirect_stderr(io.StringIO()) as stderr:
+            with self.assertRaises(SystemExit):
+                run_demo(*argv)
+        return stderr.getvalue()
+
+    def test_prefetch_audio_needs_all_levels(self):
+        error = self.assertRejected("image_to_audio", "cat.png", "--prefetch-audio")
+
+        self.assertIn("--prefetch-audio needs --all-levels", error)
+
+    def test_archive_extract_needs_a_destination(self):
+        error = self.assertRejected("archive", "--extract", "outputs/archive.sqlite3/abc.mp3")
+
+        self.assertIn("--extract needs --to", error)
+
+
+class ImageToAudioTests(unittest.TestCase):
+    def setUp(self):
+        use_scratch_dir(self)
+        self.client = install(self)
+
+    def test_prefetch_audio_synthesizes_the_other_levels(self):
+        image = save_png("prefetch.png", "olive")
+        output = run_demo("image_to_audio", image, "--all-levels", "--prefetch-audio")
+
+        self.assertIn("Audio file saved at", output)
+        spoken = sorted(call["input"] for call in self.client.calls_to("speech"))
+        self.assertEqual(spoken, ["brief text", "detailed text", "standard text"])
+
+
+class ArchiveTests(unittest.TestCase):
+    def setUp(self):
+        use_scratch_dir(self)
+        archive = ResultArchive("outputs/archive.sqlite3")
+        for target, name, value in (
+            (storage, "_shared_archive", archive),
+            (demo, "ArtifactStore", functools.partial(storage.ArtifactStore, backend="archive")),
+        ):
+            patcher = mock.patch.object(target, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_archived_audio_prints_how_to_extract_it(self):
+        ref = storage.ArtifactStore(backend="archive").save_bytes(b"audio", "outputs/audio", "mp3")
+        location = demo._location(ref)
+
+        self.assertIn(f"archive --extract {ref} --to FILE", location)
+
+    def test_extract_copies_the_artifact_out(self):
+        ref = storage.ArtifactStore(backend="archive").save_bytes(b"audio", "outputs/audio", "mp3")
+        output = run_demo("archive", "--extract", str(ref), "--to", "speech.mp3")
+
+        self.assertIn("Extracted", output)
+        self.assertEqual(Path("speech.mp3").read_bytes(), b"audio")
+
+    def test_stats_count_artifacts_and_results(self):
+        store = storage.ArtifactStore(backend="archive")
+        store.save_bytes(b"one", "outputs/audio", "mp3", input_hash="a")
+        store.save_bytes(b"one", "outputs/audio", "mp3", input_hash="b")
+        output = run_demo("archive")
+
+        self.assertIn("Artifacts : 1 (3 bytes)", output)
+        self.assertIn("Results   : 2 indexed by input hash", output)
+
+
+class ProfileTests(unittest.TestCase):
+    def setUp(self):
+        use_scratch_dir(self)
+        install(self)
+        for name, value in (("_enabled", False), ("_stats", {})):
+            patcher = mock.patch.object(profiling, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_pipelined_run_reports_request_and_stream_stages(self):
+        image = save_png("profiled.png", "teal")
+        with mock.patch.object(profiling, "report") as report:
+            run_demo("--profile", "image_to_audio", image, "--pipelined")
+
+        report.assert_called_once()
+        stages = profiling.summary(0)["stages"]
+        for name in ("import", "encode", "request", "stream", "write"):
+            self.assertIn(name, stages)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+import random
+import unittest
+from unittest import mock
+
+from PIL import Image, ImageDraw
+
+from src.agents import visual_describer
+from src.cache import sha256_file
+from src.image_index import PerceptualIndex
+
+from tests import use_scratch_dir
+from tests.fake_client import install
+
+
+def save_detailed(name, seed, size=(256, 192)):
+    """
+    Writes an image of random shapes, detailed enough to fingerprint.
+    """
+    rng = random.Random(seed)
+    image = Image.new("RGB", size, "white")
+    draw = ImageDraw.Draw(image)
+    for _ in range(40):
+        x, y = rng.randrange(size[0]), rng.randrange(size[1])
+        colour = tuple(rng.randrange(256) for _ in range(3))
+        draw.rectangle((x, y, x + rng.randrange(10, 80), y + rng.randrange(10, 80)), fill=colour)
+    image.save(name)
+    return name
+
+
+def resized_copy(path, name, scale=0.5, quality=70):
+    with Image.open(path) as image:
+        width, height = image.size
+        image.resize((int(width * scale), int(height * scale))).save(name, quality=quality)
+    return name
+
+
+class PerceptualIndexTests(unittest.TestCase):
+    def setUp(self):
+        use_scratch_dir(self)
+
+    def index(self):
+        return PerceptualIndex(max_distance=10, max_entries=100, aspect_tolerance=0.02)
+
+    def test_resized_copy_resolves_to_the_original(self):
+        index = self.index()
+        original = save_detailed("original.png", seed=1)
+        key, found = index.resolve(original, sha256_file(original))
+        index.add(found, key)
+
+        copy = resized_copy(original, "copy.jpg")
+        self.assertEqual(index.resolve(copy, sha256_file(copy)), (sha256_file(original), None))
+        self.assertEqual(index.stats()["near_hits"], 1)
+
+    def test_different_image_or_shape_does_not_match(self):
+        index = self.index()
+        original = save_detailed("original.png", seed=2)
+        index.add(index.resolve(original, "a")[1], "a")
+
+        other = save_detailed("other.png", seed=3)
+        self.assertEqual(index.resolve(other, "b")[0], "b")
+        cropped = save_detailed("wide.png", seed=2, size=(256, 96))
+        self.assertEqual(index.resolve(cropped, "c")[0], "c")
+
+    def test_instances_keep_each_others_entries_and_counts(self):
+        first, second = self.index(), self.index()
+        for index, name, seed in ((first, "a", 4), (second, "b", 5)):
+            path = save_detailed(f"{name}.png", seed=seed)
+            index.add(index.resolve(path, name)[1], name)
+
+        stats = self.index().stats()
+        self.assertEqual(stats["indexed"], 2)
+        self.assertEqual(stats["lookups"], 2)
+
+    def test_described_copy_reuses_the_description(self):
+        client = install(self)
+        agent = visual_describer.VisualDescriberAgent(model="vision-test")
+        patcher = mock.patch.object(visual_describer, "image_index", self.index())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        original = save_detailed("original.png", seed=6)
+        copy = resized_copy(original, "copy.jpg")
+
+        self.assertEqual(agent.describe_image(original), agent.describe_image(copy))
+        self.assertEqual(len(client.calls_to("responses")), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
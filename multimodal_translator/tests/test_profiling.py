@@ -0,0 +1,57 @@
+import time
+import unittest
+from unittest import mock
+
+from src import profiling
+
+
+class ProfilingTests(unittest.TestCase):
+    def setUp(self):
+        for name, value in (("_enabled", True), ("_stats", {})):
+            patcher = mock.patch.object(profiling, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_stage_counts_calls_and_time(self):
+        for _ in range(2):
+            with profiling.stage("parse"):
+                time.sleep(0.01)
+
+        parse = profiling.summary(1.0)["stages"]["parse"]
+        self.assertEqual(parse["calls"], 2)
+        self.assertGreaterEqual(parse["total_seconds"], 0.02)
+
+    def test_timed_counts_only_the_wait_for_items(self):
+        def slow():
+            for i in range(3):
+                time.sleep(0.01)
+                yield i
+
+        items = []
+        for item in profiling.timed("stream", slow()):
+            time.sleep(0.05)  # consumer time, not counted
+            items.append(item)
+
+        stream = profiling.summary(1.0)["stages"]["stream"]
+        self.assertEqual(items, [0, 1, 2])
+        self.assertEqual(stream["calls"], 1)
+        self.assertGreaterEqual(stream["total_seconds"], 0.03)
+        self.assertLess(stream["total_seconds"], 0.15)
+
+    def test_stages_are_reported_in_pipeline_order(self):
+        for name in ("write", "request", "encode"):
+            profiling.record(name, 0.1)
+
+        self.assertEqual(list(profiling.summary(1.0)["stages"]), ["encode", "request", "write"])
+
+    def test_disabled_profiling_records_nothing(self):
+        with mock.patch.object(profiling, "_enabled", False):
+            with profiling.stage("parse"):
+                pass
+            list(profiling.timed("stream", [1, 2]))
+
+        self.assertEqual(profiling.summary(0)["stages"], {})
+
+
+if __name__ == "__main__":
+    unittest.main()
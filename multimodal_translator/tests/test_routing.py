@@ -0,0 +1,60 @@
+import unittest
+
+from src.routing import ModelRouter
+
+from tests import use_scratch_dir
+
+TIERS = {"vision": ["nano", "mini", "full"]}
+PREFERRED = {"vision": "mini"}
+TARGETS = {"image_description": 5}
+
+
+class ModelRouterTests(unittest.TestCase):
+    def setUp(self):
+        use_scratch_dir(self)
+
+    def router(self, **kwargs):
+        return ModelRouter(TIERS, PREFERRED, TARGETS, **kwargs)
+
+    def test_preferred_tier_is_shifted_by_detail_level(self):
+        router = self.router()
+
+        self.assertEqual(router.choose("image_description", "vision"), "mini")
+        self.assertEqual(router.choose("image_description", "vision", detail_level="brief"), "nano")
+        self.assertEqual(router.choose("image_description", "vision", detail_level="detailed"), "full")
+
+    def test_slow_model_steps_down_to_a_faster_tier(self):
+        router = self.router()
+        router.observe("mini", 100, 9.0)
+
+        self.assertEqual(router.choose("image_description", "vision", 100), "nano")
+        self.assertEqual(router.choose("image_description", "vision", 1 << 20), "mini")
+
+    def test_stale_estimates_are_ignored(self):
+        router = self.router(stale_after=-1)
+        router.observe("mini", 100, 9.0)
+
+        self.assertEqual(router.choose("image_description", "vision", 100), "mini")
+
+    def test_estimates_carry_over_between_runs(self):
+        first = self.router()
+        first.observe("mini", 100, 9.0)
+        first.flush()
+
+        second = self.router()
+        self.assertEqual(second.choose("image_description", "vision", 100), "nano")
+        second.flush()
+        decisions = self.router().state.get("decisions")
+        self.assertEqual(decisions[-1]["model"], "nano")
+
+    def test_call_uses_a_pinned_model_and_records_its_latency(self):
+        router = self.router()
+        result = router.call("image_description", "vision", 100, lambda model, **kwargs: (model, kwargs),
+                             model="full", input="x")
+
+        self.assertEqual(result, ("full", {"input": "x"}))
+        self.assertIsNotNone(router.expected_latency("full", 100))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,46 @@
+import unittest
+
+from src.agents.sign_language_agent import SignLanguageAgent
+
+from tests import use_scratch_dir
+from tests.fake_client import install
+
+TEXT = "The meeting starts at 3 PM. Bring your laptop. The meeting starts at 3 PM."
+
+
+class SegmentedSignTests(unittest.TestCase):
+    def setUp(self):
+        use_scratch_dir(self)
+        self.client = install(self)
+        self.agent = SignLanguageAgent(model="text-test")
+
+    def test_sentences_are_joined_in_order_and_repeats_translated_once(self):
+        segments = []
+        result = self.agent.text_to_sign_segmented(
+            TEXT, on_segment=lambda index, total, data, cached: segments.append((index, total, cached)),
+        )
+
+        self.assertEqual(
+            result["asl_gloss"],
+            "asl_gloss for The meeting starts at 3 PM. "
+            "asl_gloss for Bring your laptop. "
+            "asl_gloss for The meeting starts at 3 PM.",
+        )
+        self.assertEqual(sorted(index for index, _, _ in segments), [0, 1, 2])
+        self.assertTrue(all(total == 3 for _, total, _ in segments))
+        self.assertEqual(len(self.client.calls_to("responses")), 2)
+
+    def test_memo_serves_sentences_seen_before(self):
+        self.agent.text_to_sign_segmented(TEXT)
+        cached = []
+        result = SignLanguageAgent(model="text-test").text_to_sign_segmented(
+            "the meeting starts at 3 pm", on_segment=lambda index, total, data, hit: cached.append(hit),
+        )
+
+        self.assertEqual(cached, [True])
+        self.assertEqual(result["asl_gloss"], "asl_gloss for The meeting starts at 3 PM.")
+        self.assertEqual(len(self.client.calls_to("responses")), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+import unittest
+
+from src.agents.visual_describer import VisualDescriberAgent
+
+from tests import use_scratch_dir
+from tests.fake_client import install, save_animation, save_png
+
+
+class AllLevelsTests(unittest.TestCase):
+    def setUp(self):
+        use_scratch_dir(self)
+        self.client = install(self)
+        self.agent = VisualDescriberAgent(model="vision-test")
+
+    def test_one_call_returns_and_caches_every_level(self):
+        image = save_png("levels.png", "navy")
+        levels = self.agent.describe_all_levels(image)
+
+        self.assertEqual(sorted(levels), ["brief", "detailed", "standard"])
+        self.assertEqual(self.agent.describe_image(image, "detailed"), levels["detailed"])
+        self.assertEqual(self.agent.describe_image(image, "brief", all_levels=True), levels["brief"])
+        self.assertEqual(len(self.client.calls_to("responses")), 1)
+
+
+class StreamDescriptionTests(unittest.TestCase):
+    def setUp(self):
+        use_scratch_dir(self)
+        self.client = install(self)
+        self.agent = VisualDescriberAgent(model="vision-test")
+
+    def test_streamed_description_is_cached_whole(self):
+        image = save_png("streamed.png", "maroon")
+        pieces = list(self.agent.stream_description(image, "brief"))
+
+        self.assertGreater(len(pieces), 1)
+        self.assertEqual("".join(pieces), self.client.text)
+        self.assertEqual(list(self.agent.stream_description(image, "brief")), [self.client.text])
+        self.assertEqual(self.agent.describe_image(image, "brief"), self.client.text)
+        self.assertEqual(len(self.client.calls_to("responses")), 1)
+
+
+class SequenceTests(unittest.TestCase):
+    def setUp(self):
+        use_scratch_dir(self)
+        self.client = install(self)
+        self.agent = VisualDescriberAgent(model="vision-test")
+
+    def test_key_frames_are_labelled_with_their_frame_numbers(self):
+        gif = save_animation("scenes.gif", ["red", "blue", "green"])
+        narration = self.agent.describe_image(gif)
+
+        self.assertEqual(
+            narration.splitlines(),
+            ["Frame 1 of 9: frame 0", "Frame 4 of 9: frame 1", "Frame 7 of 9: frame 2"],
+        )
+        self.assertEqual(len(self.client.calls_to("responses")), 1)
+
+    def test_single_key_frame_is_described_as_a_still_image(self):
+        gif = save_animation("still.gif", ["red"], repeat=4)
+        narration = self.agent.describe_image(gif)
+
+        self.assertEqual(narration, self.client.text)
+        self.assertNotIn("text", self.client.calls_to("responses")[0])
+
+    def test_short_batch_falls_back_to_one_call_per_frame(self):
+        self.client.frames_short = 1
+        gif = save_animation("short.gif", ["red", "blue"])
+        narration = self.agent.describe_image(gif)
+
+        self.assertEqual(
+            narration.splitlines(),
+            [f"Frame 1 of 6: {self.client.text}", f"Frame 4 of 6: {self.client.text}"],
+        )
+        self.assertEqual(len(self.client.calls_to("responses")), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+import contextlib
+import io
+import os
+import unittest
+from pathlib import Path
+
+from src.watcher import FolderWatcher
+
+from tests import use_scratch_dir
+from tests.fake_client import install
+
+
+class FolderWatcherTests(unittest.TestCase):
+    def setUp(self):
+        use_scratch_dir(self)
+        self.client = install(self)
+        self.inbox = Path("inbox")
+        self.inbox.mkdir()
+        self.watcher = FolderWatcher(self.inbox, workers=1, debounce=0)
+        self.addCleanup(self.watcher.pool.shutdown)
+
+    def scan(self):
+        """
+        Scans twice (the first scan only notes new signatures) and waits for
+        the queued files.
+        """
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.watcher.scan()
+            self.watcher.scan()
+            self.watcher.pool.submit(lambda: None).result()
+
+    def test_stable_file_is_processed_once(self):
+        note = self.inbox / "note.txt"
+        note.write_text("Bring your laptop.", encoding="utf-8")
+        self.scan()
+        self.scan()
+
+        entry = self.watcher.index.get(str(note))
+        self.assertEqual(entry["kind"], "text_to_sign")
+        self.assertEqual(entry["asl_gloss"], "asl_gloss for Bring your laptop.")
+        self.assertEqual(len(self.client.calls_to("responses")), 1)
+
+    def test_changed_file_is_reprocessed(self):
+        note = self.inbox / "note.txt"
+        note.write_text("Bring your laptop.", encoding="utf-8")
+        self.scan()
+        note.write_text("Bring your charger.", encoding="utf-8")
+        os.utime(note, ns=(0, note.stat().st_mtime_ns + 1_000_000))
+        self.scan()
+
+        self.assertEqual(self.watcher.index.get(str(note))["asl_gloss"], "asl_gloss for Bring your charger.")
+        self.assertEqual(len(self.client.calls_to("responses")), 2)
+
+    def test_partial_downloads_are_ignored(self):
+        (self.inbox / "photo.png.part").write_bytes(b"not yet")
+        self.scan()
+
+        self.assertEqual(self.client.calls, [])
+
+
+if __name__ == "__main__":
+    unittest.main()